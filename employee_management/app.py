@@ -1,51 +1,169 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory
-from flask_mysqldb import MySQL
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory, send_file, abort, Response, stream_with_context, g
+from werkzeug.security import safe_join
+from werkzeug.middleware.proxy_fix import ProxyFix
+from db_pool import PooledMySQL
+import MySQLdb
+import MySQLdb.cursors
 from flask_mail import Mail, Message
 from config import Config
-import bcrypt
 import os
 from datetime import datetime, timedelta
 import secrets
-from werkzeug.utils import secure_filename
-from PIL import Image
 import math
+import json
+import click
+import threading
+import time
+import payroll
+import rollups
+import report_cache
+import report_export
+import sql_instrumentation
+import metrics
+import passwords
+import outbox
+import images
+import upload_gc
+import assets
+import employee_list
+import employee_search
+import dashboard_stats
+import attendance_grid
+import attendance_batch
+import attendance_store
+import compression
+import live_updates
+import mimetypes
+import datagen
+import benchmark
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
-mysql = MySQL(app)
+app.wsgi_app = compression.CompressionMiddleware(app.wsgi_app,
+                                                 min_size=app.config['COMPRESSION_MIN_SIZE'],
+                                                 gzip_level=app.config['COMPRESSION_GZIP_LEVEL'],
+                                                 brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'],
+                                                 enabled=app.config['COMPRESSION_ENABLED'])
+if app.config['TRUSTED_PROXY_HOPS'] > 0:
+    # request.remote_addr is the client from X-Forwarded-For, not the proxy every request arrives from
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'],
+                            x_proto=app.config['TRUSTED_PROXY_HOPS'])
+
+mysql = PooledMySQL(app)
+sql_instrumentation.init_app(app, mysql)
+metrics_exposition = metrics.init_app(app)
 mail = Mail(app)
+reports_cache = report_cache.create_cache(app.config)
+dashboard_cache = report_cache.create_cache(app.config, ttl=app.config['DASHBOARD_CACHE_TTL'], prefix='dashboard:')
+live_broker = live_updates.create_broker(app.config)
+password_hasher = passwords.PasswordHasher(rounds=app.config['BCRYPT_ROUNDS'],
+                                           workers=app.config['PASSWORD_HASH_WORKERS'],
+                                           max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+                                           timeout=app.config['PASSWORD_HASH_TIMEOUT'])
+email_sender = outbox.OutboxSender(app, mysql)
+upload_collector = upload_gc.ScheduledCollector(app, mysql)
+asset_manifest = assets.AssetManifest(app.static_folder)
+image_processor = images.ImageProcessor(app.config['UPLOAD_FOLDER'], workers=app.config['IMAGE_WORKERS'])
+login_ip_limiter = passwords.RateLimiter(app.config['LOGIN_IP_BURST'], app.config['LOGIN_IP_PER_MINUTE'])
+login_email_limiter = passwords.RateLimiter(app.config['LOGIN_EMAIL_BURST'], app.config['LOGIN_EMAIL_PER_MINUTE'])
 
 # Helper functions
 def get_db_connection():
     return mysql.connection
 
+# bcrypt runs on the bounded hasher pool - both raise passwords.HasherBusy when it is saturated
 def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_hasher.hash(password)
 
 def check_password(password, hashed):
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    return password_hasher.check(password, hashed)
+
+def queue_email(msg):
+    """Store msg in the email outbox - the background sender delivers it"""
+    cur = mysql.connection.cursor()
+    try:
+        outbox.enqueue(cur, msg)
+        mysql.connection.commit()
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+    if app.config['EMAIL_OUTBOX_WORKER']:
+        email_sender.notify()
+
+def tenant_data_changed(cur, user_id):
+    """Invalidate the tenant's cached reports and dashboard - call inside the write transaction"""
+    report_cache.bump_data_version(cur, user_id)
+    g.setdefault('changed_tenants', set()).add(user_id)
+
+def publish_attendance_changes(cur, user_id, changes):
+    """Push committed attendance writes - (employee_id, date) pairs - to the tenant's open pages"""
+    if not app.config['LIVE_UPDATES_ENABLED'] or not changes or not live_broker.has_subscribers(user_id):
+        return
+    try:
+        event = live_updates.attendance_event(cur, user_id, changes, datetime.now().date(),
+                                              max_rows=app.config['LIVE_UPDATES_MAX_ROWS'])
+        live_broker.publish(user_id, event)
+    except Exception as e:
+        # The write is committed - a lost update only means open pages catch up on reload
+        print(f"Live update error: {str(e)}")
+
+@app.teardown_request
+def invalidate_dashboard_cache(error=None):
+    # After the view has committed - dropping the entry earlier could let a
+    # concurrent dashboard load cache the pre-commit figures again
+    for user_id in g.pop('changed_tenants', ()):
+        dashboard_cache.invalidate(dashboard_stats.cache_key(user_id, datetime.now().date()))
+
+@app.before_request
+def start_background_workers():
+    # The email sender also picks up messages left in the outbox by a previous run
+    if app.config['EMAIL_OUTBOX_WORKER']:
+        email_sender.ensure_started()
+    if app.config['UPLOAD_GC_INTERVAL_HOURS'] > 0:
+        upload_collector.ensure_started()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif'}
 
 def save_profile_image(file):
+    """Store the upload by content hash and resize it in the background"""
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        image = Image.open(file)
-        image.thumbnail((300, 300))
-        image.save(filepath)
+        try:
+            filename = images.store_upload(app.config['UPLOAD_FOLDER'], file.read())
+        except images.InvalidImage as e:
+            print(f"Invalid profile image upload: {str(e)}")
+            return None
         
+        image_processor.submit(filename)
         return filename
     return None
 
+@app.template_global()
+def profile_image_sources(filename, display_px):
+    """src/srcset/webp_srcset of a profile image shown at display_px CSS pixels"""
+    return images.sources(app.config['UPLOAD_FOLDER'], filename, display_px,
+                          lambda name: url_for('static', filename='images/uploads/' + name))
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static asset - the fingerprinted build when `flask build-assets` has run"""
+    hashed = asset_manifest.lookup(filename)
+    if hashed:
+        return url_for('dist_asset', filename=hashed)
+    return url_for('static', filename=filename)
+
+@app.after_request
+def cache_hashed_uploads(response):
+    # Content-hashed profile photos never change under the same name
+    if request.endpoint == 'static' and response.status_code in (200, 304):
+        name = os.path.basename((request.view_args or {}).get('filename', ''))
+        if images.HASHED_NAME.match(name) or images.DERIVED_NAME.match(name):
+            response.headers['Cache-Control'] = assets.IMMUTABLE
+    return response
+
 # Routes
 @app.route('/')
 def index():
@@ -63,13 +181,37 @@ def login():
         email = request.form['email']
         password = request.form['password']
         
+        # Throttle floods before any bcrypt work is spent on them
+        ip_allowed = login_ip_limiter.allow(request.remote_addr or '')
+        email_allowed = login_email_limiter.allow(email.strip().lower())
+        if not (ip_allowed and email_allowed):
+            flash('Too many login attempts. Please wait a minute and try again.', 'error')
+            return render_template('auth/login.html'), 429
+        
         cur = mysql.connection.cursor()
         cur.execute("SELECT * FROM users WHERE email = %s", (email,))
         user = cur.fetchone()
-        cur.close()
         
         if user:
-            if check_password(password, user[2]):  # user[2] is the password field
+            try:
+                password_ok = check_password(password, user[2])  # user[2] is the password field
+            except passwords.HasherBusy:
+                cur.close()
+                flash('The server is busy right now. Please try again in a moment.', 'error')
+                return render_template('auth/login.html'), 503
+            
+            if password_ok:
+                # Upgrade the stored hash when BCRYPT_ROUNDS changed since it was made
+                if password_hasher.needs_rehash(user[2]):
+                    try:
+                        cur.execute("UPDATE users SET password = %s WHERE id = %s",
+                                   (hash_password(password), user[0]))
+                        mysql.connection.commit()
+                    except Exception as e:
+                        mysql.connection.rollback()
+                        print(f"Password rehash error: {str(e)}")
+                cur.close()
+                
                 session['user_id'] = user[0]
                 session['user_name'] = user[3]
                 session['user_email'] = user[1]
@@ -77,9 +219,11 @@ def login():
                 return redirect(url_for('dashboard'))
             else:
                 # Wrong password
+                cur.close()
                 flash('Invalid password. Please try again.', 'error')
         else:
             # User not found
+            cur.close()
             flash('No account found with this email address.', 'error')
     
     return render_template('auth/login.html')
@@ -116,7 +260,12 @@ def register():
             return render_template('auth/register.html')
         
         # Create new user
-        hashed_password = hash_password(password)
+        try:
+            hashed_password = hash_password(password)
+        except passwords.HasherBusy:
+            cur.close()
+            flash('The server is busy right now. Please try again in a moment.', 'error')
+            return render_template('auth/register.html'), 503
         
         try:
             cur.execute("INSERT INTO users (name, email, password) VALUES (%s, %s, %s)", 
@@ -230,8 +379,7 @@ def forgot_password():
                 """
                 
                 # Send email
-                mail.send(msg)
-                print(f"Password reset email sent to: {email}")  # Debug log
+                queue_email(msg)
                 flash('Password reset link has been sent to your email.', 'success')
                 
             except Exception as e:
@@ -300,7 +448,7 @@ def reset_password(token):
                     recipients=[email]
                 )
                 msg.body = 'Your password has been successfully reset. You can now login with your new password.'
-                mail.send(msg)
+                queue_email(msg)
             except Exception as email_error:
                 print(f"Confirmation email failed: {email_error}")  # Log but don't show to user
             
@@ -369,73 +517,124 @@ def test_email():
         </html>
         '''
         
-        mail.send(msg)
-        flash('Test email sent successfully! Check your inbox.', 'success')
+        queue_email(msg)
+        flash('Test email queued! It will arrive in your inbox shortly.', 'success')
         return redirect(url_for('dashboard'))
     except Exception as e:
         flash(f'Email error: {str(e)}', 'error')
         return redirect(url_for('dashboard'))
 
+# Month filters use a half-open date range (never YEAR()/MONTH() on the column)
+# so the attendance date indexes can be range-scanned - see `flask explain-month-queries`
+WEEKLY_SALARY_QUERY = """
+    SELECT 
+        e.id,
+        e.name,
+        e.leaving_date,
+        COALESCE(sc.per_day_salary, 350.00) as per_day_salary,
+        COALESCE(sc.salary_type, 'per_day') as salary_type,
+        COALESCE(sc.monthly_salary, 0) as monthly_salary,
+        COALESCE(sc.holiday_day, 'friday') as holiday_day,
+        a.attendance_date,
+        a.status,
+        a.advance
+    FROM employees e
+    LEFT JOIN salary_config sc ON e.id = sc.employee_id AND sc.user_id = e.user_id
+    INNER JOIN attendance a ON e.id = a.employee_id AND a.user_id = e.user_id
+    WHERE e.user_id = %s AND e.deleted_at IS NULL
+    AND a.attendance_date >= %s 
+    AND a.attendance_date < %s
+    {employee_filter}
+    ORDER BY e.leaving_date IS NULL DESC, e.name, a.attendance_date
+"""
+
+# Lifetime totals per employee in one grouped pass over attendance
+EMPLOYEE_SUMMARY_QUERY = f"""
+    SELECT 
+        e.id,
+        e.name,
+        e.joining_date,
+        e.leaving_date,
+        COALESCE(sc.per_day_salary, 350.00) as per_day_salary,
+        COALESCE(sc.salary_type, 'per_day') as salary_type,
+        COALESCE(sc.monthly_salary, 0) as monthly_salary,
+        COUNT(CASE WHEN a.status = 'present' THEN 1 END) as total_present,
+        COUNT(CASE WHEN a.status = 'half_day' THEN 1 END) as total_half_days,
+        COUNT(CASE WHEN a.status = 'absent' THEN 1 END) as total_absent,
+        COALESCE(SUM({rollups.EARNED_EXPRESSION}), 0) as total_earned,
+        COALESCE(SUM(a.advance), 0) as total_advance
+    FROM employees e
+    LEFT JOIN salary_config sc ON e.id = sc.employee_id AND sc.user_id = e.user_id
+    LEFT JOIN attendance a ON a.employee_id = e.id AND a.user_id = e.user_id
+    WHERE e.user_id = %s AND e.deleted_at IS NULL
+    GROUP BY e.id, e.name, e.joining_date, e.leaving_date,
+             sc.per_day_salary, sc.salary_type, sc.monthly_salary
+    ORDER BY e.leaving_date IS NULL DESC, e.name
+"""
+
+# Same columns as EMPLOYEE_SUMMARY_QUERY, read from the employee_rollup table
+EMPLOYEE_SUMMARY_ROLLUP_QUERY = """
+    SELECT 
+        e.id,
+        e.name,
+        e.joining_date,
+        e.leaving_date,
+        COALESCE(sc.per_day_salary, 350.00) as per_day_salary,
+        COALESCE(sc.salary_type, 'per_day') as salary_type,
+        COALESCE(sc.monthly_salary, 0) as monthly_salary,
+        COALESCE(r.total_present, 0) as total_present,
+        COALESCE(r.total_half_days, 0) as total_half_days,
+        COALESCE(r.total_absent, 0) as total_absent,
+        COALESCE(r.total_earned, 0) as total_earned,
+        COALESCE(r.total_advance, 0) as total_advance
+    FROM employees e
+    LEFT JOIN salary_config sc ON e.id = sc.employee_id AND sc.user_id = e.user_id
+    LEFT JOIN employee_rollup r ON r.employee_id = e.id AND r.user_id = e.user_id
+    WHERE e.user_id = %s AND e.deleted_at IS NULL
+    ORDER BY e.leaving_date IS NULL DESC, e.name
+"""
+
 @app.route('/dashboard')
 def dashboard():
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
     user_id = session['user_id']
-    cur = mysql.connection.cursor()
-    
-    # Total Employees (user-specific) - exclude deleted and only count active employees
-    cur.execute("SELECT COUNT(*) FROM employees WHERE deleted_at IS NULL AND leaving_date IS NULL AND user_id = %s", (user_id,))
-    total_employees = cur.fetchone()[0]
-    
-    # Present Today (user-specific) - exclude deleted and left employees
-    cur.execute("""
-        SELECT COUNT(DISTINCT a.employee_id) 
-        FROM attendance a 
-        JOIN employees e ON a.employee_id = e.id 
-        WHERE a.attendance_date = %s AND a.status IN ('present', 'half_day') 
-        AND e.user_id = %s AND e.deleted_at IS NULL AND e.leaving_date IS NULL
-    """, (datetime.now().date(), user_id))
-    present_today = cur.fetchone()[0]
-    
-    # Total Salary Paid This Month (user-specific) - exclude deleted and left employees
-    cur.execute("""
-        SELECT COALESCE(SUM(employee_salary), 0) 
-        FROM (
-            SELECT 
-                sc.per_day_salary * 
-                (COUNT(CASE WHEN a.status = 'present' THEN 1 END) + 
-                 COUNT(CASE WHEN a.status = 'half_day' THEN 1 END) * 0.5) as employee_salary
-            FROM employees e
-            JOIN salary_config sc ON e.id = sc.employee_id
-            LEFT JOIN attendance a ON e.id = a.employee_id 
-                AND YEAR(a.attendance_date) = YEAR(CURDATE()) 
-                AND MONTH(a.attendance_date) = MONTH(CURDATE())
-            WHERE e.deleted_at IS NULL AND e.leaving_date IS NULL AND e.user_id = %s
-            GROUP BY e.id, sc.per_day_salary
-        ) as salary_calc
-    """, (user_id,))
-    salary_result = cur.fetchone()
-    total_salary = float(salary_result[0]) if salary_result and salary_result[0] else 0
-    
-    # Recent Activity - Last 5 attendance records (user-specific) - exclude deleted and left employees
-    cur.execute("""
-        SELECT e.name, a.attendance_date, a.status, a.updated_at
-        FROM attendance a
-        JOIN employees e ON a.employee_id = e.id
-        WHERE e.user_id = %s AND e.deleted_at IS NULL AND e.leaving_date IS NULL
-        ORDER BY a.updated_at DESC
-        LIMIT 5
-    """, (user_id,))
-    recent_activity = cur.fetchall()
-    
-    cur.close()
+    today = datetime.now().date()
+    if app.config['DASHBOARD_CACHE_TTL'] > 0:
+        stats = dashboard_cache.get_or_compute(dashboard_stats.cache_key(user_id, today),
+                                               lambda: load_dashboard_stats(user_id, today))
+    else:
+        # DASHBOARD_CACHE_TTL=0 disables caching
+        stats = load_dashboard_stats(user_id, today)
     
     return render_template('dashboard.html', 
-                         total_employees=total_employees, 
-                         present_today=present_today,
-                         total_salary=total_salary,
-                         recent_activity=recent_activity)
+                         total_employees=stats['total_employees'], 
+                         present_today=stats['present_today'],
+                         total_salary=stats['month_salary'],
+                         recent_activity=stats['recent_activity'],
+                         today=today.isoformat())
+
+def load_dashboard_stats(user_id, today):
+    """One round trip for every dashboard figure (two when the month counter must be rebuilt)"""
+    cur = mysql.connection.cursor()
+    try:
+        stats = dashboard_stats.load(cur, user_id, today)
+        if stats['month_salary'] is None:
+            month = today.strftime('%Y-%m')
+            try:
+                stats['month_salary'] = dashboard_stats.rebuild_month_salary(cur, user_id, month)
+                mysql.connection.commit()
+            except Exception as e:
+                # e.g. a deadlock with a concurrent attendance write - show the figure without storing it
+                mysql.connection.rollback()
+                print(f"Month salary counter error: {str(e)}")
+                month_start, next_month = payroll.month_range(month)
+                cur.execute(dashboard_stats.MONTH_SALARY_QUERY, (user_id, month_start, next_month, user_id))
+                stats['month_salary'] = float(cur.fetchone()[0] or 0)
+        return stats
+    finally:
+        cur.close()
 
 @app.route('/employees')
 def employees():
@@ -443,37 +642,102 @@ def employees():
         return redirect(url_for('login'))
     
     user_id = session['user_id']
+    options = employee_list_options(request.args)
     cur = mysql.connection.cursor()
     
-    # Get all employees for current user (exclude deleted ones)
-    cur.execute("""
-        SELECT e.id, e.name, e.mobile_number, e.pan_number, e.date_of_birth, 
-               e.profile_image, e.joining_date, e.leaving_date,
-               sc.per_day_salary, sc.monthly_salary, sc.salary_type
-        FROM employees e 
-        LEFT JOIN salary_config sc ON e.id = sc.employee_id 
-        WHERE e.user_id = %s AND e.deleted_at IS NULL
-        ORDER BY e.leaving_date IS NULL DESC, e.joining_date DESC
-    """, (user_id,))
+    try:
+        try:
+            page = employee_list.load_page(cur, user_id, limit=app.config['EMPLOYEES_PAGE_SIZE'], **options)
+        except employee_list.InvalidCursor:
+            # Stale or hand-edited link - start from the first page
+            options.update(after=None, before=None)
+            page = employee_list.load_page(cur, user_id, limit=app.config['EMPLOYEES_PAGE_SIZE'], **options)
+        
+        stats = employee_list.load_stats(cur, user_id)
+        if options['q']:
+            matching = employee_list.count_matching(cur, user_id, options['status'], options['q'])
+        elif options['status'] == 'active':
+            matching = stats['active_employees']
+        elif options['status'] == 'left':
+            matching = stats['inactive_employees']
+        else:
+            matching = stats['total_employees']
+    finally:
+        cur.close()
     
-    # Convert to list of dictionaries for easier template access
-    columns = [col[0] for col in cur.description]
-    employees_data = []
-    for row in cur.fetchall():
-        employees_data.append(dict(zip(columns, row)))
+    return render_template('employee/employees.html', 
+                         employees=page['employees'],
+                         next_cursor=page['next_cursor'],
+                         prev_cursor=page['prev_cursor'],
+                         matching_employees=matching,
+                         sort=options['sort'],
+                         descending=options['descending'],
+                         status=options['status'],
+                         q=options['q'],
+                         **stats)
+
+def employee_list_options(args):
+    """Sort/filter/cursor arguments of the employees list - unknown values fall back to the defaults"""
+    sort = args.get('sort', employee_list.DEFAULT_SORT)
+    status = args.get('status')
+    return {
+        'sort': sort if sort in employee_list.SORTS else employee_list.DEFAULT_SORT,
+        'descending': args.get('dir') == 'desc',
+        'status': status if status in employee_list.STATUSES else None,
+        'q': args.get('q', '').strip()[:100] or None,
+        'after': args.get('after') or None,
+        'before': args.get('before') or None,
+    }
+
+@app.route('/api/employees')
+def api_employees():
+    """One page of employees as JSON (same sort/filter/cursor arguments as /employees, plus limit)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login'}), 401
     
-    # Calculate stats (only for non-deleted employees)
-    total_employees = len(employees_data)
-    active_employees = len([e for e in employees_data if not e['leaving_date']])
-    inactive_employees = total_employees - active_employees
+    user_id = session['user_id']
+    options = employee_list_options(request.args)
+    try:
+        limit = int(request.args.get('limit', app.config['EMPLOYEES_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'limit must be a number'}), 400
+    limit = max(1, min(limit, app.config['EMPLOYEES_API_MAX_LIMIT']))
     
-    cur.close()
+    cur = mysql.connection.cursor()
+    try:
+        page = employee_list.load_page(cur, user_id, limit=limit, **options)
+    except employee_list.InvalidCursor as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    finally:
+        cur.close()
     
-    return render_template('employee/employees.html', 
-                         employees=employees_data,
-                         total_employees=total_employees,
-                         active_employees=active_employees,
-                         inactive_employees=inactive_employees)
+    return jsonify({
+        'success': True,
+        'employees': [employee_list.to_json(row) for row in page['employees']],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor'],
+    })
+
+@app.route('/api/employees/search')
+def api_employee_search():
+    """Typeahead matches for q by name, mobile number or PAN (optional status=active|left, limit)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login'}), 401
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), app.config['EMPLOYEE_SEARCH_MAX_LIMIT']))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'limit must be a number'}), 400
+    status = request.args.get('status')
+    
+    cur = mysql.connection.cursor()
+    try:
+        results = employee_search.search(cur, session['user_id'], request.args.get('q', ''), limit=limit,
+                                         status=status if status in employee_list.STATUSES else None)
+    finally:
+        cur.close()
+    
+    return jsonify({'success': True, 'employees': results})
 
 @app.route('/employee/toggle_status/<int:employee_id>')
 def toggle_employee_status(employee_id):
@@ -516,6 +780,11 @@ def toggle_employee_status(employee_id):
             """, (datetime.now().date(), employee_id, user_id))
             flash(f'Employee "{employee_name}" has been marked as left!', 'success')
         
+        # Leaving date changed - payroll snapshots and cached reports must be recomputed
+        payroll.mark_snapshots_stale(cur, user_id, employee_id)
+        dashboard_stats.invalidate_month_salary(cur, user_id)
+        tenant_data_changed(cur, user_id)
+        
         mysql.connection.commit()
         
     except Exception as e:
@@ -613,6 +882,8 @@ def add_employee():
             """, (user_id, employee_id, per_day_salary, monthly_salary, salary_type, 
                   working_days_per_week, holiday_day))
             
+            tenant_data_changed(cur, user_id)
+            
             mysql.connection.commit()
             flash('Employee added successfully!', 'success')
             return redirect(url_for('employees'))
@@ -741,6 +1012,13 @@ def edit_employee(employee_id):
                     VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """, (user_id, employee_id, per_day_salary, monthly_salary, salary_type, working_days_per_week, holiday_day))
             
+            # Salary config or leaving date may have changed - recompute every month on next read
+            payroll.mark_snapshots_stale(cur, user_id, employee_id)
+            if app.config['EMPLOYEE_ROLLUPS_ENABLED']:
+                rollups.rebuild(cur, user_id, employee_id)
+            dashboard_stats.invalidate_month_salary(cur, user_id)
+            tenant_data_changed(cur, user_id)
+            
             mysql.connection.commit()
             flash('Employee updated successfully!', 'success')
             return redirect(url_for('employees'))
@@ -797,6 +1075,9 @@ def delete_employee(employee_id):
             WHERE id = %s AND user_id = %s
         """, (datetime.now(), employee_id, user_id))
         
+        dashboard_stats.invalidate_month_salary(cur, user_id)
+        tenant_data_changed(cur, user_id)
+        
         mysql.connection.commit()
         flash(f'Employee "{employee_name}" has been deleted successfully!', 'success')
         
@@ -814,6 +1095,15 @@ def attendance():
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
+    # Month grid: the page is a shell, the grid comes from /api/attendance/grid
+    if request.args.get('view') == 'month':
+        month = request.args.get('month', datetime.now().strftime('%Y-%m'))
+        try:
+            attendance_grid.parse_month(month)
+        except ValueError:
+            month = datetime.now().strftime('%Y-%m')
+        return render_template('attendance/month.html', selected_month=month)
+    
     user_id = session['user_id']
     date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
     
@@ -894,6 +1184,11 @@ def update_attendance():
         if leaving_date and date > leaving_date.strftime('%Y-%m-%d'):
             return jsonify({'success': False, 'message': f'Cannot mark attendance after employee left on {leaving_date}'})
         
+        new_status = None if not status or status == 'not_marked' else status
+        if app.config['EMPLOYEE_ROLLUPS_ENABLED']:
+            rollups.record_attendance_changes(cur, user_id, [(employee_id, date, new_status, advance)])
+        dashboard_stats.record_attendance_changes(cur, user_id, [(employee_id, date, new_status)])
+        
         # If status is empty or 'not_marked', delete the attendance record
         if not status or status == 'not_marked':
             cur.execute("""
@@ -912,7 +1207,12 @@ def update_attendance():
                     updated_at = CURRENT_TIMESTAMP
             """, (user_id, employee_id, date, status, notes, advance))
         
+        # The month's payroll snapshot and cached reports no longer match attendance
+        payroll.mark_attendance_stale(cur, user_id, [(employee_id, date)])
+        tenant_data_changed(cur, user_id)
+        
         mysql.connection.commit()
+        publish_attendance_changes(cur, user_id, [(employee_id, date)])
         return jsonify({'success': True, 'message': 'Attendance updated successfully'})
         
     except Exception as e:
@@ -921,6 +1221,200 @@ def update_attendance():
     finally:
         cur.close()
 
+@app.route('/api/attendance/grid')
+def api_attendance_grid():
+    """Every employee x day of a month as one status code per cell (see attendance_grid.py)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login'}), 401
+    
+    user_id = session['user_id']
+    month = request.args.get('month', datetime.now().strftime('%Y-%m'))
+    try:
+        attendance_grid.parse_month(month)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    cur = mysql.connection.cursor()
+    try:
+        # Same snapshot for the version and the grid - a later write changes the ETag
+        etag = attendance_grid.etag(month, report_cache.get_data_version(cur, user_id))
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            grid = attendance_grid.load(cur, user_id, month)
+            response = jsonify({'success': True, **grid})
+    finally:
+        cur.close()
+    
+    response.set_etag(etag)
+    # Private data: the browser may keep it but must revalidate every time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Batch version of update_attendance - one ownership query and one transaction for many rows
+# Records without "notes" / "advance" (the month grid's status-only edits) keep the row's current values
+@app.route('/update_attendance_batch', methods=['POST'])
+def update_attendance_batch():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login'})
+
+    user_id = session['user_id']
+    data = request.get_json(silent=True) or {}
+    records = data.get('records')
+
+    if not isinstance(records, list) or not records:
+        return jsonify({'success': False, 'message': 'At least one attendance record is required'})
+
+    if len(records) > app.config['ATTENDANCE_BATCH_MAX_ROWS']:
+        return jsonify({'success': False, 'message': f"A batch can contain at most {app.config['ATTENDANCE_BATCH_MAX_ROWS']} records"})
+
+    # One result per submitted row, in the same order - a malformed row only fails itself
+    results, rows = attendance_batch.validate(records)
+    employee_ids = {row['employee_id'] for _, row in rows}
+
+    cur = mysql.connection.cursor()
+
+    try:
+        # Check ownership of every employee in the batch with a single query
+        employees = {}
+        if employee_ids:
+            placeholders = ', '.join(['%s'] * len(employee_ids))
+            cur.execute(f"""
+                SELECT id, leaving_date FROM employees
+                WHERE user_id = %s AND deleted_at IS NULL AND id IN ({placeholders})
+            """, [user_id] + sorted(employee_ids))
+            employees = {row[0]: row[1] for row in cur.fetchall()}
+
+        upsert_rows = []
+        delete_rows = []
+        keep_details = []
+        accepted = []
+        for result, row in rows:
+            employee_id = row['employee_id']
+            date = row['date']
+
+            if employee_id not in employees:
+                result['message'] = 'Employee not found or access denied'
+                continue
+
+            # Check if employee has left and the date is after leaving date
+            leaving_date = employees[employee_id]
+            if leaving_date and date > leaving_date.strftime('%Y-%m-%d'):
+                result['message'] = f'Cannot mark attendance after employee left on {leaving_date}'
+                continue
+
+            if row['status'] == 'not_marked':
+                delete_rows.append((employee_id, date))
+            else:
+                if row['keep_notes'] or row['keep_advance']:
+                    keep_details.append((len(upsert_rows), row['keep_notes'], row['keep_advance']))
+                upsert_rows.append((user_id, employee_id, date, row['status'], row['notes'], row['advance']))
+            accepted.append(result)
+
+        if keep_details:
+            conditions = ' OR '.join(['(employee_id = %s AND attendance_date = %s)'] * len(keep_details))
+            params = [user_id]
+            for index, _, _ in keep_details:
+                params.extend(upsert_rows[index][1:3])
+            cur.execute(f"""
+                SELECT employee_id, attendance_date, notes, advance
+                FROM attendance
+                WHERE user_id = %s AND ({conditions})
+                FOR UPDATE
+            """, params)
+            current = {(row[0], row[1].strftime('%Y-%m-%d')): (row[2] or '', float(row[3] or 0)) for row in cur.fetchall()}
+            for index, keep_notes, keep_advance in keep_details:
+                row = upsert_rows[index]
+                notes, advance = current.get((row[1], row[2]), ('', 0.0))
+                upsert_rows[index] = row[:4] + (notes if keep_notes else row[4], advance if keep_advance else row[5])
+
+        if app.config['EMPLOYEE_ROLLUPS_ENABLED'] and (delete_rows or upsert_rows):
+            rollups.record_attendance_changes(
+                cur, user_id,
+                [(employee_id, date, None, 0) for employee_id, date in delete_rows] +
+                [(row[1], row[2], row[3], row[5]) for row in upsert_rows]
+            )
+        dashboard_stats.record_attendance_changes(
+            cur, user_id,
+            [(employee_id, date, None) for employee_id, date in delete_rows] +
+            [(row[1], row[2], row[3]) for row in upsert_rows]
+        )
+
+        if delete_rows:
+            conditions = ' OR '.join(['(employee_id = %s AND attendance_date = %s)'] * len(delete_rows))
+            params = [user_id]
+            for employee_id, date in delete_rows:
+                params.extend([employee_id, date])
+            cur.execute(f"""
+                DELETE FROM attendance
+                WHERE user_id = %s AND ({conditions})
+            """, params)
+
+        if upsert_rows:
+            # Single multi-row upsert for the whole batch
+            values = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(upsert_rows))
+            params = [value for row in upsert_rows for value in row]
+            cur.execute(f"""
+                INSERT INTO attendance (user_id, employee_id, attendance_date, status, notes, advance)
+                VALUES {values}
+                ON DUPLICATE KEY UPDATE
+                    status = VALUES(status),
+                    notes = VALUES(notes),
+                    advance = VALUES(advance),
+                    updated_at = CURRENT_TIMESTAMP
+            """, params)
+
+        # The months' payroll snapshots and cached reports no longer match attendance
+        payroll.mark_attendance_stale(cur, user_id,
+                                      delete_rows + [(row[1], row[2]) for row in upsert_rows])
+        if delete_rows or upsert_rows:
+            tenant_data_changed(cur, user_id)
+
+        mysql.connection.commit()
+        publish_attendance_changes(cur, user_id, delete_rows + [(row[1], row[2]) for row in upsert_rows])
+
+        for result in accepted:
+            result['success'] = True
+            result['message'] = 'Attendance updated successfully'
+
+        success_count = len(accepted)
+        return jsonify({
+            'success': success_count == len(results),
+            'message': f'Updated {success_count} of {len(results)} attendance records',
+            'updated': success_count,
+            'results': results
+        })
+
+    except Exception as e:
+        mysql.connection.rollback()
+        return jsonify({'success': False, 'message': f'Error updating attendance: {str(e)}', 'results': results})
+    finally:
+        cur.close()
+
+# Server-Sent Events stream of the tenant's attendance changes (see live_updates.py)
+@app.route('/events')
+def live_events():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login'}), 401
+    if not app.config['LIVE_UPDATES_ENABLED']:
+        return jsonify({'success': False, 'message': 'Live updates are disabled'}), 404
+
+    try:
+        subscription = live_broker.subscribe(session['user_id'])
+    except live_updates.TooManyClients:
+        # EventSource retries after the "retry" delay of its last stream
+        return jsonify({'success': False, 'message': 'Too many open live update streams'}), 503
+
+    # No stream_with_context: the generator must not hold the request (or its
+    # pooled MySQL connection) while it waits for events
+    body = live_updates.stream(subscription,
+                               heartbeat=app.config['LIVE_UPDATES_HEARTBEAT'],
+                               lifetime=app.config['LIVE_UPDATES_STREAM_SECONDS'])
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: pass events on at once
+    return response
+
 # New route to get notes for an employee on specific date
 @app.route('/get_attendance_notes', methods=['POST'])
 def get_attendance_notes():
@@ -967,299 +1461,166 @@ def salary():
     
     cur = mysql.connection.cursor()
     
-    # Get all employees for dropdown for current user - exclude deleted ones
-    cur.execute("""
-        SELECT e.id, e.name, sc.per_day_salary, sc.salary_type, sc.monthly_salary, e.leaving_date
-        FROM employees e 
-        LEFT JOIN salary_config sc ON e.id = sc.employee_id 
-        WHERE e.user_id = %s AND e.deleted_at IS NULL
-        ORDER BY e.leaving_date IS NULL DESC, e.name
-    """, (user_id,))
-    employees = cur.fetchall()
+    # The employee picker searches /api/employees/search - only the selected employee is loaded here
+    has_employees = employee_search.has_employees(cur, user_id)
     
     salary_data = None
+    employee_info = None
     if employee_id and month:
         # Verify employee belongs to current user and is not deleted
-        cur.execute("""
-            SELECT id, leaving_date FROM employees 
-            WHERE id = %s AND user_id = %s AND deleted_at IS NULL
-        """, (employee_id, user_id))
-        employee_info = cur.fetchone()
+        employee_info = employee_search.get_employee(cur, user_id, employee_id)
         
         if not employee_info:
             cur.close()
             flash('Employee not found or access denied', 'error')
             return redirect(url_for('salary'))
         
-        employee_id_db, leaving_date = employee_info
-        
-        # Get employee salary configuration
-        cur.execute("""
-            SELECT e.name, sc.per_day_salary, sc.working_days_per_week, sc.holiday_day, 
-                   sc.salary_type, sc.monthly_salary
-            FROM employees e 
-            LEFT JOIN salary_config sc ON e.id = sc.employee_id 
-            WHERE e.id = %s AND e.user_id = %s
-        """, (employee_id, user_id))
-        employee_data = cur.fetchone()
-        
-        if employee_data:
-            employee_name, per_day_salary, working_days_per_week, holiday_day, salary_type, monthly_salary = employee_data
-            
-            # If no salary config found, use defaults
-            if per_day_salary is None:
-                per_day_salary = 350.00
-            if working_days_per_week is None:
-                working_days_per_week = 6
-            if holiday_day is None:
-                holiday_day = 'friday'
-            if salary_type is None:
-                salary_type = 'per_day'
-            if monthly_salary is None:
-                monthly_salary = 0
-            
-            # Convert to float to avoid decimal issues
-            per_day_salary = float(per_day_salary)
-            monthly_salary = float(monthly_salary)
-            
-            # Calculate date range for the selected month
-            year, month_num = map(int, month.split('-'))
-            start_date = datetime(year, month_num, 1)
-            if month_num == 12:
-                end_date = datetime(year+1, 1, 1) - timedelta(days=1)
-            else:
-                end_date = datetime(year, month_num+1, 1) - timedelta(days=1)
-            
-            # Adjust end_date if employee left during the month
-            if leaving_date and leaving_date < end_date.date():
-                end_date = datetime.combine(leaving_date, datetime.min.time())
-            
-            # Get total days in month (for monthly salary calculation)
-            total_days_in_month = (end_date - start_date).days + 1
-            
-            # Calculate effective per day salary based on salary type
-            if salary_type == 'per_month' and monthly_salary > 0:
-                # For monthly salary: divide monthly salary by total days in month
-                effective_per_day_salary = monthly_salary / total_days_in_month
-                salary_calculation_note = f"Monthly Salary: ₹{monthly_salary:,.2f} ÷ {total_days_in_month} days = ₹{effective_per_day_salary:.2f}/day"
-            else:
-                # For per day salary: use the fixed per_day_salary
-                effective_per_day_salary = per_day_salary
-                salary_calculation_note = f"Per Day Salary: ₹{effective_per_day_salary:.2f}"
-            
-            # Get attendance records for the month (including advance)
-            cur.execute("""
-                SELECT attendance_date, status, advance 
-                FROM attendance 
-                WHERE employee_id = %s AND user_id = %s AND attendance_date BETWEEN %s AND %s
-                ORDER BY attendance_date
-            """, (employee_id, user_id, start_date.date(), end_date.date()))
-            attendance_records = {record[0]: {'status': record[1], 'advance': float(record[2] or 0)} for record in cur.fetchall()}
-            
-            # Calculate working days, holidays, and attendance
-            total_days = 0
-            working_days = 0
-            weekly_holidays = 0
-            worked_holidays = 0
-            unmarked_days = 0
-            present_days = 0
-            half_days = 0
-            absent_days = 0
-            total_advance = 0.0  # Track total advance for the month
-            
-            daily_attendance = []
-            weekly_summary = []
-            current_date = start_date
-            current_week = []
-            week_number = 1
-            
-            while current_date <= end_date:
-                day_name = current_date.strftime('%A').lower()
-                is_weekly_holiday = (day_name == holiday_day.lower())
-                
-                # Check if this is the leaving date
-                is_leaving_date = (leaving_date and current_date.date() == leaving_date)
-                
-                # Check if attendance is marked for this day
-                attendance_info = attendance_records.get(current_date.date())
-                attendance_status = attendance_info['status'] if attendance_info else None
-                advance_amount = float(attendance_info['advance']) if attendance_info else 0.0
-                
-                total_advance += advance_amount
-                
-                # Handle leaving date specially
-                if is_leaving_date:
-                    if attendance_status:
-                        # Employee worked on their last day
-                        if attendance_status == 'present':
-                            day_salary = float(effective_per_day_salary)
-                            present_days += 1
-                            status = 'present_left'
-                        elif attendance_status == 'half_day':
-                            day_salary = float(effective_per_day_salary / 2)
-                            half_days += 1
-                            status = 'half_day_left'
-                        else:  # absent on last day
-                            day_salary = 0.0
-                            absent_days += 1
-                            status = 'absent_left'
-                    else:
-                        # No attendance marked on leaving date
-                        day_salary = 0.0
-                        unmarked_days += 1
-                        status = 'unmarked_left'
-                    
-                    working_days += 1
-                    
-                elif is_weekly_holiday:
-                    if attendance_status:
-                        # Weekly holiday but attendance marked - employee worked on holiday
-                        working_days += 1
-                        worked_holidays += 1
-                        
-                        if attendance_status == 'present':
-                            day_salary = float(effective_per_day_salary)
-                            present_days += 1
-                            status = 'worked_holiday_present'
-                        elif attendance_status == 'half_day':
-                            day_salary = float(effective_per_day_salary / 2)
-                            half_days += 1
-                            status = 'worked_holiday_half'
-                        else:  # absent on holiday (shouldn't normally happen)
-                            day_salary = 0.0
-                            absent_days += 1
-                            status = 'worked_holiday_absent'
-                    else:
-                        # Weekly holiday with no attendance marked
-                        day_salary = 0.0
-                        weekly_holidays += 1
-                        status = 'weekly_holiday'
-                        
-                elif attendance_status is None:
-                    # Regular day with no attendance marked - treat as holiday (salary = 0)
-                    status = 'unmarked'
-                    day_salary = 0.0
-                    unmarked_days += 1
-                else:
-                    # Regular working day with attendance marked
-                    working_days += 1
-                    status = attendance_status
-                    
-                    if status == 'present':
-                        day_salary = float(effective_per_day_salary)
-                        present_days += 1
-                    elif status == 'half_day':
-                        day_salary = float(effective_per_day_salary / 2)
-                        half_days += 1
-                    else:  # absent
-                        day_salary = 0.0
-                        absent_days += 1
-                
-                # Calculate net salary for the day (ensure both are floats)
-                day_salary_float = float(day_salary)
-                advance_amount_float = float(advance_amount)
-                net_salary = day_salary_float - advance_amount_float
-                
-                # Add to daily attendance (include advance)
-                daily_attendance.append({
-                    'date': current_date.strftime('%Y-%m-%d'),
-                    'day': current_date.strftime('%A'),
-                    'status': status,
-                    'salary': day_salary_float,
-                    'advance': advance_amount_float,
-                    'net_salary': net_salary,  # Net for the day
-                    'is_holiday': is_weekly_holiday,
-                    'is_leaving_date': is_leaving_date
-                })
-                
-                # Add to current week for weekly calculation
-                current_week.append({
-                    'date': current_date.strftime('%Y-%m-%d'),
-                    'day': current_date.strftime('%A'),
-                    'status': status,
-                    'salary': day_salary_float,
-                    'advance': advance_amount_float,
-                    'net_salary': net_salary,
-                    'is_holiday': is_weekly_holiday,
-                    'is_leaving_date': is_leaving_date
-                })
-                
-                # If it's the weekly holiday or end of month or leaving date, finalize the week
-                if (is_weekly_holiday and len(current_week) > 0) or current_date == end_date or is_leaving_date:
-                    week_salary = sum(float(day['salary']) for day in current_week)
-                    week_advance = sum(float(day['advance']) for day in current_week)
-                    week_net_salary = week_salary - week_advance
-                    week_working_days = len([day for day in current_week if day['status'] in ['present', 'half_day', 'absent', 'worked_holiday_present', 'worked_holiday_half', 'worked_holiday_absent', 'present_left', 'half_day_left', 'absent_left']])
-                    week_present = len([day for day in current_week if day['status'] in ['present', 'worked_holiday_present', 'present_left']])
-                    week_half = len([day for day in current_week if day['status'] in ['half_day', 'worked_holiday_half', 'half_day_left']])
-                    week_absent = len([day for day in current_week if day['status'] in ['absent', 'worked_holiday_absent', 'absent_left']])
-                    week_unmarked = len([day for day in current_week if day['status'] in ['unmarked', 'unmarked_left']])
-                    week_holidays = len([day for day in current_week if day['status'] == 'weekly_holiday'])
-                    week_worked_holidays = len([day for day in current_week if day['status'] in ['worked_holiday_present', 'worked_holiday_half', 'worked_holiday_absent']])
-                    week_leaving_days = len([day for day in current_week if day['is_leaving_date']])
-                    
-                    weekly_summary.append({
-                        'week': week_number,
-                        'start_date': current_week[0]['date'],
-                        'end_date': current_week[-1]['date'],
-                        'working_days': week_working_days,
-                        'present_days': week_present,
-                        'half_days': week_half,
-                        'absent_days': week_absent,
-                        'unmarked_days': week_unmarked,
-                        'holidays': week_holidays,
-                        'worked_holidays': week_worked_holidays,
-                        'leaving_days': week_leaving_days,
-                        'salary': week_salary,
-                        'advance': week_advance,
-                        'net_salary': week_net_salary
-                    })
-                    
-                    current_week = []
-                    week_number += 1
-                
-                total_days += 1
-                current_date += timedelta(days=1)
-            
-            # Calculate total salary (include worked holidays in calculation)
-            total_salary = (present_days * effective_per_day_salary) + (half_days * (effective_per_day_salary / 2))
-            net_salary = float(total_salary) - float(total_advance)  # Subtract total advances
-            
-            salary_data = {
-                'employee_id': employee_id,
-                'employee_name': employee_name,
-                'month': month,
-                'salary_type': salary_type,
-                'per_day_salary': effective_per_day_salary,
-                'monthly_salary': monthly_salary,
-                'working_days_per_week': working_days_per_week,
-                'leaving_date': leaving_date,
-                'total_days': total_days,
-                'total_days_in_month': total_days_in_month,
-                'working_days': working_days,
-                'weekly_holidays': weekly_holidays,
-                'worked_holidays': worked_holidays,
-                'unmarked_days': unmarked_days,
-                'present_days': present_days,
-                'half_days': half_days,
-                'absent_days': absent_days,
-                'total_salary': total_salary,
-                'total_advance': total_advance,
-                'net_salary': net_salary,  # Salary after advance deduction
-                'daily_attendance': daily_attendance,
-                'weekly_summary': weekly_summary,
-                'holiday_day': holiday_day,
-                'salary_calculation_note': salary_calculation_note
-            }
+        # Served from the payroll snapshot when fresh, otherwise computed and stored
+        try:
+            salary_data = payroll.get_month(cur, user_id, month, [employee_info[0]]).get(employee_info[0])
+            mysql.connection.commit()
+        except Exception as e:
+            mysql.connection.rollback()
+            print(f"Payroll snapshot error: {str(e)}")
+            salary_data = payroll.calculate_month(cur, user_id, month, [employee_info[0]]).get(employee_info[0])
     
     cur.close()
     
     return render_template('salary/salary.html', 
-                         employees=employees, 
+                         has_employees=has_employees,
+                         selected_employee_info=employee_info,
                          salary_data=salary_data,
                          selected_employee=employee_id,
                          selected_month=month)
 
+@app.route('/payroll/run')
+def payroll_run():
+    """Payroll register for every employee of the current user for one month"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login'})
+    
+    user_id = session['user_id']
+    month = request.args.get('month', datetime.now().strftime('%Y-%m'))
+    
+    try:
+        datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Month must be in YYYY-MM format'})
+    
+    cur = mysql.connection.cursor()
+    
+    try:
+        register = payroll.run_payroll(cur, user_id, month,
+                                       workers=app.config['PAYROLL_WORKERS'],
+                                       chunk_size=app.config['PAYROLL_CHUNK_SIZE'])
+        mysql.connection.commit()
+        return jsonify({'success': True, 'register': register})
+    except Exception as e:
+        mysql.connection.rollback()
+        return jsonify({'success': False, 'message': f'Error running payroll: {str(e)}'})
+    finally:
+        cur.close()
+
+@app.cli.command('run-payroll')
+@click.option('--user-id', type=int, help='Tenant (users.id) to run payroll for')
+@click.option('--email', help='Tenant email, instead of --user-id')
+@click.option('--month', default=lambda: datetime.now().strftime('%Y-%m'), help='Month in YYYY-MM format')
+@click.option('--workers', type=int, default=None, help='Process pool size (defaults to PAYROLL_WORKERS)')
+@click.option('--output', type=click.File('w'), default='-', help='File to write the JSON register to')
+def run_payroll_command(user_id, email, month, workers, output):
+    """Compute the payroll register for every employee of a user"""
+    cur = mysql.connection.cursor()
+    try:
+        if user_id is None:
+            if not email:
+                raise click.UsageError('Pass --user-id or --email')
+            cur.execute("SELECT id FROM users WHERE email = %s", (email,))
+            user = cur.fetchone()
+            if not user:
+                raise click.ClickException(f'No account found for {email}')
+            user_id = user[0]
+
+        register = payroll.run_payroll(cur, user_id, month,
+                                       workers=workers or app.config['PAYROLL_WORKERS'],
+                                       chunk_size=app.config['PAYROLL_CHUNK_SIZE'])
+        mysql.connection.commit()
+    finally:
+        cur.close()
+
+    json.dump(register, output, indent=2)
+    output.write('\n')
+    totals = register['totals']
+    click.echo(f"Payroll {month}: {totals['employees']} employees, net ₹{totals['net_salary']:,.2f}", err=True)
+
+# Indexes a month filter may range-scan attendance through
+MONTH_QUERY_INDEXES = ('idx_attendance_user_date', 'idx_attendance_employee_date', 'unique_user_attendance')
+
+def month_queries(user_id, month):
+    """The month-filtered attendance queries, as name -> (query, params)"""
+    month_start, next_month = payroll.month_range(month)
+    return {
+        'dashboard month salary': (dashboard_stats.MONTH_SALARY_QUERY, (user_id, month_start, next_month, user_id)),
+        'weekly salary report': (WEEKLY_SALARY_QUERY.format(employee_filter=''), (user_id, month_start, next_month)),
+        'payroll attendance': (payroll.ATTENDANCE_QUERY.format(employee_filter=''), (user_id, month_start, next_month)),
+    }
+
+def explain_attendance_steps(cur, query, params):
+    """EXPLAIN rows of the steps of query that read the attendance table"""
+    cur.execute("EXPLAIN " + query, params)
+    columns = [col[0] for col in cur.description]
+    plan = [dict(zip(columns, row)) for row in cur.fetchall()]
+    return [step for step in plan if step['table'] in ('a', 'attendance')]
+
+def is_month_range_scan(step):
+    """Whether an attendance step reads a date range of one of MONTH_QUERY_INDEXES"""
+    # ref / eq_ref are not enough: YEAR()/MONTH() filters reach attendance by employee or user id too
+    return step['type'] == 'range' and step['key'] in MONTH_QUERY_INDEXES
+
+@app.cli.command('explain-month-queries')
+@click.option('--user-id', type=int, default=1, help='Tenant (users.id) to plan the queries for')
+@click.option('--month', default=lambda: datetime.now().strftime('%Y-%m'), help='Month in YYYY-MM format')
+def explain_month_queries_command(user_id, month):
+    """Check through EXPLAIN that the month filters range-scan an attendance index"""
+    cur = mysql.connection.cursor()
+    failures = 0
+    try:
+        for name, (query, params) in month_queries(user_id, month).items():
+            attendance_steps = explain_attendance_steps(cur, query, params)
+            for step in attendance_steps:
+                click.echo(f"{name}: type={step['type']} key={step['key']} rows={step['rows']}")
+            if not attendance_steps or not all(is_month_range_scan(step) for step in attendance_steps):
+                failures += 1
+                click.echo(f"FAIL {name}: attendance is not read through a date range of "
+                           f"{', '.join(MONTH_QUERY_INDEXES)}", err=True)
+    finally:
+        cur.close()
+
+    if failures:
+        raise SystemExit(1)
+    click.echo('All month queries range-scan an attendance date index')
+
+@app.cli.command('rebuild-rollups')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this tenant (default: all)')
+def rebuild_rollups_command(user_id):
+    """Recompute the employee_rollup table from attendance"""
+    cur = mysql.connection.cursor()
+    try:
+        if user_id is None:
+            cur.execute("SELECT id FROM users ORDER BY id")
+            user_ids = [row[0] for row in cur.fetchall()]
+        else:
+            user_ids = [user_id]
+
+        for tenant_id in user_ids:
+            rollups.rebuild(cur, tenant_id)
+            mysql.connection.commit()
+            click.echo(f'Rebuilt rollups for user {tenant_id}')
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+
 @app.route('/report')
 def report():
     if 'user_id' not in session:
@@ -1272,14 +1633,101 @@ def report():
     
     cur = mysql.connection.cursor()
     
-    # Get employees for dropdown - exclude deleted
-    cur.execute("""
-        SELECT id, name, leaving_date
-        FROM employees 
-        WHERE user_id = %s AND deleted_at IS NULL
-        ORDER BY leaving_date IS NULL DESC, name
-    """, (user_id,))
-    employees = cur.fetchall()
+    # Reuse the cached result while the tenant's data version is unchanged
+    version = report_cache.get_data_version(cur, user_id)
+    cache_key = report_cache.ReportCache.make_key(user_id, report_type, month, employee_id, version)
+    result = reports_cache.get_or_compute(
+        cache_key, lambda: build_report(cur, user_id, report_type, month, employee_id))
+    
+    cur.close()
+    
+    current_datetime = datetime.now()
+    
+    return render_template('report/report.html',
+                         report_type=report_type,
+                         report_data=result['report_data'],
+                         has_employees=result['has_employees'],
+                         selected_employee_info=result['selected_employee_info'],
+                         months=result['months'],
+                         selected_month=month,
+                         selected_employee=employee_id,
+                         current_datetime=current_datetime)
+
+@app.route('/report/cache_stats')
+def report_cache_stats():
+    """Hit/miss counters of the report cache in this worker"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login'})
+    
+    return jsonify({'success': True, 'stats': reports_cache.stats()})
+
+@app.route('/report/export.<any(csv, jsonl):export_format>')
+def export_report(export_format):
+    """Stream report rows as CSV or JSON Lines from a server-side cursor
+
+    Query args: type (weekly_salary | employee_summary), month or from/to
+    (YYYY-MM, inclusive) for weekly_salary, and an optional employee_id.
+    """
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    user_id = session['user_id']
+    report_type = request.args.get('type', 'weekly_salary')
+    month = request.args.get('month', datetime.now().strftime('%Y-%m'))
+    from_month = request.args.get('from', month)
+    to_month = request.args.get('to', from_month)
+    employee_id = request.args.get('employee_id', '')
+    
+    try:
+        range_start = payroll.month_range(from_month)[0]
+        range_end = payroll.month_range(to_month)[1]
+        employee_id = int(employee_id) if employee_id else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Months must be YYYY-MM and employee_id a number'}), 400
+    
+    # Unbuffered cursor - rows are fetched from MySQL as the response is written
+    cur = mysql.connection.cursor(MySQLdb.cursors.SSCursor)
+    
+    if report_type == 'weekly_salary':
+        employee_filter = ""
+        params = [user_id, range_start, range_end]
+        if employee_id:
+            employee_filter = " AND e.id = %s"
+            params.append(employee_id)
+        cur.execute(WEEKLY_SALARY_QUERY.format(employee_filter=employee_filter), params)
+        columns = report_export.WEEKLY_SALARY_COLUMNS
+        rows = report_export.weekly_salary_rows(cur)
+        filename = f"weekly_salary_{from_month}_{to_month}"
+    elif report_type == 'employee_summary':
+        if app.config['EMPLOYEE_ROLLUPS_ENABLED']:
+            cur.execute(EMPLOYEE_SUMMARY_ROLLUP_QUERY, (user_id,))
+        else:
+            cur.execute(EMPLOYEE_SUMMARY_QUERY, (user_id,))
+        columns = report_export.EMPLOYEE_SUMMARY_COLUMNS
+        rows = report_export.employee_summary_rows(cur)
+        if employee_id:
+            rows = (row for row in rows if row['employee_id'] == employee_id)
+        filename = "employee_summary"
+    else:
+        cur.close()
+        return jsonify({'success': False, 'message': f'Unknown report type: {report_type}'}), 400
+    
+    if export_format == 'csv':
+        body = report_export.stream_csv(columns, rows)
+        mimetype = 'text/csv'
+    else:
+        body = report_export.stream_jsonl(rows)
+        mimetype = 'application/x-ndjson'
+    
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}.{export_format}'
+    })
+
+def build_report(cur, user_id, report_type, month, employee_id):
+    """Compute the data shown by report.html (report_data, months, employee filter state)"""
+    # The employee filter is a typeahead - only the selected employee is needed
+    has_employees = employee_search.has_employees(cur, user_id)
+    selected_employee_info = employee_search.get_employee(cur, user_id, employee_id) if employee_id else None
     
     # Initialize report_data with default values
     report_data = {
@@ -1294,15 +1742,8 @@ def report():
     
     def calculate_daily_rate(monthly_salary, year, month_num):
         """Calculate daily rate for monthly salary employees"""
-        year_int, month_int = int(year), int(month_num)
-        start_date = datetime(year_int, month_int, 1)
-        
-        if month_int == 12:
-            end_date = datetime(year_int + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = datetime(year_int, month_int + 1, 1) - timedelta(days=1)
-        
-        total_days_in_month = (end_date - start_date).days + 1
+        start_date, next_month_start = payroll.month_range(f"{int(year)}-{int(month_num):02d}")
+        total_days_in_month = (next_month_start - start_date).days
         daily_rate = float(monthly_salary) / total_days_in_month
         return daily_rate, total_days_in_month
 
@@ -1310,40 +1751,18 @@ def report():
         # Weekly Salary Report - include both active and left employees
         year, month_num = month.split('-')
     
-        print(f"DEBUG: Generating weekly report for {year}-{month_num}")
-    
         # Get employee if specified
+        month_start, next_month = payroll.month_range(month)
         employee_filter = ""
-        params = [user_id, int(year), int(month_num)]
+        params = [user_id, month_start, next_month]
         if employee_id:
             employee_filter = " AND e.id = %s"
             params.append(int(employee_id))
     
         # Get all attendance records for the month (including advance) - exclude deleted employees
-        cur.execute(f"""
-            SELECT 
-                e.id,
-                e.name,
-                e.leaving_date,
-                COALESCE(sc.per_day_salary, 350.00) as per_day_salary,
-                COALESCE(sc.salary_type, 'per_day') as salary_type,
-                COALESCE(sc.monthly_salary, 0) as monthly_salary,
-                COALESCE(sc.holiday_day, 'friday') as holiday_day,
-                a.attendance_date,
-                a.status,
-                a.advance
-            FROM employees e
-            LEFT JOIN salary_config sc ON e.id = sc.employee_id AND sc.user_id = e.user_id
-            INNER JOIN attendance a ON e.id = a.employee_id AND a.user_id = e.user_id
-            WHERE e.user_id = %s AND e.deleted_at IS NULL
-            AND YEAR(a.attendance_date) = %s 
-            AND MONTH(a.attendance_date) = %s
-            {employee_filter}
-            ORDER BY e.leaving_date IS NULL DESC, e.name, a.attendance_date
-        """, params)
+        cur.execute(WEEKLY_SALARY_QUERY.format(employee_filter=employee_filter), params)
     
         weekly_records = cur.fetchall()
-        print(f"DEBUG: Found {len(weekly_records)} attendance records for weekly report")
     
         # Organize data by employee and week
         weekly_data = {}
@@ -1351,9 +1770,9 @@ def report():
         # Initialize totals
         total_employees = 0
         total_weeks = set()
-        total_present_days = 0
         total_salary_amount = 0
         total_advance_amount = 0
+        store_rows = []
 
         for row in weekly_records:
             emp_id, name, leaving_date, per_day_salary, salary_type, monthly_salary, holiday_day, attendance_date, status, advance = row
@@ -1408,17 +1827,12 @@ def report():
                         'days': []
                     }
             
-                # Calculate day salary
+                # Calculate day salary (the day counts come from the packed store below)
+                store_rows.append((emp_id, attendance_date, status, advance))
                 if status == 'present':
-                    weekly_data[emp_id]['weekly_data'][week_key]['present_days'] += 1
                     day_salary = weekly_data[emp_id]['effective_per_day']
-                    total_present_days += 1
                 elif status == 'half_day':
-                    weekly_data[emp_id]['weekly_data'][week_key]['half_days'] += 1
                     day_salary = weekly_data[emp_id]['effective_per_day'] / 2
-                elif status == 'absent':
-                    weekly_data[emp_id]['weekly_data'][week_key]['absent_days'] += 1
-                    day_salary = 0
                 else:
                     day_salary = 0
             
@@ -1442,6 +1856,13 @@ def report():
                     'net_salary': net_salary
                 })
     
+        # Present / half day / absent days per employee and week, counted on packed month words
+        week_totals = attendance_store.AttendanceStore.from_rows(store_rows).week_totals(month)
+        for emp_id, employee_weeks in weekly_data.items():
+            for week in employee_weeks['weekly_data'].values():
+                week.update(week_totals[(emp_id, week['week_number'])])
+        total_present_days = sum(totals['present_days'] for totals in week_totals.values())
+    
         # If no attendance records found, at least show employees
         if not weekly_records and not employee_id:
             cur.execute("""
@@ -1484,47 +1905,14 @@ def report():
             'total_advance': total_advance_amount,
             'total_net_salary': total_salary_amount - total_advance_amount
         }
-    
-        print(f"DEBUG: Weekly report generated with {len(weekly_data)} employees")
         
     elif report_type == 'employee_summary':
         # Employee Summary Report - include both active and inactive employees
-        print("DEBUG: Generating employee summary report")
-        
-        cur.execute("""
-            SELECT 
-                e.id,
-                e.name,
-                e.joining_date,
-                e.leaving_date,
-                COALESCE(sc.per_day_salary, 350.00) as per_day_salary,
-                COALESCE(sc.salary_type, 'per_day') as salary_type,
-                COALESCE(sc.monthly_salary, 0) as monthly_salary,
-                (SELECT COUNT(*) FROM attendance a WHERE a.employee_id = e.id AND a.user_id = e.user_id AND a.status = 'present') as total_present,
-                (SELECT COUNT(*) FROM attendance a WHERE a.employee_id = e.id AND a.user_id = e.user_id AND a.status = 'half_day') as total_half_days,
-                (SELECT COUNT(*) FROM attendance a WHERE a.employee_id = e.id AND a.user_id = e.user_id AND a.status = 'absent') as total_absent,
-                (SELECT COALESCE(SUM(
-                    CASE 
-                        WHEN sc.salary_type = 'per_month' AND sc.monthly_salary > 0 THEN
-                            CASE 
-                                WHEN a.status = 'present' THEN sc.monthly_salary / DAY(LAST_DAY(a.attendance_date))
-                                WHEN a.status = 'half_day' THEN (sc.monthly_salary / DAY(LAST_DAY(a.attendance_date))) / 2
-                                ELSE 0 
-                            END
-                        ELSE
-                            CASE 
-                                WHEN a.status = 'present' THEN sc.per_day_salary 
-                                WHEN a.status = 'half_day' THEN sc.per_day_salary / 2 
-                                ELSE 0 
-                            END
-                    END
-                ), 0) FROM attendance a WHERE a.employee_id = e.id AND a.user_id = e.user_id) as total_earned,
-                (SELECT COALESCE(SUM(advance), 0) FROM attendance a WHERE a.employee_id = e.id AND a.user_id = e.user_id) as total_advance
-            FROM employees e
-            LEFT JOIN salary_config sc ON e.id = sc.employee_id AND sc.user_id = e.user_id
-            WHERE e.user_id = %s AND e.deleted_at IS NULL
-            ORDER BY e.leaving_date IS NULL DESC, e.name
-        """, (user_id,))
+        if app.config['EMPLOYEE_ROLLUPS_ENABLED']:
+            # Precomputed lifetime totals - one primary key lookup per employee
+            cur.execute(EMPLOYEE_SUMMARY_ROLLUP_QUERY, (user_id,))
+        else:
+            cur.execute(EMPLOYEE_SUMMARY_QUERY, (user_id,))
         
         summary_data = []
         total_paid = 0
@@ -1565,8 +1953,6 @@ def report():
             'total_advance': total_advance,
             'total_net_paid': total_net_paid
         }
-        
-        print(f"DEBUG: Employee summary generated with {len(summary_data)} employees")
     
     # Get available months for dropdown
     cur.execute("""
@@ -1581,18 +1967,12 @@ def report():
     months_result = cur.fetchall()
     months = [row[0] for row in months_result] if months_result else [datetime.now().strftime('%Y-%m')]
     
-    cur.close()
-    
-    current_datetime = datetime.now()
-    
-    return render_template('report/report.html',
-                         report_type=report_type,
-                         report_data=report_data,
-                         employees=employees,
-                         months=months,
-                         selected_month=month,
-                         selected_employee=employee_id,
-                         current_datetime=current_datetime)
+    return {
+        'has_employees': has_employees,
+        'selected_employee_info': selected_employee_info,
+        'report_data': report_data,
+        'months': months
+    }
 
 @app.route('/logout')
 def logout():
@@ -1616,9 +1996,26 @@ def favicon():
     return send_from_directory(
         os.path.join(app.root_path, 'static', 'images'),
         filename,
-        mimetype=mimetype
+        mimetype=mimetype,
+        max_age=7 * 24 * 3600  # Fixed URL, so not immutable - but no need to revalidate on every page
     )
 
+@app.route('/static/dist/<path:filename>')
+def dist_asset(filename):
+    """Fingerprinted asset, precompressed variant when the client accepts it, cached for a year"""
+    path = safe_join(os.path.join(app.static_folder, assets.DIST_DIR), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    served_path, encoding = assets.choose_encoding(request.headers.get('Accept-Encoding'), path)
+    response = send_file(served_path, mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                         conditional=True, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = assets.IMMUTABLE
+    return response
+
 # Update the 404 error handler
 @app.errorhandler(404)
 def not_found_error(error):
@@ -1657,6 +2054,224 @@ def not_found_error(error):
 def internal_error(error):
     return render_template('errors/500.html'), 500
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of request, DB, bcrypt and email metrics"""
+    token = app.config['METRICS_TOKEN']
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    
+    return Response(metrics_exposition(), mimetype='text/plain; version=0.0.4')
+
+@app.cli.command('send-outbox')
+@click.option('--once', is_flag=True, help='Send what is due and exit instead of polling')
+def send_outbox_command(once):
+    """Deliver queued emails (for a dedicated sender with EMAIL_OUTBOX_WORKER off in the web workers)"""
+    smtp = outbox.smtp_from_config(app.config)
+    try:
+        while True:
+            email_sender.drain(smtp)
+            if once:
+                break
+            time.sleep(app.config['EMAIL_OUTBOX_POLL_INTERVAL'])
+            smtp.close_if_idle()
+    finally:
+        smtp.close()
+
+@app.cli.command('process-images')
+def process_images_command():
+    """Create missing size/WebP variants for every hashed upload (e.g. after a restart lost the queue)"""
+    upload_folder = app.config['UPLOAD_FOLDER']
+    processed = 0
+    with os.scandir(upload_folder) as entries:
+        for entry in entries:
+            manifest = images.manifest_path(upload_folder, entry.name)
+            if manifest and not os.path.exists(manifest):
+                images.process(upload_folder, entry.name)
+                processed += 1
+                click.echo(f'Processed {entry.name}')
+    click.echo(f'{processed} images processed')
+
+@app.cli.command('gc-uploads')
+@click.option('--grace-hours', type=float, default=None, help='Keep orphans younger than this (default: UPLOAD_GC_GRACE_HOURS)')
+@click.option('--dry-run', is_flag=True, help='Only report what would be deleted')
+def gc_uploads_command(grace_hours, dry_run):
+    """Delete uploads no longer referenced by any (non-deleted) employee"""
+    if grace_hours is None:
+        grace_hours = app.config['UPLOAD_GC_GRACE_HOURS']
+    stats = upload_gc.run(mysql.connection, app.config['UPLOAD_FOLDER'], grace_hours * 3600,
+                          dry_run=dry_run, log=click.echo)
+    if stats is None:
+        raise click.ClickException('Another upload GC is running')
+    
+    verb = 'would delete' if dry_run else 'deleted'
+    click.echo(f"Scanned {stats['scanned']} files: kept {stats['kept']}, {stats['too_recent']} orphans within "
+               f"the grace period, {verb} {stats['deleted']} ({stats['bytes_reclaimed'] / 1024 / 1024:.1f} MB)")
+    if stats['errors']:
+        raise SystemExit(1)
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint and gzip/brotli-precompress static/ into static/dist"""
+    manifest = assets.build(app.static_folder, log=click.echo)
+    if assets.brotli is None:
+        click.echo('brotli is not installed - only .gz variants were written', err=True)
+    click.echo(f'{len(manifest)} assets in {assets.DIST_DIR}/{assets.MANIFEST}')
+
+@app.route('/debug-db-pool')
+def debug_db_pool():
+    """Connection pool metrics for this worker process"""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    return jsonify(mysql.pool.metrics())
+
+@app.cli.command('bench-db')
+@click.option('--requests', 'total', type=int, default=500, help='Simulated requests per mode')
+@click.option('--concurrency', type=int, default=8, help='Concurrent worker threads')
+def bench_db_command(total, concurrency):
+    """Requests per second with a new connection per request vs the pool"""
+    pool = mysql.pool
+
+    def per_request_connection():
+        connection = MySQLdb.connect(**pool.connect_kwargs)
+        cur = connection.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        cur.close()
+        connection.close()
+
+    def pooled_connection():
+        connection = pool.borrow()
+        cur = connection.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        cur.close()
+        pool.give_back(connection)
+
+    def run(simulated_request):
+        per_thread = max(1, total // concurrency)
+        threads = [threading.Thread(target=lambda: [simulated_request() for _ in range(per_thread)])
+                   for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return per_thread * concurrency / (time.perf_counter() - started)
+
+    pool.fill()
+    before = run(per_request_connection)
+    after = run(pooled_connection)
+    click.echo(f"connection per request: {before:8.1f} req/s")
+    click.echo(f"pooled connections:     {after:8.1f} req/s  ({after / before:.1f}x)")
+    click.echo(f"pool metrics: {pool.metrics()}")
+
+@app.cli.command('seed-data')
+@click.option('--tenants', type=int, default=3, help='Number of benchmark tenants (users)')
+@click.option('--employees', type=int, default=100, help='Employees per tenant')
+@click.option('--years', type=int, default=1, help='Years of attendance history')
+@click.option('--per-month-ratio', type=float, default=0.3, help='Share of employees paid per month')
+@click.option('--leaver-ratio', type=float, default=0.1, help='Share of employees with a leaving date')
+@click.option('--deleted-ratio', type=float, default=0.05, help='Share of soft-deleted employees')
+@click.option('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+@click.option('--anchor-date', type=click.DateTime(formats=['%Y-%m-%d']),
+              default=datagen.DEFAULT_ANCHOR_DATE.isoformat(),
+              help='Last day of attendance; every timestamp is derived from it (YYYY-MM-DD)')
+@click.option('--drop', is_flag=True, help='Remove existing benchmark tenants first')
+def seed_data_command(tenants, employees, years, per_month_ratio, leaver_ratio, deleted_ratio, seed,
+                      anchor_date, drop):
+    """Fill the database with synthetic benchmark tenants"""
+    if drop:
+        datagen.drop_tenants(mysql.connection, log=click.echo)
+    created = datagen.generate(mysql.connection, tenants=tenants, employees_per_tenant=employees,
+                               years=years, per_month_ratio=per_month_ratio, leaver_ratio=leaver_ratio,
+                               deleted_ratio=deleted_ratio, seed=seed, anchor_date=anchor_date.date(),
+                               log=click.echo)
+    click.echo(f"Created {len(created)} tenants (password: {datagen.BENCH_PASSWORD})")
+
+@app.cli.command('bench-routes', with_appcontext=False)
+@click.option('--iterations', type=int, default=20, help='Timed requests per route and tenant')
+@click.option('--month', default=datagen.DEFAULT_ANCHOR_DATE.strftime('%Y-%m'),
+              help="Month for /salary and /report (default: the month of seed-data's default anchor date)")
+@click.option('--output', default='bench_results.json', help='File to write the JSON results to')
+@click.option('--compare', 'baseline', type=click.Path(exists=True), default=None,
+              help='Earlier results file to compare against')
+@click.option('--threshold', type=float, default=0.10, help='p95 slowdown reported as a regression')
+@click.option('--pool/--no-pool', default=None,
+              help='Pooled connections or a new connection per request (default: MYSQL_POOL_ENABLED)')
+def bench_routes_command(iterations, month, output, baseline, threshold, pool):
+    """p50/p95/p99 latency and query counts of the main pages for each benchmark tenant"""
+    if pool is not None:
+        app.config['MYSQL_POOL_ENABLED'] = pool
+    # No app context is held while benchmarking so every request borrows and
+    # returns its own pooled connection, as it does when served
+    with app.app_context():
+        cur = mysql.connection.cursor()
+        try:
+            # First active employee of each benchmark tenant is the /salary subject
+            cur.execute("""
+                SELECT u.id, MIN(e.id)
+                FROM users u
+                JOIN employees e ON e.user_id = u.id AND e.deleted_at IS NULL AND e.leaving_date IS NULL
+                WHERE u.email LIKE %s
+                GROUP BY u.id
+                ORDER BY u.id
+            """, ('bench-tenant-%@example.com',))
+            tenants = cur.fetchall()
+        finally:
+            cur.close()
+
+    if not tenants:
+        raise click.ClickException('No benchmark tenants found - run `flask seed-data` first')
+
+    results = benchmark.run(app, tenants, iterations=iterations, month=month, log=click.echo)
+    benchmark.save(results, output)
+
+    for name, route in results['routes'].items():
+        click.echo(f"{name:26} p50 {route['p50_ms']} ms  p95 {route['p95_ms']} ms  p99 {route['p99_ms']} ms  "
+                   f"{route['requests_per_second']} req/s  queries {route['queries_p50']}  errors {route['errors']}")
+    click.echo(f'Results written to {output}')
+
+    if baseline:
+        lines, regressions = benchmark.compare(benchmark.load(baseline), results, threshold)
+        for line in lines:
+            click.echo(line)
+        if regressions:
+            raise SystemExit(1)
+
+@app.cli.command('bench-attendance-store', with_appcontext=False)
+@click.option('--employees', type=int, default=200, help='Employees in the synthetic data')
+@click.option('--days', type=int, default=365, help='Days of attendance')
+@click.option('--user-id', type=int, default=None, help="Use this tenant's attendance from the database instead")
+@click.option('--repeat', type=int, default=3, help='Timed runs (the best one is reported)')
+def bench_attendance_store_command(employees, days, user_id, repeat):
+    """Row dicts vs the bit-packed attendance store for month and week aggregates"""
+    if user_id:
+        with app.app_context():
+            cur = mysql.connection.cursor()
+            try:
+                last_day = datetime.now().date()
+                cur.execute("""
+                    SELECT employee_id, attendance_date, status, advance
+                    FROM attendance
+                    WHERE user_id = %s AND attendance_date > %s AND attendance_date <= %s
+                """, (user_id, last_day - timedelta(days=days), last_day))
+                rows = cur.fetchall()
+            finally:
+                cur.close()
+    else:
+        rows = attendance_store.synthetic_rows(employees=employees, days=days)
+    
+    results = attendance_store.bench(rows, repeat=repeat)
+    dicts, packed = results['dicts'], results['packed']
+    click.echo(f"{len(rows)} attendance rows")
+    for name, result in results.items():
+        click.echo(f"{name:7} build {result['build_ms']:9.2f} ms  aggregate {result['aggregate_ms']:9.2f} ms  "
+                   f"memory {result['memory_bytes'] / 1024:10.1f} KiB")
+    click.echo(f"packed: {dicts['aggregate_ms'] / max(packed['aggregate_ms'], 0.01):.1f}x faster aggregates, "
+               f"{dicts['memory_bytes'] / max(packed['memory_bytes'], 1):.1f}x less memory")
+
 @app.route('/debug-email-config')
 def debug_email_config():
     """Debug email configuration"""
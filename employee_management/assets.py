@@ -0,0 +1,99 @@
+"""Fingerprinted, precompressed static assets
+
+``flask build-assets`` copies every file under static/ (except uploads and
+the build output itself) to ``static/dist/`` with a content hash in its name,
+writes ``.gz`` and ``.br`` siblings for compressible types, and records the
+mapping in ``static/dist/manifest.json``. Templates link assets through the
+``asset_url()`` template global, so a changed file gets a new URL and the old
+one can be cached forever (``Cache-Control: immutable``). Without a build,
+asset_url() falls back to the plain static URL.
+"""
+import gzip
+import hashlib
+import json
+import os
+
+import compression
+
+try:
+    import brotli
+except ImportError:  # Optional - .br files are skipped without it
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+SKIP_DIRS = {DIST_DIR, os.path.join('images', 'uploads')}
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.ico', '.map'}
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def fingerprinted_name(path, digest):
+    root, ext = os.path.splitext(path)
+    return f'{root}.{digest}{ext}'
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build(static_folder, log=print):
+    """Fingerprint and precompress all assets; returns the manifest"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        relative_root = os.path.relpath(root, static_folder)
+        dirs[:] = [d for d in dirs if os.path.normpath(os.path.join(relative_root, d)) not in SKIP_DIRS]
+        for filename in files:
+            source = os.path.join(root, filename)
+            logical = os.path.normpath(os.path.join(relative_root, filename)).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            hashed = fingerprinted_name(logical, hashlib.sha256(data).hexdigest()[:12])
+            target = os.path.join(dist, hashed)
+            if not os.path.exists(target):
+                _write(target, data)
+                if os.path.splitext(filename)[1].lower() in COMPRESSIBLE:
+                    _write(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                    if brotli is not None:
+                        _write(target + '.br', brotli.compress(data, quality=11))
+                log(f'{logical} -> {DIST_DIR}/{hashed}')
+            manifest[logical] = hashed
+
+    # Earlier builds are left in place: pages cached before a deploy still reference them
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+class AssetManifest:
+    """Logical static path -> fingerprinted path under dist/, reloaded when the manifest file changes"""
+
+    def __init__(self, static_folder):
+        self.path = os.path.join(static_folder, DIST_DIR, MANIFEST)
+        self._mtime = None
+        self._entries = {}
+
+    def lookup(self, filename):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+        if mtime != self._mtime:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+            self._mtime = mtime
+        return self._entries.get(filename)
+
+
+def choose_encoding(accept_encoding, path):
+    """Best precompressed sibling of path the client accepts: (path, encoding or None)"""
+    accepted = compression.accepted_encodings(accept_encoding)
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted.get(encoding, accepted.get('*', 0)) > 0 and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
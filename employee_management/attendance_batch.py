@@ -0,0 +1,97 @@
+"""Validation of /update_attendance_batch records
+
+Every submitted record gets its own result, and a bad record only fails its
+own row - never the batch. Records that pass come back normalized: ISO
+``YYYY-MM-DD`` dates and float advances, the forms the attendance counters of
+dashboard_stats.py and rollups.py key and sum on. A record without "notes" or
+"advance" (the month grid's status-only edits) is flagged to keep the row's
+current value.
+"""
+from datetime import date, datetime
+import math
+
+STATUSES = ('present', 'absent', 'half_day', 'not_marked')
+
+# attendance.attendance_date is a MySQL DATE and attendance.advance a DECIMAL(10,2)
+MIN_DATE = date(1000, 1, 1)
+MAX_ADVANCE = 10 ** 8
+
+
+def parse_date(value):
+    """ISO string of a 'YYYY-MM-DD' date MySQL can store, or None"""
+    if not isinstance(value, str):
+        return None
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    return day.isoformat() if day >= MIN_DATE else None
+
+
+def parse_advance(value):
+    """Advance amount as a float rounded to paise (missing or empty is 0), or None"""
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, bool):
+        return None
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return round(amount, 2) if math.isfinite(amount) and abs(amount) < MAX_ADVANCE else None
+
+
+def validate(records):
+    """(results, rows): one result dict per record, in order, and the records that passed
+
+    rows holds (result, row) pairs, row being a dict of employee_id (int),
+    date (ISO string), status, notes, advance (float), keep_notes and
+    keep_advance. Failed records have their result's message set.
+    """
+    results = []
+    rows = []
+    for record in records:
+        record = record if isinstance(record, dict) else {}
+        result = {
+            'employee_id': record.get('employee_id'),
+            'date': record.get('date'),
+            'success': False,
+            'message': ''
+        }
+        results.append(result)
+
+        if not result['employee_id'] or not result['date']:
+            result['message'] = 'Employee ID and date are required'
+            continue
+        status = record.get('status') or 'not_marked'
+        if status not in STATUSES:
+            result['message'] = f'Invalid status: {status}'
+            continue
+        try:
+            employee_id = int(result['employee_id'])
+        except (ValueError, TypeError):
+            result['message'] = 'Invalid employee ID'
+            continue
+        attendance_date = parse_date(result['date'])
+        if attendance_date is None:
+            result['message'] = f"Invalid date: {result['date']} (expected YYYY-MM-DD)"
+            continue
+        advance = parse_advance(record.get('advance'))
+        if advance is None:
+            result['message'] = f"Invalid advance: {record.get('advance')}"
+            continue
+        notes = record.get('notes') or ''
+        if not isinstance(notes, str):
+            result['message'] = 'Invalid notes'
+            continue
+
+        rows.append((result, {
+            'employee_id': employee_id,
+            'date': attendance_date,
+            'status': status,
+            'notes': notes,
+            'advance': advance,
+            'keep_notes': 'notes' not in record,
+            'keep_advance': 'advance' not in record,
+        }))
+    return results, rows
@@ -0,0 +1,93 @@
+"""Month grid of attendance: every employee x every day of a month
+
+Backs /api/attendance/grid and the month view of the attendance page. The
+whole month is read in one round trip - the tenant's employees plus one range
+scan of idx_attendance_user_date (user_id, attendance_date) - and encoded as
+one character per cell, a row string per employee:
+
+    0 not marked   1 present   2 half day   3 absent   - not employed that day
+
+Non-zero advances are sent separately, sparse, as {day: amount}.
+
+The grid only changes with the tenant's data, so its ETag is built from
+``users.data_version`` (see report_cache.py): revalidating an unchanged month
+costs a single primary-key lookup.
+"""
+import calendar
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+
+# Bump when the payload below changes shape, so browsers drop old validators
+FORMAT = 1
+
+STATUS_CODES = {'present': '1', 'half_day': '2', 'absent': '3'}
+NOT_MARKED = '0'
+NOT_EMPLOYED = '-'
+CODE_STATUSES = {code: status for status, code in STATUS_CODES.items()}
+CODE_STATUSES[NOT_MARKED] = 'not_marked'
+
+GRID_QUERY = """
+    SELECT 'employee' AS kind, e.id AS employee_id, e.name, e.joining_date, e.leaving_date,
+           NULL AS attendance_date, NULL AS status, NULL AS advance
+    FROM employees e
+    WHERE e.user_id = %s AND e.deleted_at IS NULL
+      AND e.joining_date < %s AND (e.leaving_date IS NULL OR e.leaving_date >= %s)
+    UNION ALL
+    SELECT 'attendance', a.employee_id, NULL, NULL, NULL, a.attendance_date, a.status, a.advance
+    FROM attendance a
+    WHERE a.user_id = %s AND a.attendance_date >= %s AND a.attendance_date < %s
+"""
+
+
+def parse_month(value):
+    """(year, month) of a 'YYYY-MM' string; ValueError when it is not one"""
+    year, _, month = (value or '').partition('-')
+    if len(year) != 4 or len(month) != 2 or not year.isdigit() or not month.isdigit():
+        raise ValueError(f'Invalid month: {value}')
+    # load() needs the first day of the next month, so the last representable year is out too
+    if not 1 <= int(month) <= 12 or not MINYEAR <= int(year) < MAXYEAR:
+        raise ValueError(f'Invalid month: {value}')
+    return int(year), int(month)
+
+
+def etag(month, data_version):
+    return f"grid-{FORMAT}-{month}-{data_version}"
+
+
+def load(cur, user_id, month):
+    """Grid payload of one 'YYYY-MM' month"""
+    year, month_num = parse_month(month)
+    days = calendar.monthrange(year, month_num)[1]
+    month_start = date(year, month_num, 1)
+    next_month = month_start + timedelta(days=days)
+
+    cur.execute(GRID_QUERY, (user_id, next_month, month_start, user_id, month_start, next_month))
+
+    employees = {}
+    cells = {}
+    for kind, employee_id, name, joining_date, leaving_date, attendance_date, status, advance in cur.fetchall():
+        if kind == 'employee':
+            # Days before joining / after leaving can not be marked
+            first = max(joining_date, month_start).day if joining_date else 1
+            last = min(leaving_date, next_month - timedelta(days=1)).day if leaving_date else days
+            row = [NOT_EMPLOYED] * days
+            row[first - 1:last] = [NOT_MARKED] * max(last - first + 1, 0)
+            employees[employee_id] = {'id': employee_id, 'name': name, 'row': row, 'advances': {}}
+        else:
+            cells[(employee_id, attendance_date.day)] = (status, advance)
+
+    for (employee_id, day), (status, advance) in cells.items():
+        employee = employees.get(employee_id)
+        if employee is None:
+            continue  # Deleted employee
+        employee['row'][day - 1] = STATUS_CODES.get(status, NOT_MARKED)
+        if advance:
+            employee['advances'][day] = float(advance)
+
+    rows = []
+    for employee in sorted(employees.values(), key=lambda employee: (employee['name'], employee['id'])):
+        employee['row'] = ''.join(employee['row'])
+        if not employee['advances']:
+            del employee['advances']
+        rows.append(employee)
+
+    return {'month': month, 'days': days, 'first_weekday': month_start.weekday(), 'employees': rows}
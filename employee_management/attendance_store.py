@@ -0,0 +1,329 @@
+"""Compact in-memory attendance for analytics
+
+An employee-month of attendance is one 64-bit word: 2 bits per day (day d in
+bits 2(d-1) and 2(d-1)+1) holding the status code of payroll.py - 0 not
+marked, 1 present, 2 half day, 3 absent. A year of one employee is 12 words
+(96 bytes) instead of ~300 row dicts. Advances are rare and kept sparse, as
+parallel (word index, day, amount) arrays.
+
+Aggregates never unpack the words. With ``lo`` the low bit and ``hi`` the high
+bit of every day field:
+
+    present = lo & ~hi    half day = hi & ~lo    absent = lo & hi
+
+and counting days is a popcount of those masks, over all words at once with
+NumPy. Restricting a count to a range of days (a week) is one more AND with a
+day mask. The weekly salary report takes its per-week present / half day /
+absent counts from week_totals(). ``flask bench-attendance-store`` compares
+this to grouping the rows into per-day ``{'status': ..., 'advance': ...}``
+dicts (see bench()).
+"""
+from datetime import date, timedelta
+import tracemalloc
+import time
+
+import numpy as np
+
+import payroll
+
+BITS_PER_DAY = 2
+# Bit 0 of every 2-bit day field
+LOW_BITS = np.uint64(0x5555555555555555)
+
+# Status of each code (payroll.UNMARKED, PRESENT, HALF_DAY, ABSENT)
+STATUS_NAMES = ('not_marked', 'present', 'half_day', 'absent')
+
+_MONTH_EPOCH = np.datetime64('1970-01', 'M')
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# (employee_id, month) as one sortable int64: employee_id * _KEY_SHIFT + month
+_KEY_SHIFT = 1 << 20
+
+
+def month_index(month):
+    """'YYYY-MM' -> months since 1970-01 (the store's month keys)"""
+    return int((np.datetime64(month, 'M') - _MONTH_EPOCH).astype(np.int64))
+
+
+def month_string(index):
+    return str(_MONTH_EPOCH + np.timedelta64(int(index), 'M'))
+
+
+def day_mask(first_day, last_day):
+    """Low bits of the fields of days first_day..last_day (1-based, inclusive)"""
+    bits = 0
+    for day in range(first_day, last_day + 1):
+        bits |= 1 << (BITS_PER_DAY * (day - 1))
+    return np.uint64(bits)
+
+
+def popcount(words):
+    """Set bits of every uint64 in words"""
+    if hasattr(np, 'bitwise_count'):  # NumPy 2.0+
+        return np.bitwise_count(words).astype(np.int64)
+    # SWAR popcount for older NumPy
+    words = words - ((words >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    words = (words & np.uint64(0x3333333333333333)) + ((words >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    words = (words + (words >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((words * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+def status_masks(words):
+    """(present, half_day, absent) masks - one low bit per matching day"""
+    lo = words & LOW_BITS
+    hi = (words >> np.uint64(1)) & LOW_BITS
+    return lo & ~hi, hi & ~lo, lo & hi
+
+
+class AttendanceStore:
+    """Attendance of many employee-months, one packed word each, sorted by (employee, month)"""
+
+    def __init__(self, employee_ids, months, words, advance_word, advance_day, advance_amount):
+        self.employee_ids = employee_ids
+        self.months = months
+        self.words = words
+        self.advance_word = advance_word
+        self.advance_day = advance_day
+        self.advance_amount = advance_amount
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (employee_id, date, status, advance) rows - the shape of attendance queries"""
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        count = len(rows)
+        employee_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        # Ordinals are far cheaper to convert than date objects
+        dates = (np.fromiter((row[1].toordinal() for row in rows), dtype=np.int64, count=count)
+                 - _EPOCH_ORDINAL).astype('datetime64[D]')
+        codes = np.fromiter((payroll.STATUS_CODES.get(row[2], payroll.UNMARKED) for row in rows),
+                            dtype=np.uint64, count=count)
+        advances = np.fromiter((float(row[3] or 0) for row in rows), dtype=np.float64, count=count)
+
+        month_starts = dates.astype('datetime64[M]')
+        months = (month_starts - _MONTH_EPOCH).astype(np.int64)
+        days = (dates - month_starts.astype('datetime64[D]')).astype(np.int64)  # 0-based
+
+        # One word per distinct (employee, month), in sorted order
+        unique_keys, word_index = np.unique(employee_ids * _KEY_SHIFT + months, return_inverse=True)
+        word_index = word_index.reshape(-1)
+        words = np.zeros(len(unique_keys), dtype=np.uint64)
+        np.bitwise_or.at(words, word_index, codes << (days * BITS_PER_DAY).astype(np.uint64))
+
+        has_advance = advances != 0
+        return cls(unique_keys // _KEY_SHIFT, unique_keys % _KEY_SHIFT, words,
+                   word_index[has_advance], (days[has_advance] + 1).astype(np.int8), advances[has_advance])
+
+    @classmethod
+    def load(cls, cur, user_id, first_day, next_day, employee_ids=None):
+        """Attendance of [first_day, next_day) - one range scan of idx_attendance_user_date"""
+        employee_filter = ""
+        params = [user_id, first_day, next_day]
+        if employee_ids is not None:
+            if not employee_ids:
+                return cls.from_rows([])
+            employee_filter = f" AND employee_id IN ({', '.join(['%s'] * len(employee_ids))})"
+            params.extend(employee_ids)
+        cur.execute(f"""
+            SELECT employee_id, attendance_date, status, advance
+            FROM attendance
+            WHERE user_id = %s AND attendance_date >= %s AND attendance_date < %s{employee_filter}
+        """, params)
+        return cls.from_rows(cur.fetchall())
+
+    def __len__(self):
+        return len(self.words)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.employee_ids, self.months, self.words,
+                                               self.advance_word, self.advance_day, self.advance_amount))
+
+    def _find(self, employee_id, month):
+        keys = self.employee_ids * _KEY_SHIFT + self.months
+        key = employee_id * _KEY_SHIFT + month
+        position = int(np.searchsorted(keys, key))
+        if position < len(keys) and keys[position] == key:
+            return position
+        return None
+
+    def status(self, employee_id, day):
+        """Status of one employee on one date ('not_marked' when there is no row)"""
+        position = self._find(employee_id, month_index(day.strftime('%Y-%m')))
+        if position is None:
+            return 'not_marked'
+        code = int(self.words[position] >> np.uint64(BITS_PER_DAY * (day.day - 1))) & 3
+        return STATUS_NAMES[code]
+
+    def counts(self, mask=None, words=None):
+        """(present, half_day, absent) day counts per word, optionally only the days in mask"""
+        words = self.words if words is None else words
+        present, half_day, absent = status_masks(words)
+        if mask is not None:
+            present, half_day, absent = present & mask, half_day & mask, absent & mask
+        return popcount(present), popcount(half_day), popcount(absent)
+
+    def advance_totals(self):
+        """Total advance per word"""
+        return np.bincount(self.advance_word, weights=self.advance_amount, minlength=len(self.words))
+
+    def month_totals(self):
+        """{(employee_id, 'YYYY-MM'): {'present_days', 'half_days', 'absent_days', 'advance'}}"""
+        present, half_day, absent = self.counts()
+        advance = self.advance_totals()
+        names = {month: month_string(month) for month in np.unique(self.months).tolist()}
+        return {
+            (employee_id, names[month]): {
+                'present_days': p, 'half_days': h, 'absent_days': a, 'advance': adv
+            }
+            for employee_id, month, p, h, a, adv in zip(self.employee_ids.tolist(), self.months.tolist(),
+                                                        present.tolist(), half_day.tolist(), absent.tolist(),
+                                                        advance.tolist())
+        }
+
+    def employee_totals(self):
+        """Totals over every month in the store: {employee_id: (present, half_day, absent, advance)}"""
+        present, half_day, absent = self.counts()
+        advance = self.advance_totals()
+        employee_ids, first = np.unique(self.employee_ids, return_index=True)
+        if not len(employee_ids):
+            return {}
+        sums = [np.add.reduceat(values, first) for values in (present, half_day, absent, advance)]
+        return {int(employee_id): (int(p), int(h), int(a), float(adv))
+                for employee_id, p, h, a, adv in zip(employee_ids.tolist(), *(s.tolist() for s in sums))}
+
+    def weekly_counts(self, month):
+        """Per-week counts of one month, weeks as on the weekly report (Monday to Sunday)
+
+        Returns (weeks, employee_ids, present, half_day, absent) where weeks is a
+        list of (iso week number, first date, last date) and the counts are
+        (employee x week) arrays.
+        """
+        first, last = payroll.month_bounds(month)
+        selected = self.months == month_index(month)
+        words = self.words[selected]
+
+        weeks = []
+        start = first
+        while start <= last:
+            end = min(start + timedelta(days=6 - start.weekday()), last)
+            weeks.append((start.isocalendar()[1], start, end))
+            start = end + timedelta(days=1)
+
+        columns = [self.counts(day_mask(start.day, end.day), words) for _, start, end in weeks]
+        present, half_day, absent = (np.stack([column[i] for column in columns], axis=1) for i in range(3))
+        return weeks, self.employee_ids[selected], present, half_day, absent
+
+    def week_totals(self, month):
+        """{(employee_id, iso week number): {'present_days', 'half_days', 'absent_days'}} of one month
+
+        The per-week counts of the weekly salary report.
+        """
+        weeks, employee_ids, present, half_day, absent = self.weekly_counts(month)
+        totals = {}
+        for row, employee_id in enumerate(employee_ids.tolist()):
+            for column, (week_number, _, _) in enumerate(weeks):
+                totals[(employee_id, week_number)] = {
+                    'present_days': int(present[row, column]),
+                    'half_days': int(half_day[row, column]),
+                    'absent_days': int(absent[row, column]),
+                }
+        return totals
+
+    def day_counts(self, day):
+        """(present, half_day, absent) employees on one date - e.g. the dashboard's present today"""
+        words = self.words[self.months == month_index(day.strftime('%Y-%m'))]
+        present, half_day, absent = self.counts(day_mask(day.day, day.day), words)
+        return int(present.sum()), int(half_day.sum()), int(absent.sum())
+
+
+# Benchmark: packed store vs per-day dicts
+
+def synthetic_rows(employees=200, first_day=date(2025, 1, 1), days=365, attendance_rate=0.9,
+                   advance_rate=0.05, seed=42):
+    """Attendance rows shaped like a query result, for benchmarking without a database"""
+    rng = np.random.default_rng(seed)
+    statuses = ['present', 'half_day', 'absent']
+    rows = []
+    for employee_id in range(1, employees + 1):
+        marked = rng.random(days) < attendance_rate
+        status = rng.choice(3, size=days, p=[0.8, 0.1, 0.1])
+        advance = np.where(rng.random(days) < advance_rate, rng.integers(1, 20, size=days) * 100, 0)
+        for offset in np.flatnonzero(marked).tolist():
+            rows.append((employee_id, first_day + timedelta(days=offset), statuses[status[offset]],
+                         float(advance[offset])))
+    return rows
+
+
+def group_rows(rows):
+    """The row-dict approach: {employee_id: {date: {'status': ..., 'advance': ...}}}"""
+    by_employee = {}
+    for employee_id, attendance_date, status, advance in rows:
+        by_employee.setdefault(employee_id, {})[attendance_date] = {'status': status, 'advance': float(advance or 0)}
+    return by_employee
+
+
+def dict_aggregates(by_employee):
+    """Month totals and per-week counts from grouped row dicts"""
+    months = {}
+    weeks = {}
+    for employee_id, days in by_employee.items():
+        for attendance_date, record in days.items():
+            month_key = attendance_date.strftime('%Y-%m')
+            month = months.setdefault((employee_id, month_key),
+                                      {'present_days': 0, 'half_days': 0, 'absent_days': 0, 'advance': 0.0})
+            week = weeks.setdefault((employee_id, month_key, attendance_date.isocalendar()[1]),
+                                    {'present_days': 0, 'half_days': 0, 'absent_days': 0})
+            if record['status'] == 'present':
+                month['present_days'] += 1
+                week['present_days'] += 1
+            elif record['status'] == 'half_day':
+                month['half_days'] += 1
+                week['half_days'] += 1
+            elif record['status'] == 'absent':
+                month['absent_days'] += 1
+                week['absent_days'] += 1
+            month['advance'] += record['advance']
+    return months, weeks
+
+
+def store_aggregates(store):
+    """The same month totals and per-week counts from an AttendanceStore"""
+    months = store.month_totals()
+    weeks = {}
+    for month in np.unique(store.months).tolist():
+        month = month_string(month)
+        weeks[month] = store.weekly_counts(month)
+    return months, weeks
+
+
+def _best_of(repeat, function, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def _retained_bytes(function, *args):
+    """Memory still allocated by what function returns"""
+    tracemalloc.start()
+    result = function(*args)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def bench(rows, repeat=3):
+    """Build time, aggregate time and memory of row dicts vs the packed store on the same rows"""
+    results = {}
+    for name, build, aggregate in (('dicts', group_rows, dict_aggregates),
+                                   ('packed', AttendanceStore.from_rows, store_aggregates)):
+        build_seconds, structure = _best_of(repeat, build, rows)
+        aggregate_seconds, _ = _best_of(repeat, aggregate, structure)
+        results[name] = {
+            'build_ms': round(build_seconds * 1000, 2),
+            'aggregate_ms': round(aggregate_seconds * 1000, 2),
+            'memory_bytes': _retained_bytes(build, rows),
+        }
+    return results
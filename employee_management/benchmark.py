@@ -0,0 +1,141 @@
+"""End-to-end route benchmark
+
+Drives the main pages through the Flask test client as each benchmark tenant
+(see datagen.py) and records per-route latency percentiles and SQL query
+counts. Results are written as JSON so two runs - e.g. before and after a
+change - can be compared with ``compare()``.
+"""
+from datetime import datetime
+import json
+import math
+import platform
+import re
+import subprocess
+import time
+
+_SQL_SUMMARY = re.compile(r'queries=(\d+); sql_ms=([\d.]+)')
+
+
+def default_routes(employee_id, month):
+    """(name, url) pairs benchmarked for one tenant"""
+    return [
+        ('dashboard', '/dashboard'),
+        ('employees', '/employees'),
+        ('employees_by_name_api', '/api/employees?sort=name'),
+        ('attendance', '/attendance'),
+        ('attendance_grid_api', f'/api/attendance/grid?month={month}'),
+        ('salary', f'/salary?employee_id={employee_id}&month={month}'),
+        ('report_weekly_salary', f'/report?type=weekly_salary&month={month}'),
+        ('report_employee_summary', '/report?type=employee_summary'),
+    ]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run(app, tenants, iterations=20, warmup=2, month=None, log=print):
+    """Benchmark every route for every tenant; tenants is a list of (user_id, employee_id)"""
+    month = month or datetime.now().strftime('%Y-%m')
+    # The SQL summary header is how query counts come back through the test client
+    app.config['SQL_DEBUG_HEADER'] = True
+    client = app.test_client()
+    samples = {}
+
+    for user_id, employee_id in tenants:
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+
+        for name, url in default_routes(employee_id, month):
+            route = samples.setdefault(name, {'ms': [], 'queries': [], 'sql_ms': [], 'errors': 0})
+            for i in range(warmup + iterations):
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1000
+                response.close()
+                if i < warmup:
+                    continue
+                if response.status_code != 200:
+                    route['errors'] += 1
+                    continue
+                route['ms'].append(elapsed)
+                match = _SQL_SUMMARY.search(response.headers.get('X-SQL-Summary', ''))
+                if match:
+                    route['queries'].append(int(match.group(1)))
+                    route['sql_ms'].append(float(match.group(2)))
+        log(f'Benchmarked user {user_id}')
+
+    routes = {}
+    for name, route in samples.items():
+        routes[name] = {
+            'requests': len(route['ms']),
+            'errors': route['errors'],
+            'p50_ms': _round(percentile(route['ms'], 50)),
+            'p95_ms': _round(percentile(route['ms'], 95)),
+            'p99_ms': _round(percentile(route['ms'], 99)),
+            'mean_ms': _round(sum(route['ms']) / len(route['ms'])) if route['ms'] else None,
+            # Requests are sequential, so this is 1000 / mean_ms
+            'requests_per_second': _round(len(route['ms']) / (sum(route['ms']) / 1000)) if route['ms'] else None,
+            'queries_p50': percentile(route['queries'], 50),
+            'queries_max': max(route['queries'], default=None),
+            'sql_ms_p50': _round(percentile(route['sql_ms'], 50)),
+        }
+
+    return {
+        'version': git_version(),
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'month': month,
+        'mysql_pool': app.config['MYSQL_POOL_ENABLED'],
+        'tenants': len(tenants),
+        'iterations': iterations,
+        'routes': routes,
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """Lines describing per-route changes; regressions beyond threshold are marked"""
+    lines = []
+    regressions = 0
+    for name, now in current['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if not before or not before.get('p95_ms') or now.get('p95_ms') is None:
+            lines.append(f'{name:26} p95 {now.get("p95_ms")} ms (no baseline)')
+            continue
+        change = (now['p95_ms'] - before['p95_ms']) / before['p95_ms']
+        query_change = (now['queries_max'] or 0) - (before.get('queries_max') or 0)
+        regressed = change > threshold or query_change > 0
+        regressions += regressed
+        lines.append(f"{name:26} p95 {before['p95_ms']:8.2f} -> {now['p95_ms']:8.2f} ms ({change:+.1%}), "
+                     f"req/s {before.get('requests_per_second')} -> {now.get('requests_per_second')}, "
+                     f"queries {before.get('queries_max')} -> {now['queries_max']}"
+                     + ('  REGRESSION' if regressed else ''))
+    return lines, regressions
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+
+
+def git_version():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
@@ -0,0 +1,190 @@
+"""Response compression
+
+CompressionMiddleware wraps ``app.wsgi_app`` and gzip- or brotli-encodes
+text, HTML and JSON responses for clients that accept it (brotli preferred on
+equal q-values). Responses with a Content-Length are only compressed from
+COMPRESSION_MIN_SIZE bytes up; the compressor's output is passed on as it
+becomes available, never collected into one buffer.
+
+Responses without a Content-Length are streamed (report exports, generators):
+every chunk the app yields is compressed and flushed on its own, so the client
+receives it as soon as the app produces it.
+
+Responses that already carry a Content-Encoding (the precompressed files under
+static/dist), partial content and ``Cache-Control: no-transform`` are left as
+they are.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'application/xml', 'image/svg+xml'}
+
+
+def accepted_encodings(header):
+    """{encoding: q} of an Accept-Encoding header, including refused (q=0) ones"""
+    accepted = {}
+    for part in (header or '').split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate(header, available):
+    """Encoding from ``available`` (in server preference order) the client rates highest, or None"""
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type):
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    return (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+            or mimetype.endswith('+json') or mimetype.endswith('+xml'))
+
+
+class Encoder:
+    """Incremental gzip/brotli compressor: compress() / flush() / finish()"""
+
+    def __init__(self, encoding, gzip_level=6, brotli_quality=4):
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+
+    def compress(self, data):
+        return self._brotli.process(data) if self._brotli else self._zlib.compress(data)
+
+    def flush(self):
+        """Everything compressed so far, decodable without closing the stream"""
+        return self._brotli.flush() if self._brotli else self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._brotli.finish() if self._brotli else self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """WSGI middleware compressing eligible responses for clients that accept it"""
+
+    def __init__(self, app, min_size=1024, gzip_level=6, brotli_quality=4, enabled=True):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.enabled = enabled
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def __call__(self, environ, start_response):
+        encoding = None
+        if self.enabled and environ.get('REQUEST_METHOD') != 'HEAD':
+            encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING'), self.encodings)
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        state = {}
+
+        def start(status, headers, exc_info=None):
+            # May be called again with exc_info before the body starts - decide afresh
+            state.clear()
+            state['started'] = True
+            streamed = self._should_compress(status, headers)
+            if streamed is None:
+                return start_response(status, headers, exc_info)
+
+            encoder = Encoder(encoding, self.gzip_level, self.brotli_quality)
+            state['encoder'] = encoder
+            state['streamed'] = streamed
+            write = start_response(status, self._compressed_headers(headers, encoding), exc_info)
+
+            def compressed_write(data):
+                # Legacy write() output is sent immediately, so flush it right away
+                write(encoder.compress(data) + encoder.flush())
+            return compressed_write
+
+        app_iter = self.app(environ, start)
+        if state.get('started') and 'encoder' not in state:
+            return app_iter  # Not compressed - keep wsgi.file_wrapper and friends intact
+        return self._iter(app_iter, state)
+
+    def _should_compress(self, status, headers):
+        """None to pass the response through, else whether it is streamed (no Content-Length)"""
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return None
+        values = {name.lower(): value for name, value in headers}
+        if 'content-encoding' in values or 'content-range' in values:
+            return None
+        if 'no-transform' in values.get('cache-control', '').lower():
+            return None
+        if not is_compressible(values.get('content-type')):
+            return None
+        length = values.get('content-length')
+        if length is None:
+            return True
+        if int(length) < self.min_size:
+            return None
+        return False
+
+    @staticmethod
+    def _compressed_headers(headers, encoding):
+        rewritten = []
+        vary = None
+        for name, value in headers:
+            lower = name.lower()
+            if lower == 'content-length':
+                continue
+            if lower == 'vary':
+                vary = value
+                continue
+            if lower == 'etag' and not value.startswith('W/'):
+                # Same resource, different bytes - a strong validator would be wrong
+                value = 'W/' + value
+            rewritten.append((name, value))
+        if vary is None:
+            vary = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower() and vary.strip() != '*':
+            vary = f'{vary}, Accept-Encoding'
+        rewritten.append(('Vary', vary))
+        rewritten.append(('Content-Encoding', encoding))
+        return rewritten
+
+    @staticmethod
+    def _iter(app_iter, state):
+        try:
+            for chunk in app_iter:
+                encoder = state.get('encoder')
+                if encoder is None:
+                    yield chunk
+                    continue
+                data = encoder.compress(chunk)
+                if state['streamed']:
+                    data += encoder.flush()
+                if data:
+                    yield data
+            encoder = state.get('encoder')
+            if encoder is not None:
+                yield encoder.finish()
+        finally:
+            close = getattr(app_iter, 'close', None)
+            if close is not None:
+                close()
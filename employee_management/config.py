@@ -12,12 +12,111 @@ class Config:
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'Luvp@tel-270705')
     MYSQL_DB = os.getenv('MYSQL_DB', 'employee_management')
     
+    # Connection pool (per worker process) - see db_pool.py; disabled = one connection per request
+    MYSQL_POOL_ENABLED = os.getenv('MYSQL_POOL_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    MYSQL_POOL_MIN_SIZE = int(os.getenv('MYSQL_POOL_MIN_SIZE', 2))
+    MYSQL_POOL_MAX_SIZE = int(os.getenv('MYSQL_POOL_MAX_SIZE', 10))
+    MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', 5))  # seconds to wait for a free connection
+    MYSQL_POOL_MAX_IDLE = int(os.getenv('MYSQL_POOL_MAX_IDLE', 300))  # seconds before an idle connection is closed
+    
+    # SQL instrumentation - requests over these budgets are logged (logger 'sql')
+    SQL_QUERY_BUDGET = int(os.getenv('SQL_QUERY_BUDGET', 10))
+    SQL_TIME_BUDGET_MS = float(os.getenv('SQL_TIME_BUDGET_MS', 200))
+    SQL_REPEAT_THRESHOLD = int(os.getenv('SQL_REPEAT_THRESHOLD', 5))  # same statement N times = likely N+1
+    SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', 100))
+    SQL_LOG_ALL_REQUESTS = os.getenv('SQL_LOG_ALL_REQUESTS', 'False').lower() in ('true', '1', 'yes')
+    SQL_LOG_LEVEL = os.getenv('SQL_LOG_LEVEL') or None  # default: INFO with SQL_LOG_ALL_REQUESTS, else WARNING
+    
+    # Metrics - /metrics requires "Authorization: Bearer <METRICS_TOKEN>" when set.
+    # With forked workers point METRICS_MULTIPROC_DIR at a shared, writable directory
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR') or None
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))  # seconds between per-process writes
+    
+    # Password hashing - bcrypt cost (stored hashes are upgraded on the next login when
+    # it changes) and the bounded pool that runs it
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))  # queued beyond this = 503
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))  # seconds
+    
+    # Login throttling - token buckets per client IP and per email. Behind a reverse proxy set
+    # TRUSTED_PROXY_HOPS to the number of proxies in front of the app, or every client shares the
+    # proxy's IP bucket; never set it higher than that, or clients can spoof X-Forwarded-For
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', 20))
+    LOGIN_IP_PER_MINUTE = float(os.getenv('LOGIN_IP_PER_MINUTE', 20))
+    LOGIN_EMAIL_BURST = int(os.getenv('LOGIN_EMAIL_BURST', 5))
+    LOGIN_EMAIL_PER_MINUTE = float(os.getenv('LOGIN_EMAIL_PER_MINUTE', 5))
+    
+    # Response compression - gzip/brotli for text, HTML and JSON responses (see compression.py)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # bytes; streamed responses always qualify
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))  # 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))  # 0-11; high values are too slow per request
+    
     # Secret Key - from environment variable
     SECRET_KEY = os.getenv('SECRET_KEY', 'fallback-secret-key-change-this')
     
     # File Upload
     UPLOAD_FOLDER = 'static/images/uploads'
     MAX_CONTENT_LENGTH = 2 * 1024 * 1024  # 2MB max file size
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))  # background threads resizing profile photos
+    
+    # Upload GC - removes photos no employee references (`flask gc-uploads`); set an
+    # interval to also run it in the background (one process at a time, via a MySQL lock)
+    UPLOAD_GC_INTERVAL_HOURS = float(os.getenv('UPLOAD_GC_INTERVAL_HOURS', 0))  # 0 = only on demand
+    UPLOAD_GC_GRACE_HOURS = float(os.getenv('UPLOAD_GC_GRACE_HOURS', 24))  # never delete younger orphans
+    
+    # Employees list - rows per page (HTML and /api/employees default) and the API's upper bound
+    EMPLOYEES_PAGE_SIZE = int(os.getenv('EMPLOYEES_PAGE_SIZE', 50))
+    EMPLOYEES_API_MAX_LIMIT = int(os.getenv('EMPLOYEES_API_MAX_LIMIT', 200))
+    EMPLOYEE_SEARCH_MAX_LIMIT = int(os.getenv('EMPLOYEE_SEARCH_MAX_LIMIT', 25))  # typeahead results per request
+    
+    # Attendance - maximum rows accepted by one /update_attendance_batch call
+    ATTENDANCE_BATCH_MAX_ROWS = int(os.getenv('ATTENDANCE_BATCH_MAX_ROWS', 1000))
+    
+    # Payroll runs - process pool size and employees per pool task
+    PAYROLL_WORKERS = int(os.getenv('PAYROLL_WORKERS', 4))
+    PAYROLL_CHUNK_SIZE = int(os.getenv('PAYROLL_CHUNK_SIZE', 200))
+    
+    # Reports - serve employee_summary from the employee_rollup table
+    EMPLOYEE_ROLLUPS_ENABLED = os.getenv('EMPLOYEE_ROLLUPS_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    
+    # Report cache - 'memory' (per-process LRU) or 'redis' (shared between workers)
+    REPORT_CACHE_BACKEND = os.getenv('REPORT_CACHE_BACKEND', 'memory')
+    REPORT_CACHE_URL = os.getenv('REPORT_CACHE_URL', 'redis://localhost:6379/0')
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', 256))
+    REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', 3600))  # seconds
+    
+    # Dashboard - figures cached per tenant for this many seconds (writes drop the entry
+    # at once; the TTL bounds how long other processes may show older figures).
+    # Uses the report cache backend (memory or redis); 0 disables the cache.
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 30))
+    
+    # Live updates - open dashboard / attendance pages follow attendance writes over
+    # Server-Sent Events (/events). 'memory' only reaches pages served by the same
+    # process; with several worker processes use 'redis'. Each open page holds a
+    # connection (and a thread with threaded workers) for up to LIVE_UPDATES_STREAM_SECONDS
+    LIVE_UPDATES_ENABLED = os.getenv('LIVE_UPDATES_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    LIVE_UPDATES_BACKEND = os.getenv('LIVE_UPDATES_BACKEND', 'memory')
+    LIVE_UPDATES_URL = os.getenv('LIVE_UPDATES_URL', 'redis://localhost:6379/0')
+    LIVE_UPDATES_MAX_CLIENTS = int(os.getenv('LIVE_UPDATES_MAX_CLIENTS', 100))  # open streams per process; more = 503
+    LIVE_UPDATES_MAX_PENDING = int(os.getenv('LIVE_UPDATES_MAX_PENDING', 50))  # queued events per stream before it resyncs
+    LIVE_UPDATES_MAX_ROWS = int(os.getenv('LIVE_UPDATES_MAX_ROWS', 500))  # larger batches make pages resync instead
+    LIVE_UPDATES_HEARTBEAT = float(os.getenv('LIVE_UPDATES_HEARTBEAT', 15))  # seconds between keepalive comments
+    LIVE_UPDATES_STREAM_SECONDS = float(os.getenv('LIVE_UPDATES_STREAM_SECONDS', 300))  # then the browser reconnects
+    
+    # Email outbox - messages are queued in email_outbox and sent by a background thread
+    # in each worker (or by `flask send-outbox` when EMAIL_OUTBOX_WORKER is off).
+    # For local testing point MAIL_SERVER/MAIL_PORT at a stand-in such as
+    # `python -m aiosmtpd -n -l localhost:1025` with MAIL_USE_TLS=False
+    EMAIL_OUTBOX_WORKER = os.getenv('EMAIL_OUTBOX_WORKER', 'True').lower() in ('true', '1', 'yes')
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+    EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 5))  # seconds
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', 300))  # claimed rows retried after this
+    EMAIL_OUTBOX_SMTP_MAX_IDLE = int(os.getenv('EMAIL_OUTBOX_SMTP_MAX_IDLE', 60))  # seconds an idle SMTP session is kept
     
     # Email Configuration - from environment variables
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
@@ -0,0 +1,147 @@
+"""Dashboard figures
+
+load() fetches everything the dashboard shows - active employees, present
+today, salary this month and the five latest attendance changes - in one
+UNION ALL query, i.e. one round trip. app.py caches the result per tenant for
+DASHBOARD_CACHE_TTL seconds and drops the entry after every write to the
+tenant's data.
+
+Salary this month is read from ``month_salary_total`` instead of being
+re-aggregated from attendance. Attendance writes add their difference to the
+counter (record_attendance_changes); writes that change what the total is
+made of - salary configs, leaving dates, deletions - remove the tenant's
+counters (invalidate_month_salary) and the next load rebuilds the current
+month with MONTH_SALARY_QUERY.
+"""
+from collections import defaultdict
+
+import payroll
+
+# Active employees' per-day salary times their present/half days in [month start, next month).
+# Params: (user_id, month_start, next_month, user_id). Attendance is aggregated first so it is read
+# through one range of idx_attendance_user_date - see `flask explain-month-queries`
+MONTH_SALARY_QUERY = """
+    SELECT COALESCE(SUM(sc.per_day_salary * days.weighted_days), 0)
+    FROM (
+        SELECT
+            a.employee_id,
+            COUNT(CASE WHEN a.status = 'present' THEN 1 END) +
+            COUNT(CASE WHEN a.status = 'half_day' THEN 1 END) * 0.5 as weighted_days
+        FROM attendance a
+        WHERE a.user_id = %s AND a.attendance_date >= %s AND a.attendance_date < %s
+        GROUP BY a.employee_id
+    ) as days
+    JOIN employees e ON e.id = days.employee_id
+    JOIN salary_config sc ON e.id = sc.employee_id
+    WHERE e.deleted_at IS NULL AND e.leaving_date IS NULL AND e.user_id = %s
+"""
+
+DASHBOARD_QUERY = """
+    SELECT 'totals' AS kind,
+           (SELECT COUNT(*) FROM employees
+            WHERE user_id = %s AND deleted_at IS NULL AND leaving_date IS NULL) AS active_employees,
+           (SELECT COUNT(DISTINCT a.employee_id)
+            FROM attendance a
+            JOIN employees e ON a.employee_id = e.id
+            WHERE a.user_id = %s AND a.attendance_date = %s AND a.status IN ('present', 'half_day')
+              AND e.deleted_at IS NULL AND e.leaving_date IS NULL) AS present_today,
+           (SELECT total FROM month_salary_total WHERE user_id = %s AND month = %s) AS month_salary,
+           NULL AS name, NULL AS attendance_date, NULL AS status, NULL AS updated_at, NULL AS employee_id
+    UNION ALL
+    (SELECT 'activity', NULL, NULL, NULL, e.name, a.attendance_date, a.status, a.updated_at, a.employee_id
+     FROM attendance a
+     JOIN employees e ON a.employee_id = e.id
+     WHERE a.user_id = %s AND e.deleted_at IS NULL AND e.leaving_date IS NULL
+     ORDER BY a.updated_at DESC
+     LIMIT 5)
+"""
+
+# Weight of an attendance status in the month salary
+DAY_WEIGHTS = {'present': 1.0, 'half_day': 0.5}
+
+
+def cache_key(user_id, today):
+    # The date is part of the key: "present today" starts over at midnight
+    return f"{user_id}:{today.isoformat()}"
+
+
+def load(cur, user_id, today):
+    """Dashboard figures of one tenant; month_salary is None while its counter is missing"""
+    month = today.strftime('%Y-%m')
+    cur.execute(DASHBOARD_QUERY, (user_id, user_id, today, user_id, month, user_id))
+    stats = {'total_employees': 0, 'present_today': 0, 'month_salary': None, 'recent_activity': []}
+    for kind, active, present, month_salary, name, attendance_date, status, updated_at, employee_id in cur.fetchall():
+        if kind == 'totals':
+            stats['total_employees'] = int(active or 0)
+            stats['present_today'] = int(present or 0)
+            stats['month_salary'] = float(month_salary) if month_salary is not None else None
+        else:
+            stats['recent_activity'].append((name, attendance_date, status, updated_at, employee_id))
+    return stats
+
+
+def rebuild_month_salary(cur, user_id, month):
+    """Recompute and store one month's counter from attendance; returns the total"""
+    month_start, next_month = payroll.month_range(month)
+    cur.execute(f"""
+        INSERT INTO month_salary_total (user_id, month, total)
+        SELECT %s, %s, ({MONTH_SALARY_QUERY})
+        ON DUPLICATE KEY UPDATE total = VALUES(total)
+    """, (user_id, month, user_id, month_start, next_month, user_id))
+    cur.execute("SELECT total FROM month_salary_total WHERE user_id = %s AND month = %s", (user_id, month))
+    return float(cur.fetchone()[0])
+
+
+def record_attendance_changes(cur, user_id, changes):
+    """Apply attendance writes to the month counters - call BEFORE executing the writes
+
+    ``changes`` is a list of (employee_id, date, new_status) where new_status
+    None means the row is deleted. Only months that already have a counter are
+    updated; a missing counter is rebuilt from attendance when needed.
+    """
+    if not changes:
+        return
+
+    latest = {}
+    for employee_id, attendance_date, status in changes:
+        latest[(int(employee_id), str(attendance_date)[:10])] = status
+
+    employee_ids = sorted({employee_id for employee_id, _ in latest})
+    conditions = ' OR '.join(['(employee_id = %s AND attendance_date = %s)'] * len(latest))
+    cur.execute(f"""
+        SELECT employee_id, attendance_date, status
+        FROM attendance
+        WHERE user_id = %s AND ({conditions})
+        FOR UPDATE
+    """, [user_id] + [value for pair in latest for value in pair])
+    old_statuses = {(row[0], row[1].strftime('%Y-%m-%d')): row[2] for row in cur.fetchall()}
+
+    # Same employees as MONTH_SALARY_QUERY: active, not deleted, with a salary config
+    cur.execute(f"""
+        SELECT e.id, sc.per_day_salary
+        FROM employees e
+        JOIN salary_config sc ON e.id = sc.employee_id
+        WHERE e.user_id = %s AND e.deleted_at IS NULL AND e.leaving_date IS NULL
+          AND e.id IN ({', '.join(['%s'] * len(employee_ids))})
+    """, [user_id] + employee_ids)
+    day_rates = {row[0]: float(row[1] or 0) for row in cur.fetchall()}
+
+    deltas = defaultdict(float)
+    for (employee_id, attendance_date), status in latest.items():
+        if employee_id not in day_rates:
+            continue
+        old_status = old_statuses.get((employee_id, attendance_date))
+        change = DAY_WEIGHTS.get(status, 0.0) - DAY_WEIGHTS.get(old_status, 0.0)
+        if change:
+            deltas[attendance_date[:7]] += day_rates[employee_id] * change
+
+    for month, delta in sorted(deltas.items()):
+        cur.execute("""
+            UPDATE month_salary_total SET total = total + %s
+            WHERE user_id = %s AND month = %s
+        """, (delta, user_id, month))
+
+
+def invalidate_month_salary(cur, user_id):
+    """Drop the tenant's counters - call inside writes to salary configs or employee status"""
+    cur.execute("DELETE FROM month_salary_total WHERE user_id = %s", (user_id,))
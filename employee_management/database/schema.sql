@@ -8,8 +8,10 @@ CREATE TABLE users (
     email VARCHAR(255) UNIQUE NOT NULL,
     password VARCHAR(255) NOT NULL,
     name VARCHAR(255) NOT NULL,
+    data_version INT NOT NULL DEFAULT 0,    -- Bumped on every attendance/employee write (report cache key)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+-- Existing databases: ALTER TABLE users ADD COLUMN data_version INT NOT NULL DEFAULT 0 AFTER name;
 
 -- Employees table with user_id for multi-tenancy
 CREATE TABLE employees (
@@ -67,6 +69,14 @@ CREATE INDEX idx_attendance_employee_date ON attendance(employee_id, attendance_
 CREATE INDEX idx_attendance_user_date ON attendance(user_id, attendance_date);
 CREATE INDEX idx_attendance_date ON attendance(attendance_date);
 CREATE INDEX idx_attendance_status ON attendance(status);
+CREATE INDEX idx_attendance_user_updated ON attendance(user_id, updated_at);  -- Dashboard recent activity
+-- Employees list: keyset pagination by name / joining date within a tenant (see employee_list.py)
+CREATE INDEX idx_employees_user_name ON employees(user_id, deleted_at, name, id);
+CREATE INDEX idx_employees_user_joining ON employees(user_id, deleted_at, joining_date, id);
+-- Employee search (see employee_search.py): names anywhere via ngram FULLTEXT, mobile / PAN by prefix
+CREATE FULLTEXT INDEX ft_employees_name ON employees(name) WITH PARSER ngram;
+CREATE INDEX idx_employees_user_mobile ON employees(user_id, deleted_at, mobile_number);
+CREATE INDEX idx_employees_user_pan ON employees(user_id, deleted_at, pan_number);
 
 
 -- Password reset table
@@ -77,3 +87,77 @@ CREATE TABLE password_resets (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+
+
+-- Materialized monthly payroll per employee (served by /salary and payroll runs while fresh)
+CREATE TABLE payroll_snapshot (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,  -- For multi-tenancy
+    employee_id INT NOT NULL,
+    month CHAR(7) NOT NULL,                 -- 'YYYY-MM'
+    present_days INT NOT NULL DEFAULT 0,
+    half_days INT NOT NULL DEFAULT 0,
+    absent_days INT NOT NULL DEFAULT 0,
+    total_salary DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    total_advance DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    net_salary DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    salary_data MEDIUMTEXT NULL,            -- Full computed salary_data as JSON (NULL: placeholder left by a write)
+    is_stale BOOLEAN NOT NULL DEFAULT FALSE, -- Set by attendance / salary config writes
+    generation INT NOT NULL DEFAULT 0,      -- Bumped by every invalidation; snapshots only overwrite the generation they read
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_payroll_snapshot (user_id, employee_id, month)  -- One snapshot per employee per month
+);
+
+CREATE INDEX idx_payroll_snapshot_user_month ON payroll_snapshot(user_id, month);
+-- Existing databases: ALTER TABLE payroll_snapshot MODIFY salary_data MEDIUMTEXT NULL,
+--     ADD COLUMN generation INT NOT NULL DEFAULT 0 AFTER is_stale;
+
+
+-- Lifetime attendance totals per employee for the employee_summary report
+-- (optional - maintained when EMPLOYEE_ROLLUPS_ENABLED is set; backfill with `flask rebuild-rollups`)
+CREATE TABLE employee_rollup (
+    user_id INT NOT NULL,  -- For multi-tenancy
+    employee_id INT NOT NULL,
+    total_present INT NOT NULL DEFAULT 0,
+    total_half_days INT NOT NULL DEFAULT 0,
+    total_absent INT NOT NULL DEFAULT 0,
+    total_earned DECIMAL(16,6) NOT NULL DEFAULT 0,
+    total_advance DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, employee_id),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE CASCADE
+);
+
+
+-- Dashboard "salary this month" per tenant, kept up to date by attendance writes and
+-- dropped when salary configs or employee status change (rebuilt on the next dashboard load)
+CREATE TABLE month_salary_total (
+    user_id INT NOT NULL,
+    month CHAR(7) NOT NULL,                 -- 'YYYY-MM'
+    total DECIMAL(16,6) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, month),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+
+-- Outgoing email queue (written by requests, delivered by the background sender)
+CREATE TABLE email_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    sender VARCHAR(255) NOT NULL,
+    recipients TEXT NOT NULL,               -- JSON list of addresses
+    subject VARCHAR(255) NOT NULL,
+    body MEDIUMTEXT,
+    html MEDIUMTEXT,
+    status ENUM('pending', 'sending', 'sent', 'failed') NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Retry backoff / claim lease
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME NULL
+);
+
+CREATE INDEX idx_email_outbox_due ON email_outbox(status, next_attempt_at);
@@ -0,0 +1,148 @@
+"""Synthetic multi-tenant data for load testing
+
+Fills the tables from database/schema.sql with benchmark tenants: users,
+employees (with leavers and soft-deleted rows), salary configs with a mix of
+per-day and per-month pay, and years of daily attendance up to an anchor date.
+Every value and timestamp is derived from the seed and the anchor date - never
+the clock - so two runs with the same options produce the same data (only the
+bcrypt salt of the shared password differs).
+"""
+from datetime import date, datetime, time, timedelta
+import random
+
+import bcrypt
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Diya', 'Ananya', 'Ishaan', 'Kavya', 'Rohan',
+               'Priya', 'Arjun', 'Meera', 'Kabir', 'Saanvi', 'Vihaan', 'Nisha', 'Rahul']
+LAST_NAMES = ['Patel', 'Shah', 'Mehta', 'Desai', 'Joshi', 'Trivedi', 'Bhatt', 'Pandya',
+              'Parikh', 'Chauhan', 'Rana', 'Solanki']
+
+# Rows per INSERT statement
+BATCH_SIZE = 5000
+
+BENCH_PASSWORD = 'benchmark'
+
+# Last day of generated attendance unless another anchor is given
+DEFAULT_ANCHOR_DATE = date(2025, 6, 30)
+
+
+def tenant_email(index):
+    return f'bench-tenant-{index}@example.com'
+
+
+def generate(connection, tenants=3, employees_per_tenant=100, years=1, per_month_ratio=0.3,
+             leaver_ratio=0.1, deleted_ratio=0.05, attendance_rate=0.9, seed=42,
+             anchor_date=DEFAULT_ANCHOR_DATE, log=print):
+    """Create benchmark tenants and return a list of {'user_id', 'email', 'employees'}
+
+    Attendance runs for ``years`` up to and including anchor_date.
+    """
+    rng = random.Random(seed)
+    cur = connection.cursor()
+    today = anchor_date
+    first_day = today - timedelta(days=365 * years)
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    created = []
+
+    try:
+        for tenant in range(1, tenants + 1):
+            email = tenant_email(tenant)
+            cur.execute("SELECT id FROM users WHERE email = %s", (email,))
+            if cur.fetchone():
+                raise ValueError(f'{email} already exists - drop the benchmark tenants before reseeding')
+
+            cur.execute("INSERT INTO users (name, email, password, created_at) VALUES (%s, %s, %s, %s)",
+                        (f'Benchmark Tenant {tenant}', email, password_hash, _at(first_day, 9)))
+            user_id = cur.lastrowid
+
+            employees = []
+            for n in range(employees_per_tenant):
+                joining_date = first_day + timedelta(days=rng.randint(0, max(0, (today - first_day).days // 2)))
+                leaving_date = None
+                if rng.random() < leaver_ratio:
+                    leaving_date = joining_date + timedelta(days=rng.randint(30, max(31, (today - joining_date).days)))
+                    leaving_date = min(leaving_date, today)
+                deleted_at = _at(today, 18) if rng.random() < deleted_ratio else None
+
+                cur.execute("""
+                    INSERT INTO employees (user_id, name, mobile_number, pan_number, joining_date,
+                                           leaving_date, is_active, created_at, deleted_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (user_id, f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n + 1}',
+                      f'9{rng.randint(100000000, 999999999)}',
+                      f'{"".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=5))}{rng.randint(1000, 9999)}X',
+                      joining_date, leaving_date, leaving_date is None, _at(joining_date, 9), deleted_at))
+                employee_id = cur.lastrowid
+
+                per_month = rng.random() < per_month_ratio
+                holiday_day = rng.choice(['friday', 'friday', 'sunday', 'monday'])
+                employees.append((employee_id, joining_date, leaving_date, holiday_day))
+                cur.execute("""
+                    INSERT INTO salary_config (user_id, employee_id, salary_type, per_day_salary,
+                                               monthly_salary, working_days_per_week, holiday_day, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (user_id, employee_id, 'per_month' if per_month else 'per_day',
+                      rng.choice([300, 350, 400, 450, 500]),
+                      rng.choice([9000, 12000, 15000, 18000]) if per_month else 0, 6, holiday_day,
+                      _at(joining_date, 9)))
+            connection.commit()
+
+            rows = 0
+            batch = []
+            for employee_id, joining_date, leaving_date, holiday_day in employees:
+                holiday_weekday = WEEKDAYS.index(holiday_day)
+                day = joining_date
+                last_day = leaving_date or today
+                while day <= last_day:
+                    worked_holiday = day.weekday() == holiday_weekday and rng.random() < 0.1
+                    if (day.weekday() != holiday_weekday or worked_holiday) and rng.random() < attendance_rate:
+                        status = rng.choices(['present', 'half_day', 'absent'], weights=[80, 8, 12])[0]
+                        advance = rng.choice([100, 200, 500]) if rng.random() < 0.03 else 0
+                        # Marked some time during the working day
+                        marked_at = _at(day, 9) + timedelta(minutes=rng.randint(0, 9 * 60))
+                        batch.append((user_id, employee_id, day, status, None, advance, marked_at, marked_at))
+                        if len(batch) >= BATCH_SIZE:
+                            _insert_attendance(cur, batch)
+                            connection.commit()
+                            rows += len(batch)
+                            batch = []
+                    day += timedelta(days=1)
+            if batch:
+                _insert_attendance(cur, batch)
+                connection.commit()
+                rows += len(batch)
+
+            log(f'Tenant {tenant} ({email}): user_id={user_id}, {len(employees)} employees, {rows} attendance rows')
+            created.append({'user_id': user_id, 'email': email, 'employees': len(employees)})
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cur.close()
+
+    return created
+
+
+def _at(day, hour):
+    return datetime.combine(day, time(hour))
+
+
+def _insert_attendance(cur, batch):
+    cur.executemany("""
+        INSERT INTO attendance (user_id, employee_id, attendance_date, status, notes, advance,
+                                created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, batch)
+
+
+def drop_tenants(connection, log=print):
+    """Delete every benchmark tenant (cascades to their employees and attendance)"""
+    cur = connection.cursor()
+    try:
+        cur.execute("DELETE FROM users WHERE email LIKE %s", ('bench-tenant-%@example.com',))
+        connection.commit()
+        log(f'Removed {cur.rowcount} benchmark tenants')
+    finally:
+        cur.close()
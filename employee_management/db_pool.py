@@ -0,0 +1,278 @@
+"""Pooled MySQL connections
+
+Drop-in replacement for Flask-MySQLdb: ``mysql.connection`` still returns the
+request's connection, but it is borrowed from a per-process pool instead of
+opening a new TCP + auth handshake for every request, and handed back when
+the app context tears down. MYSQL_POOL_ENABLED=False goes back to one
+connection per app context (to measure what the pool buys, e.g. with
+``flask bench-routes --no-pool``).
+"""
+from collections import deque
+import os
+import threading
+import time
+
+from flask import g
+import MySQLdb
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the borrow timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of MySQLdb connections
+
+    - opens ``min_size`` connections up front with fill() - PooledMySQL runs
+      it in the background when it creates a process's pool - and never
+      closes idle ones below that; never more than ``max_size`` in total
+    - pings a connection on borrow when it has been idle longer than
+      ``ping_after`` seconds and replaces it if the ping fails
+    - closes idle connections older than ``max_idle`` seconds
+    """
+
+    def __init__(self, connect_kwargs, min_size=2, max_size=10, timeout=5.0, max_idle=300, ping_after=5.0):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+
+        self._idle = deque()  # (connection, returned_at)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+        self.stats = {
+            'created': 0,
+            'borrowed': 0,
+            'returned': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+        }
+
+    def _connect(self):
+        connection = MySQLdb.connect(**self.connect_kwargs)
+        with self._lock:
+            self.stats['created'] += 1
+        return connection
+
+    def borrow(self):
+        """Take a healthy connection from the pool, opening one if below max_size"""
+        deadline = time.monotonic() + self.timeout
+        waited_since = None
+
+        while True:
+            with self._lock:
+                self._expire_idle()
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    connection, returned_at = None, None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout(f'No MySQL connection available after {self.timeout}s')
+                    if waited_since is None:
+                        waited_since = time.monotonic()
+                        self.stats['waits'] += 1
+                    self._available.wait(remaining)
+                    continue
+
+                if waited_since is not None:
+                    self.stats['wait_seconds'] += time.monotonic() - waited_since
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+            elif time.monotonic() - returned_at > self.ping_after and not self._healthy(connection):
+                self._discard(connection)
+                continue
+
+            with self._lock:
+                self.stats['borrowed'] += 1
+            return connection
+
+    def give_back(self, connection, discard=False):
+        """Return a borrowed connection (rolled back) or discard it"""
+        if not discard:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._discard(connection)
+            return
+
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+            self.stats['returned'] += 1
+            self._available.notify()
+
+    def _healthy(self, connection):
+        try:
+            connection.ping()
+            return True
+        except Exception:
+            with self._lock:
+                self.stats['health_check_failures'] += 1
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self.stats['discarded'] += 1
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._lock:
+            self._size -= 1
+            self._available.notify()
+
+    def _expire_idle(self):
+        """Close idle connections past max_idle, keeping min_size open (lock held)"""
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.max_idle:
+            connection, _ = self._idle.popleft()
+            self._size -= 1
+            self.stats['discarded'] += 1
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def fill(self):
+        """Open connections until min_size are available"""
+        while True:
+            with self._lock:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                connection = self._connect()
+            except Exception:
+                self._release_slot()
+                raise
+            self.give_back(connection)
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                connection, _ = self._idle.popleft()
+                self._size -= 1
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self.stats)
+            metrics['size'] = self._size
+            metrics['idle'] = len(self._idle)
+            metrics['in_use'] = self._size - len(self._idle)
+            metrics['min_size'] = self.min_size
+            metrics['max_size'] = self.max_size
+        return metrics
+
+
+class PooledMySQL:
+    """Flask extension exposing ``.connection`` like Flask-MySQLdb, backed by ConnectionPool"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        # Optional callable wrapping each borrowed connection (e.g. SQL instrumentation)
+        self.connection_wrapper = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('MYSQL_CHARSET', 'utf8')
+        app.config.setdefault('MYSQL_CONNECT_TIMEOUT', 10)
+        app.config.setdefault('MYSQL_POOL_MIN_SIZE', 2)
+        app.config.setdefault('MYSQL_POOL_MAX_SIZE', 10)
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5.0)
+        app.config.setdefault('MYSQL_POOL_MAX_IDLE', 300)
+        app.config.setdefault('MYSQL_POOL_ENABLED', True)
+        app.teardown_appcontext(self.teardown)
+
+    def connect_kwargs(self):
+        config = self.app.config
+        return {
+            'host': config['MYSQL_HOST'],
+            'port': config['MYSQL_PORT'],
+            'user': config['MYSQL_USER'],
+            'passwd': config['MYSQL_PASSWORD'],
+            'db': config['MYSQL_DB'],
+            'charset': config['MYSQL_CHARSET'],
+            'connect_timeout': config['MYSQL_CONNECT_TIMEOUT'],
+            'use_unicode': True,
+        }
+
+    @property
+    def pool(self):
+        # Pools are per process - a forked worker must not reuse the parent's sockets
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    config = self.app.config
+                    self._pool = ConnectionPool(
+                        self.connect_kwargs(),
+                        min_size=config['MYSQL_POOL_MIN_SIZE'],
+                        max_size=config['MYSQL_POOL_MAX_SIZE'],
+                        timeout=config['MYSQL_POOL_TIMEOUT'],
+                        max_idle=config['MYSQL_POOL_MAX_IDLE'],
+                    )
+                    self._pool_pid = os.getpid()
+                    # Open min_size connections without making the first request wait for all of them
+                    threading.Thread(target=self._fill, args=(self._pool,), name='mysql-pool-fill',
+                                     daemon=True).start()
+        return self._pool
+
+    @staticmethod
+    def _fill(pool):
+        try:
+            pool.fill()
+        except Exception as e:
+            # Connections are still opened on demand by borrow()
+            print(f"MySQL pool fill error: {str(e)}")
+
+    @property
+    def connection(self):
+        """The connection borrowed for the current app context"""
+        if 'mysql_connection' not in g:
+            if self.app.config['MYSQL_POOL_ENABLED']:
+                connection = self.pool.borrow()
+            else:
+                connection = MySQLdb.connect(**self.connect_kwargs())
+            g.mysql_raw_connection = connection
+            g.mysql_connection = self.connection_wrapper(connection) if self.connection_wrapper else connection
+        return g.mysql_connection
+
+    def teardown(self, exception):
+        g.pop('mysql_connection', None)
+        connection = g.pop('mysql_raw_connection', None)
+        if connection is None:
+            return
+        if not self.app.config['MYSQL_POOL_ENABLED']:
+            connection.close()
+            return
+        # Connections that saw an error are not trusted to be reused
+        self.pool.give_back(connection, discard=exception is not None)
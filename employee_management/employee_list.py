@@ -0,0 +1,173 @@
+"""Employees list - keyset pagination, sorting and filtering in SQL
+
+Only one page of employees is ever fetched. Pages are addressed by an opaque
+cursor holding the sort key values of the row a page starts after (or ends
+before), so page N costs the same as page 1 - no OFFSET scan - and rows
+inserted meanwhile never shift the page boundaries. Every sort ends with
+``id`` as the tie-breaker, which makes the order total.
+
+The name and joining date sorts walk idx_employees_user_name /
+idx_employees_user_joining; the status sort (active first) has no index and
+sorts the tenant's rows, which stays cheap with LIMIT.
+
+The ``q`` filter is a subquery looking up the matching ids through the search
+indexes (employee_search.matching_ids_query - name, mobile, PAN), so the ids
+never leave MySQL.
+The stats above the list come from one COUNT query.
+"""
+import base64
+from datetime import date
+import json
+
+import employee_search
+
+# sort name -> ((SQL expression, result column, cursor value parser), ...) - id always last
+SORTS = {
+    'status': (('(e.leaving_date IS NOT NULL)', 'is_left', int), ('e.name', 'name', str), ('e.id', 'id', int)),
+    'name': (('e.name', 'name', str), ('e.id', 'id', int)),
+    'joining_date': (('e.joining_date', 'joining_date', date.fromisoformat), ('e.id', 'id', int)),
+}
+DEFAULT_SORT = 'status'
+STATUSES = ('active', 'left')
+
+COLUMNS = """
+    e.id, e.name, e.mobile_number, e.pan_number, e.date_of_birth,
+    e.profile_image, e.joining_date, e.leaving_date,
+    sc.per_day_salary, sc.monthly_salary, sc.salary_type,
+    (e.leaving_date IS NOT NULL) AS is_left
+"""
+
+
+class InvalidCursor(ValueError):
+    """Cursor that was not produced by this sort"""
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    keys = SORTS[sort]
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('wrong length')
+        return [parse(value) for (_, _, parse), value in zip(keys, values)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {str(e)}')
+
+
+def _cursor_values(sort, row):
+    return [row[column] for _, column, _ in SORTS[sort]]
+
+
+def _after(expressions, values, op):
+    """(a, b, c) > (x, y, z) spelled out so MySQL can use it as an index range"""
+    clauses = []
+    params = []
+    for i, expression in enumerate(expressions):
+        parts = [f'{prefix} = %s' for prefix in expressions[:i]] + [f'{expression} {op} %s']
+        clauses.append('(' + ' AND '.join(parts) + ')')
+        params.extend(values[:i + 1])
+    return '(' + ' OR '.join(clauses) + ')', params
+
+
+def _filters(user_id, status=None, q=None):
+    where = ['e.user_id = %s', 'e.deleted_at IS NULL']
+    params = [user_id]
+    if status == 'active':
+        where.append('e.leaving_date IS NULL')
+    elif status == 'left':
+        where.append('e.leaving_date IS NOT NULL')
+    if q:
+        matching = employee_search.matching_ids_query(user_id, employee_search.normalize(q))
+        if matching is None:
+            where.append('FALSE')
+        else:
+            sql, matching_params = matching
+            # A UNION straight inside IN () runs as a dependent subquery per row - the derived table is materialized once
+            where.append(f"e.id IN (SELECT id FROM ({sql}) AS m)")
+            params += matching_params
+    return where, params
+
+
+def load_page(cur, user_id, sort=DEFAULT_SORT, descending=False, status=None, q=None,
+              after=None, before=None, limit=50):
+    """One page of employee dicts plus the cursors of its neighbouring pages"""
+    keys = SORTS[sort]
+    expressions = [expression for expression, _, _ in keys]
+    where, params = _filters(user_id, status, q)
+
+    # Walking backwards: flip the order, then put the rows back the right way round
+    backwards = before is not None
+    cursor = before if backwards else after
+    if cursor is not None:
+        op = '<' if descending != backwards else '>'
+        clause, clause_params = _after(expressions, decode_cursor(cursor, sort), op)
+        where.append(clause)
+        params += clause_params
+
+    direction = 'DESC' if descending != backwards else 'ASC'
+    cur.execute(f"""
+        SELECT {COLUMNS}
+        FROM employees e
+        LEFT JOIN salary_config sc ON e.id = sc.employee_id
+        WHERE {' AND '.join(where)}
+        ORDER BY {', '.join(f'{expression} {direction}' for expression in expressions)}
+        LIMIT %s
+    """, params + [limit + 1])
+
+    columns = [col[0] for col in cur.description]
+    rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    has_next = cursor is not None if backwards else more
+    has_prev = more if backwards else cursor is not None
+    return {
+        'employees': rows,
+        'next_cursor': encode_cursor(_cursor_values(sort, rows[-1])) if rows and has_next else None,
+        'prev_cursor': encode_cursor(_cursor_values(sort, rows[0])) if rows and has_prev else None,
+    }
+
+
+def load_stats(cur, user_id):
+    """Total / active / inactive counts of the user's (non-deleted) employees"""
+    cur.execute("""
+        SELECT COUNT(*), COALESCE(SUM(leaving_date IS NULL), 0)
+        FROM employees
+        WHERE user_id = %s AND deleted_at IS NULL
+    """, (user_id,))
+    total, active = cur.fetchone()
+    return {'total_employees': int(total), 'active_employees': int(active),
+            'inactive_employees': int(total) - int(active)}
+
+
+def count_matching(cur, user_id, status=None, q=None):
+    where, params = _filters(user_id, status, q)
+    cur.execute(f"SELECT COUNT(*) FROM employees e WHERE {' AND '.join(where)}", params)
+    return int(cur.fetchone()[0])
+
+
+def to_json(row):
+    """API representation of a load_page() row"""
+    def day(value):
+        return value.strftime('%Y-%m-%d') if value else None
+
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'mobile_number': row['mobile_number'],
+        'pan_number': row['pan_number'],
+        'date_of_birth': day(row['date_of_birth']),
+        'profile_image': row['profile_image'],
+        'joining_date': day(row['joining_date']),
+        'leaving_date': day(row['leaving_date']),
+        'status': 'left' if row['leaving_date'] else 'active',
+        'salary_type': row['salary_type'] or 'per_day',
+        'per_day_salary': float(row['per_day_salary']) if row['per_day_salary'] is not None else None,
+        'monthly_salary': float(row['monthly_salary']) if row['monthly_salary'] is not None else None,
+    }
@@ -0,0 +1,161 @@
+"""Employee search by name, mobile number and PAN
+
+Backs /api/employees/search (the typeahead on the salary and report pages)
+and the ``q`` filter of the employees list. Each field is matched through an
+index:
+
+- name: an ngram FULLTEXT index (ft_employees_name) for matches anywhere in
+  the name, plus idx_employees_user_name for name prefixes - the ngram parser
+  ignores terms shorter than ngram_token_size (2), so one letter only matches
+  prefixes
+- mobile number / PAN: prefix matches on idx_employees_user_mobile and
+  idx_employees_user_pan
+
+All of them are scoped by ``user_id`` and ``deleted_at IS NULL``. The list
+filter (matching_ids_query) runs the same lookups as one UNION subquery - an
+OR across the fields in one WHERE could use none of these indexes.
+"""
+import re
+
+MAX_QUERY_LENGTH = 100
+NGRAM_TOKEN_SIZE = 2
+
+COLUMNS = "e.id, e.name, e.mobile_number, e.leaving_date"
+
+
+def normalize(q):
+    return ' '.join((q or '').split())[:MAX_QUERY_LENGTH]
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _like_prefix(value):
+    return _escape_like(value) + '%'
+
+
+def fulltext_query(q):
+    """Boolean-mode query requiring every word of q as an ngram phrase, or None"""
+    words = [word for word in re.findall(r'\w+', q) if len(word) >= NGRAM_TOKEN_SIZE]
+    if not words:
+        return None
+    return ' '.join(f'+"{word}"' for word in words)
+
+
+def _mobile_prefix(q):
+    digits = re.sub(r'[\s+()-]', '', q)
+    return digits if digits.isdigit() else None
+
+
+def _pan_prefix(q):
+    return q.upper() if q.isalnum() and len(q) >= 2 else None
+
+
+def _has_letters(q):
+    """Names are only searched for queries with a letter - digits alone mean a mobile number"""
+    return re.search(r'[^\W\d_]', q) is not None
+
+
+def matching_ids_query(user_id, q):
+    """(sql, params) selecting the ids of the user's employees matching q on any field, or None
+
+    The employees list filter, run inside the list's own statement. Names
+    match by prefix or FULLTEXT, PANs by prefix and mobile numbers anywhere,
+    as the list always matched them: that branch still only reads
+    idx_employees_user_mobile, which covers it.
+    """
+    scope = 'user_id = %s AND deleted_at IS NULL'
+    branches = []
+    params = []
+    if _has_letters(q):
+        branches.append(f"SELECT id FROM employees WHERE {scope} AND name LIKE %s")
+        params += [user_id, _like_prefix(q)]
+        boolean_query = fulltext_query(q)
+        if boolean_query:
+            branches.append(f"SELECT id FROM employees WHERE {scope} AND MATCH(name) AGAINST (%s IN BOOLEAN MODE)")
+            params += [user_id, boolean_query]
+    mobile = _mobile_prefix(q)
+    if mobile:
+        branches.append(f"SELECT id FROM employees WHERE {scope} AND mobile_number LIKE %s")
+        params += [user_id, '%' + _escape_like(mobile) + '%']
+    pan = _pan_prefix(q)
+    if pan:
+        branches.append(f"SELECT id FROM employees WHERE {scope} AND pan_number LIKE %s")
+        params += [user_id, _like_prefix(pan)]
+    if not branches:
+        return None  # Only punctuation
+
+    return ' UNION '.join(branches), params
+
+
+def search(cur, user_id, q, limit=10, status=None):
+    """Best matches for a typeahead: name prefixes, then names containing q, then mobile / PAN prefixes
+
+    One small query per index, each limited, merged in that order.
+    """
+    q = normalize(q)
+    if not q:
+        return []
+
+    scope = 'e.user_id = %s AND e.deleted_at IS NULL'
+    if status == 'active':
+        scope += ' AND e.leaving_date IS NULL'
+    elif status == 'left':
+        scope += ' AND e.leaving_date IS NOT NULL'
+
+    queries = []
+    if _has_letters(q):
+        queries.append((f"SELECT {COLUMNS} FROM employees e WHERE {scope} AND e.name LIKE %s ORDER BY e.name, e.id LIMIT %s",
+                        [user_id, _like_prefix(q), limit]))
+        boolean_query = fulltext_query(q)
+        if boolean_query:
+            queries.append((f"""
+                SELECT {COLUMNS} FROM employees e
+                WHERE {scope} AND MATCH(e.name) AGAINST (%s IN BOOLEAN MODE)
+                ORDER BY MATCH(e.name) AGAINST (%s IN BOOLEAN MODE) DESC, e.name, e.id
+                LIMIT %s
+            """, [user_id, boolean_query, boolean_query, limit]))
+    mobile = _mobile_prefix(q)
+    if mobile:
+        queries.append((f"SELECT {COLUMNS} FROM employees e WHERE {scope} AND e.mobile_number LIKE %s ORDER BY e.mobile_number, e.id LIMIT %s",
+                        [user_id, _like_prefix(mobile), limit]))
+    pan = _pan_prefix(q)
+    if pan:
+        queries.append((f"SELECT {COLUMNS} FROM employees e WHERE {scope} AND e.pan_number LIKE %s ORDER BY e.pan_number, e.id LIMIT %s",
+                        [user_id, _like_prefix(pan), limit]))
+
+    results = []
+    seen = set()
+    for sql, params in queries:
+        cur.execute(sql, params)
+        for emp_id, name, mobile_number, leaving_date in cur.fetchall():
+            if emp_id not in seen:
+                seen.add(emp_id)
+                results.append({
+                    'id': emp_id,
+                    'name': name,
+                    'mobile_number': mobile_number,
+                    'status': 'left' if leaving_date else 'active',
+                })
+        if len(results) >= limit:
+            break
+    return results[:limit]
+
+
+def get_employee(cur, user_id, employee_id):
+    """(id, name, leaving_date) of one of the user's employees, or None - to prefill a typeahead"""
+    try:
+        employee_id = int(employee_id)
+    except (TypeError, ValueError):
+        return None
+    cur.execute("""
+        SELECT id, name, leaving_date FROM employees
+        WHERE id = %s AND user_id = %s AND deleted_at IS NULL
+    """, (employee_id, user_id))
+    return cur.fetchone()
+
+
+def has_employees(cur, user_id):
+    cur.execute("SELECT EXISTS(SELECT 1 FROM employees WHERE user_id = %s AND deleted_at IS NULL)", (user_id,))
+    return bool(cur.fetchone()[0])
@@ -0,0 +1,188 @@
+"""Profile photo pipeline
+
+The request only validates the upload and stores the untouched original as
+``<content hash>.<ext>`` - identical uploads therefore share one file and are
+processed once. A background ImageProcessor then writes every size in
+VARIANT_SIZES as WebP plus a JPEG/PNG fallback (``<hash>-<width>.webp`` /
+``<hash>-<width>.jpg``) and finally ``<hash>.json``, the manifest templates
+read to build ``srcset``. Until the manifest exists pages show the original.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+
+from PIL import Image, ImageOps
+
+# Widths in pixels: list thumbnail, form preview, full
+VARIANT_SIZES = {'thumb': 96, 'preview': 300, 'full': 800}
+
+HASHED_NAME = re.compile(r'^([0-9a-f]{32})\.(jpg|jpeg|png|gif)$')
+# Size variants and manifest written by process()
+DERIVED_NAME = re.compile(r'^([0-9a-f]{32})(?:-\d+\.(?:webp|jpg|png)|\.json)$')
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif'}
+
+
+class InvalidImage(Exception):
+    """Upload is not an image Pillow can read"""
+
+
+def store_upload(upload_folder, data):
+    """Validate an upload and store it by content hash; returns the profile_image name"""
+    try:
+        image = Image.open(io.BytesIO(data))
+        image_format = image.format
+        image.verify()  # Reads the headers and structure without decoding pixels
+    except Exception as e:
+        raise InvalidImage(str(e))
+    if image_format not in EXTENSIONS:
+        raise InvalidImage(f'Unsupported image format {image_format}')
+
+    name = f"{hashlib.sha256(data).hexdigest()[:32]}.{EXTENSIONS[image_format]}"
+    path = os.path.join(upload_folder, name)
+    try:
+        # Reusing an existing file: refresh its mtime so the upload GC's grace period applies
+        os.utime(path)
+    except FileNotFoundError:
+        os.makedirs(upload_folder, exist_ok=True)
+        _write_atomic(path, data)
+    return name
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def manifest_path(upload_folder, name):
+    match = HASHED_NAME.match(name or '')
+    return os.path.join(upload_folder, f'{match.group(1)}.json') if match else None
+
+
+def variant_names(name):
+    """Every file derived from a hashed original (used by the upload GC)"""
+    match = HASHED_NAME.match(name or '')
+    if not match:
+        return []
+    digest = match.group(1)
+    names = [f'{digest}.json']
+    for width in VARIANT_SIZES.values():
+        names += [f'{digest}-{width}.webp', f'{digest}-{width}.jpg', f'{digest}-{width}.png']
+    return names
+
+
+def process(upload_folder, name):
+    """Write all variants and the manifest of one stored original"""
+    manifest_file = manifest_path(upload_folder, name)
+    if manifest_file is None or os.path.exists(manifest_file):
+        return  # Legacy name or already processed (duplicate upload)
+
+    digest = HASHED_NAME.match(name).group(1)
+    with Image.open(os.path.join(upload_folder, name)) as original:
+        if original.format == 'JPEG':
+            # Let libjpeg decode at a reduced scale - no need for every pixel of a camera photo
+            largest = max(VARIANT_SIZES.values())
+            original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    fallback_format, fallback_ext = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+    manifest = {'webp': {}, 'fallback': {}}
+    for kind, width in VARIANT_SIZES.items():
+        if kind == 'thumb':
+            # Avatars are shown cropped square - crop before encoding, not in the browser
+            side = min(width, image.width, image.height)
+            resized = ImageOps.fit(image, (side, side), Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, width), Image.LANCZOS)
+
+        for image_format, ext, options, bucket in (
+            ('WEBP', 'webp', {'quality': 80, 'method': 4}, 'webp'),
+            (fallback_format, fallback_ext, {'optimize': True, 'quality': 85, 'progressive': True}
+             if fallback_format == 'JPEG' else {'optimize': True}, 'fallback'),
+        ):
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, **options)
+            variant = f'{digest}-{width}.{ext}'
+            _write_atomic(os.path.join(upload_folder, variant), buffer.getvalue())
+            manifest[bucket][str(resized.width)] = variant
+
+    # Written last - its presence means every variant is in place
+    _write_atomic(manifest_file, json.dumps(manifest).encode('utf-8'))
+
+
+_manifests = {}
+
+
+def load_manifest(upload_folder, name):
+    """Manifest of a processed image, or None while it is pending / for legacy names"""
+    if name in _manifests:
+        return _manifests[name]
+    path = manifest_path(upload_folder, name)
+    if path is None:
+        return None
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None  # Not processed yet - check again next time
+    if len(_manifests) > 10000:
+        _manifests.clear()
+    _manifests[name] = manifest
+    return manifest
+
+
+def sources(upload_folder, name, display_px, url_for_upload):
+    """src / srcset / webp_srcset for showing ``name`` at display_px CSS pixels"""
+    manifest = load_manifest(upload_folder, name)
+    if manifest is None:
+        return {'src': url_for_upload(name), 'srcset': None, 'webp_srcset': None}
+
+    def srcset(bucket):
+        return ', '.join(f'{url_for_upload(variant)} {width}w'
+                         for width, variant in sorted(manifest[bucket].items(), key=lambda item: int(item[0])))
+
+    # Plain src (no srcset support): smallest variant sharp on a 2x screen
+    widths = sorted(manifest['fallback'], key=int)
+    src_width = next((width for width in widths if int(width) >= display_px * 2), widths[-1])
+    return {
+        'src': url_for_upload(manifest['fallback'][src_width]),
+        'srcset': srcset('fallback'),
+        'webp_srcset': srcset('webp'),
+    }
+
+
+class ImageProcessor:
+    """Per-process background pool running process()"""
+
+    def __init__(self, upload_folder, workers=2):
+        self.upload_folder = upload_folder
+        self.workers = workers
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Threads do not survive a fork - each worker process gets its own pool
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='images')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def submit(self, name):
+        return self._get_executor().submit(self._process, name)
+
+    def _process(self, name):
+        try:
+            process(self.upload_folder, name)
+        except Exception as e:
+            print(f"Image processing error for {name}: {str(e)}")
@@ -0,0 +1,260 @@
+"""Live updates for open dashboard and attendance pages (Server-Sent Events)
+
+Every committed attendance write publishes one small event to the tenant's
+channel: the changed rows, the day summaries of the dates it touched, present
+today / salary this month when they moved and the new recent-activity
+entries. /events streams the channel to the browser, which patches the page in
+place instead of reloading it.
+
+Brokers:
+
+- LocalBroker: in-process queues - only pages streaming from the same worker
+  process see the event (fine for a single process)
+- RedisBroker: events go through a redis channel per tenant and a listener
+  thread in every process hands them to its own subscribers
+
+A subscriber whose queue overflows (a stalled client) gets a ``resync`` event
+and is disconnected; the page then reloads itself. Streams also end after
+LIVE_UPDATES_STREAM_SECONDS so that connections do not pin a worker forever -
+EventSource reconnects on its own.
+"""
+import json
+import queue
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # Optional - only needed for the shared broker
+    redis = None
+
+
+class TooManyClients(Exception):
+    """The process already streams to LIVE_UPDATES_MAX_CLIENTS pages"""
+
+
+class Subscription:
+    """One open stream: a bounded queue of serialized events"""
+
+    def __init__(self, broker, user_id, max_pending):
+        self.broker = broker
+        self.user_id = user_id
+        self.overflowed = False
+        self._queue = queue.Queue(max_pending)
+
+    def put(self, payload):
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next event, or None after timeout seconds without one"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process pub/sub between the request that writes and the streams of this process"""
+
+    def __init__(self, max_clients=100, max_pending=50):
+        self.max_clients = max_clients
+        self.max_pending = max_pending
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        with self._lock:
+            if self._count >= self.max_clients:
+                raise TooManyClients()
+            subscription = Subscription(self, user_id, self.max_pending)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        """Whether publishing for user_id can reach anyone - lets writers skip building the event"""
+        return user_id in self._subscribers
+
+    def publish(self, user_id, event):
+        self.deliver(user_id, json.dumps(event, separators=(',', ':')))
+
+    def deliver(self, user_id, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.put(payload)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': type(self).__name__, 'clients': self._count, 'tenants': len(self._subscribers)}
+
+
+class RedisBroker(LocalBroker):
+    """Shared broker so a write in one worker process reaches pages streaming from the others"""
+
+    def __init__(self, url, prefix='live:', **kwargs):
+        if redis is None:
+            raise RuntimeError('LIVE_UPDATES_BACKEND=redis requires the redis package')
+        super().__init__(**kwargs)
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        self.ensure_listening()
+        return super().subscribe(user_id)
+
+    def has_subscribers(self, user_id):
+        # Other processes may have streams open for this tenant
+        return True
+
+    def publish(self, user_id, event):
+        self.client.publish(f"{self.prefix}{user_id}", json.dumps(event, separators=(',', ':')))
+
+    def ensure_listening(self):
+        with self._thread_lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='live-updates', daemon=True)
+                self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + '*')
+                for message in pubsub.listen():
+                    channel = message['channel'].decode()
+                    payload = message['data'].decode()
+                    self.deliver(int(channel[len(self.prefix):]), payload)
+            except Exception as e:
+                print(f"Live updates listener error: {str(e)}")
+                time.sleep(1)
+
+
+def create_broker(config):
+    """Build the broker selected by LIVE_UPDATES_BACKEND"""
+    options = {'max_clients': config['LIVE_UPDATES_MAX_CLIENTS'],
+               'max_pending': config['LIVE_UPDATES_MAX_PENDING']}
+    if config['LIVE_UPDATES_BACKEND'] == 'redis':
+        return RedisBroker(config['LIVE_UPDATES_URL'], **options)
+    return LocalBroker(**options)
+
+
+def stream(subscription, heartbeat=15, lifetime=300, retry_ms=3000):
+    """SSE body for one subscription - unsubscribes when the stream ends or the client goes away"""
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        deadline = time.monotonic() + lifetime
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            payload = subscription.get(min(heartbeat, remaining))
+            if subscription.overflowed:
+                yield "event: resync\ndata: {}\n\n"
+                return
+            if payload is None:
+                # Comment line - keeps proxies from timing out the idle connection
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: attendance\ndata: {payload}\n\n"
+    finally:
+        subscription.close()
+
+
+def attendance_event(cur, user_id, changes, today, max_rows=500):
+    """Delta for committed attendance writes - ``changes`` is a list of (employee_id, date)
+
+    Rows missing from attendance were deleted and are sent as ``not_marked``.
+    Batches over max_rows send no rows and ``truncated`` instead; pages resync.
+    """
+    keys = {(int(employee_id), str(attendance_date)[:10]) for employee_id, attendance_date in changes}
+    dates = sorted({attendance_date for _, attendance_date in keys})
+    event = {'today': today.isoformat(), 'dates': {}, 'rows': [], 'activity': [], 'truncated': len(keys) > max_rows}
+
+    # Day summaries as the attendance page shows them, plus present today as the dashboard counts it
+    cur.execute(f"""
+        SELECT a.attendance_date,
+               COUNT(DISTINCT a.employee_id),
+               COUNT(CASE WHEN a.status = 'present' THEN 1 END),
+               COUNT(CASE WHEN a.status = 'half_day' THEN 1 END),
+               COUNT(CASE WHEN a.status = 'absent' THEN 1 END),
+               COUNT(DISTINCT CASE WHEN a.status IN ('present', 'half_day') AND e.leaving_date IS NULL
+                                   THEN a.employee_id END)
+        FROM attendance a
+        JOIN employees e ON a.employee_id = e.id
+        WHERE a.user_id = %s AND e.deleted_at IS NULL
+          AND a.attendance_date IN ({', '.join(['%s'] * len(dates))})
+        GROUP BY a.attendance_date
+    """, [user_id] + dates)
+    for attendance_date in dates:
+        event['dates'][attendance_date] = {'marked': 0, 'present': 0, 'half_day': 0, 'absent': 0}
+    present_today = 0
+    for attendance_date, marked, present, half_day, absent, present_active in cur.fetchall():
+        event['dates'][attendance_date.strftime('%Y-%m-%d')] = {
+            'marked': marked, 'present': present, 'half_day': half_day, 'absent': absent
+        }
+        if attendance_date == today:
+            present_today = present_active
+    if today.isoformat() in event['dates']:
+        event['present_today'] = present_today
+
+    month = today.strftime('%Y-%m')
+    if any(attendance_date.startswith(month) for attendance_date in dates):
+        cur.execute("SELECT total FROM month_salary_total WHERE user_id = %s AND month = %s", (user_id, month))
+        row = cur.fetchone()
+        if row is not None:
+            event['month_salary'] = float(row[0])
+
+    if event['truncated']:
+        return event
+
+    conditions = ' OR '.join(['(a.employee_id = %s AND a.attendance_date = %s)'] * len(keys))
+    cur.execute(f"""
+        SELECT a.employee_id, a.attendance_date, a.status, a.notes, a.advance, a.updated_at, e.name, e.leaving_date
+        FROM attendance a
+        JOIN employees e ON a.employee_id = e.id
+        WHERE a.user_id = %s AND ({conditions})
+    """, [user_id] + [value for key in sorted(keys) for value in key])
+    found = {}
+    for employee_id, attendance_date, status, notes, advance, updated_at, name, leaving_date in cur.fetchall():
+        found[(employee_id, attendance_date.strftime('%Y-%m-%d'))] = (status, notes, advance, updated_at, name, leaving_date)
+
+    activity = []
+    for employee_id, attendance_date in sorted(keys):
+        status, notes, advance, updated_at, name, leaving_date = found.get(
+            (employee_id, attendance_date), ('not_marked', '', 0, None, None, None))
+        event['rows'].append({'employee_id': employee_id, 'date': attendance_date, 'status': status,
+                              'notes': notes or '', 'advance': float(advance or 0)})
+        if updated_at is not None and leaving_date is None:
+            activity.append((updated_at, employee_id, attendance_date, status, name))
+
+    # Newest first, like the dashboard's recent activity (it keeps the latest five)
+    activity.sort(reverse=True)
+    for updated_at, employee_id, attendance_date, status, name in activity[:5]:
+        event['activity'].append({
+            'key': f"{employee_id}:{attendance_date}",
+            'name': name,
+            'status': status,
+            'time': updated_at.strftime('%H:%M'),
+            'day': time.strftime('%b %d', time.strptime(attendance_date, '%Y-%m-%d')),
+        })
+    return event
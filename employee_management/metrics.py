@@ -0,0 +1,290 @@
+"""Prometheus-style metrics
+
+Fixed-bucket histograms and gauges kept in process memory and rendered in
+the Prometheus text exposition format by ``/metrics``. Memory is bounded by
+the bucket count times the number of label combinations (endpoints, status
+codes), never by traffic.
+
+Threaded workers share one registry behind a lock. With forked workers each
+process starts from zero after the fork and, when ``METRICS_MULTIPROC_DIR``
+is set, periodically writes its values to ``<dir>/metrics_<pid>.json``;
+``/metrics`` then merges every process's file so any worker can be scraped.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import g, request
+
+# Seconds - tuned for page requests (5ms .. 10s)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# bcrypt at cost 10-14 takes ~50ms-1s
+BCRYPT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# SMTP round trips
+EMAIL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Registry:
+    """All metrics of this process; values are reset in a forked child"""
+
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def check_fork(self):
+        """Drop values inherited from the parent process (lock held)"""
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            for metric in self.metrics:
+                metric.series.clear()
+
+    def snapshot(self):
+        with self.lock:
+            self.check_fork()
+            return {
+                'pid': self.pid,
+                'metrics': {metric.name: metric.dump() for metric in self.metrics}
+            }
+
+
+REGISTRY = Registry()
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram with labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self.registry = registry
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            self.registry.check_fork()
+            values = self.series.get(key)
+            if values is None:
+                values = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            values[index] += 1
+            values[-1] += value
+
+    def dump(self):
+        return [[list(key), list(values)] for key, values in self.series.items()]
+
+
+class Gauge:
+    """Value that goes up and down (e.g. requests in flight)"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.series = {}  # label values -> value
+        self.registry = registry
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self.registry.lock:
+            self.registry.check_fork()
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def dump(self):
+        return [[list(key), value] for key, value in self.series.items()]
+
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Request latency by endpoint and status code',
+                            labels=('endpoint', 'method', 'status'))
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests currently being handled', labels=('endpoint',))
+DB_SECONDS = Histogram('db_time_per_request_seconds', 'Time spent in SQL statements per request',
+                       labels=('endpoint',))
+BCRYPT_SECONDS = Histogram('bcrypt_duration_seconds', 'Password hash / verify time',
+                           labels=('operation',), buckets=BCRYPT_BUCKETS)
+EMAIL_SECONDS = Histogram('email_send_duration_seconds', 'SMTP send time', labels=('result',),
+                          buckets=EMAIL_BUCKETS)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the with-block"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def merge(snapshots, registry=REGISTRY):
+    """Sum histogram series over processes; gauges only count processes still alive"""
+    merged = {metric.name: {} for metric in registry.metrics}
+    for snapshot in snapshots:
+        alive = _pid_alive(snapshot['pid'])
+        for metric in registry.metrics:
+            series = merged[metric.name]
+            for key, values in snapshot['metrics'].get(metric.name, []):
+                key = tuple(key)
+                if metric.kind == 'gauge':
+                    if alive:
+                        series[key] = series.get(key, 0) + values
+                elif key in series:
+                    series[key] = [a + b for a, b in zip(series[key], values)]
+                else:
+                    series[key] = list(values)
+    return merged
+
+
+def render(merged, registry=REGISTRY):
+    """Text exposition format (version 0.0.4)"""
+    lines = []
+    for metric in registry.metrics:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for key, values in sorted(merged[metric.name].items()):
+            if metric.kind == 'gauge':
+                lines.append(f'{metric.name}{_format_labels(metric.labels, key)} {_format_number(values)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                labels = _format_labels(metric.labels, key, ('le', _format_number(float(bound))))
+                lines.append(f'{metric.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(metric.labels, key)
+            lines.append(f'{metric.name}_sum{labels} {_format_number(values[-1])}')
+            lines.append(f'{metric.name}_count{labels} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class MultiprocessStore:
+    """Per-process JSON files so /metrics can report every forked worker"""
+
+    def __init__(self, directory, flush_interval=5.0, registry=REGISTRY):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.registry = registry
+        self._last_flush = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        snapshot = self.registry.snapshot()
+        path = os.path.join(self.directory, f"metrics_{snapshot['pid']}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)  # atomic - readers never see half a file
+
+    def collect(self):
+        """Snapshots of every process, this one read live"""
+        own = self.registry.snapshot()
+        snapshots = [own]
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot['pid'] != own['pid']:
+                snapshots.append(snapshot)
+        return snapshots
+
+
+def init_app(app):
+    """Register request hooks; returns a callable producing the /metrics body"""
+    app.config.setdefault('METRICS_MULTIPROC_DIR', None)
+    app.config.setdefault('METRICS_FLUSH_INTERVAL', 5.0)
+
+    store = None
+    if app.config['METRICS_MULTIPROC_DIR']:
+        store = MultiprocessStore(app.config['METRICS_MULTIPROC_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_endpoint = request.endpoint or 'unmatched'
+        REQUESTS_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    # Teardown runs after every after_request hook (so the SQL summary exists)
+    # and also when the view raised
+    @app.teardown_request
+    def finish_request_metrics(exception):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        endpoint = g.pop('metrics_endpoint')
+        status = g.pop('metrics_status', 500)
+        REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method, status=status)
+        summary = g.get('sql_summary')
+        if summary is not None:
+            DB_SECONDS.observe(summary['sql_ms'] / 1000.0, endpoint=endpoint)
+        if store is not None:
+            try:
+                store.maybe_flush()
+            except OSError as e:
+                print(f"Metrics flush error: {str(e)}")
+
+    def exposition():
+        snapshots = store.collect() if store is not None else [REGISTRY.snapshot()]
+        return render(merge(snapshots))
+
+    return exposition
@@ -0,0 +1,251 @@
+"""Email outbox
+
+Requests only insert a row into ``email_outbox`` (enqueue) and return. A
+background OutboxSender claims due rows in batches, delivers them over one
+SMTP connection that is kept open between batches, and reschedules failures
+with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS is reached.
+
+Claiming uses ``FOR UPDATE SKIP LOCKED`` plus a lease on ``next_attempt_at``,
+so several worker processes can run senders against the same table and a row
+left in 'sending' by a crashed process is picked up again once its lease ends.
+Delivery is therefore at-least-once: a message sent just before a crash is
+sent again.
+"""
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+import json
+import smtplib
+import threading
+import time
+
+import metrics
+
+
+def enqueue(cur, msg):
+    """Insert a Flask-Mail Message into the outbox (commit with the caller's transaction)"""
+    sender = msg.sender if isinstance(msg.sender, str) else '{} <{}>'.format(*msg.sender)
+    cur.execute("""
+        INSERT INTO email_outbox (sender, recipients, subject, body, html)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (sender, json.dumps(list(msg.recipients)), msg.subject, msg.body, msg.html))
+    return cur.lastrowid
+
+
+def build_message(sender, recipients, subject, body, html):
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = ', '.join(recipients)
+    message['Subject'] = subject
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid()
+    message.set_content(body or '')
+    if html:
+        message.add_alternative(html, subtype='html')
+    return message
+
+
+def backoff_seconds(attempts, base=30, maximum=3600):
+    """Delay before retry number ``attempts`` (30s, 60s, 120s ... capped)"""
+    return min(maximum, base * 2 ** max(0, attempts - 1))
+
+
+class SMTPConnection:
+    """One SMTP session reused across batches, reopened when it drops or idles out"""
+
+    def __init__(self, host, port, use_tls=False, use_ssl=False, username=None, password=None,
+                 timeout=30, max_idle=60):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._smtp = None
+        self._last_used = 0.0
+
+    def _open(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def _alive(self):
+        try:
+            return self._smtp.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def send(self, message, sender, recipients):
+        if self._smtp is not None and not self._alive():
+            self.close()
+        if self._smtp is None:
+            self._smtp = self._open()
+        try:
+            self._smtp.send_message(message, from_addr=sender, to_addrs=recipients)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Dropped between the NOOP and the send - reconnect once
+            self.close()
+            self._smtp = self._open()
+            self._smtp.send_message(message, from_addr=sender, to_addrs=recipients)
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.max_idle:
+            self.close()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+def claim_batch(connection, batch_size, lease_seconds):
+    """Lease up to batch_size due rows to this sender and return them"""
+    cur = connection.cursor()
+    try:
+        cur.execute("""
+            SELECT id, sender, recipients, subject, body, html, attempts
+            FROM email_outbox
+            WHERE status IN ('pending', 'sending') AND next_attempt_at <= NOW()
+            ORDER BY next_attempt_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (batch_size,))
+        rows = cur.fetchall()
+        if rows:
+            ids = [row[0] for row in rows]
+            placeholders = ', '.join(['%s'] * len(ids))
+            cur.execute(f"""
+                UPDATE email_outbox
+                SET status = 'sending', next_attempt_at = NOW() + INTERVAL %s SECOND
+                WHERE id IN ({placeholders})
+            """, [lease_seconds] + ids)
+        connection.commit()
+        return rows
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def send_batch(connection, smtp, batch_size=50, max_attempts=5, lease_seconds=300, log=print):
+    """Deliver one batch of due messages; returns (sent, failed) counts"""
+    rows = claim_batch(connection, batch_size, lease_seconds)
+    sent = failed = 0
+    cur = connection.cursor()
+    try:
+        for outbox_id, sender, recipients, subject, body, html, attempts in rows:
+            recipients = json.loads(recipients)
+            started = time.perf_counter()
+            try:
+                smtp.send(build_message(sender, recipients, subject, body, html), sender, recipients)
+            except Exception as e:
+                metrics.EMAIL_SECONDS.observe(time.perf_counter() - started, result='error')
+                attempts += 1
+                failed += 1
+                if attempts >= max_attempts:
+                    cur.execute("""
+                        UPDATE email_outbox SET status = 'failed', attempts = %s, last_error = %s
+                        WHERE id = %s
+                    """, (attempts, str(e)[:1000], outbox_id))
+                    log(f"Email {outbox_id} to {recipients} failed permanently: {str(e)}")
+                else:
+                    cur.execute("""
+                        UPDATE email_outbox
+                        SET status = 'pending', attempts = %s, last_error = %s,
+                            next_attempt_at = NOW() + INTERVAL %s SECOND
+                        WHERE id = %s
+                    """, (attempts, str(e)[:1000], backoff_seconds(attempts), outbox_id))
+                    log(f"Email {outbox_id} failed (attempt {attempts}), retrying: {str(e)}")
+            else:
+                metrics.EMAIL_SECONDS.observe(time.perf_counter() - started, result='sent')
+                sent += 1
+                cur.execute("""
+                    UPDATE email_outbox SET status = 'sent', attempts = attempts + 1, sent_at = NOW(), last_error = NULL
+                    WHERE id = %s
+                """, (outbox_id,))
+            # Commit per message so a crash re-sends at most the message in flight. Delivery is
+            # at-least-once: a crash between send and commit sends it again once the lease ends
+            connection.commit()
+    finally:
+        cur.close()
+    return sent, failed
+
+
+def smtp_from_config(config):
+    def flag(value):
+        return str(value).lower() in ('true', '1', 'yes')
+
+    return SMTPConnection(config['MAIL_SERVER'], int(config['MAIL_PORT']),
+                          use_tls=flag(config.get('MAIL_USE_TLS', False)),
+                          use_ssl=flag(config.get('MAIL_USE_SSL', False)),
+                          username=config.get('MAIL_USERNAME'),
+                          password=config.get('MAIL_PASSWORD'),
+                          max_idle=config['EMAIL_OUTBOX_SMTP_MAX_IDLE'])
+
+
+class OutboxSender:
+    """Background thread draining the outbox; one per worker process"""
+
+    def __init__(self, app, mysql):
+        self.app = app
+        self.mysql = mysql
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def notify(self):
+        """Start the sender if needed and make it poll now"""
+        self.ensure_started()
+        self._wake.set()
+
+    def ensure_started(self):
+        with self._lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        config = self.app.config
+        smtp = smtp_from_config(config)
+        while True:
+            self._wake.wait(config['EMAIL_OUTBOX_POLL_INTERVAL'])
+            self._wake.clear()
+            try:
+                self.drain(smtp)
+            except Exception as e:
+                print(f"Email outbox error: {str(e)}")
+                smtp.close()
+            smtp.close_if_idle()
+
+    def drain(self, smtp):
+        """Send batches until nothing is due"""
+        config = self.app.config
+        pool = self.mysql.pool  # the current process's pool
+        connection = pool.borrow()
+        discard = False
+        try:
+            while True:
+                sent, failed = send_batch(connection, smtp,
+                                          batch_size=config['EMAIL_OUTBOX_BATCH_SIZE'],
+                                          max_attempts=config['EMAIL_OUTBOX_MAX_ATTEMPTS'],
+                                          lease_seconds=config['EMAIL_OUTBOX_LEASE_SECONDS'])
+                if sent + failed < config['EMAIL_OUTBOX_BATCH_SIZE']:
+                    break
+        except Exception:
+            discard = True
+            raise
+        finally:
+            pool.give_back(connection, discard=discard)
@@ -0,0 +1,121 @@
+"""Password hashing off the request threads
+
+bcrypt is deliberately CPU-heavy. Hashes run on a small shared thread pool
+(bcrypt releases the GIL while hashing) so at most ``workers`` of them burn CPU
+at once, however many logins arrive together - other requests keep being
+served. When more than ``max_pending`` hashes are already queued, new ones are
+refused with HasherBusy instead of piling up.
+
+Login attempts are also throttled per client IP and per email with token
+buckets (see RateLimiter).
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import os
+import threading
+import time
+
+import bcrypt
+
+import metrics
+
+
+class HasherBusy(Exception):
+    """Too many password hashes are already queued"""
+
+
+class PasswordHasher:
+    """Bounded executor for bcrypt hash/verify with a configurable cost"""
+
+    def __init__(self, rounds=12, workers=2, max_pending=32, timeout=10.0):
+        self.rounds = rounds
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Threads do not survive a fork - each worker process gets its own pool
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _run(self, operation, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Password hashing queue is full')
+        try:
+            future = self._get_executor().submit(self._timed, operation, func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the hash finishes, even if the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherBusy(f'Password hash did not finish within {self.timeout}s')
+
+    @staticmethod
+    def _timed(operation, func, *args):
+        with metrics.timed(metrics.BCRYPT_SECONDS, operation=operation):
+            return func(*args)
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run('hash', bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, password, hashed):
+        return self._run('check', bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """True when a stored hash was made with a different cost than configured"""
+        return hash_rounds(hashed) != self.rounds
+
+
+def hash_rounds(hashed):
+    """Cost factor of a '$2b$12$...' hash (None if unparseable)"""
+    parts = hashed.split('$')
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token buckets per key: ``burst`` attempts at once, refilled at ``per_minute``"""
+
+    def __init__(self, burst, per_minute, max_keys=10000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Take one token for key; False when its bucket is empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return allowed
+
+    def _prune(self, now):
+        """Forget buckets that have refilled completely (lock held)"""
+        full_after = self.burst / self.rate if self.rate else float('inf')
+        for key, (_, updated_at) in list(self._buckets.items()):
+            if now - updated_at >= full_after:
+                del self._buckets[key]
+        # Still too many live keys (e.g. a spray of IPs) - drop the oldest half
+        if len(self._buckets) > self.max_keys:
+            oldest = sorted(self._buckets.items(), key=lambda item: item[1][1])
+            for key, _ in oldest[:len(oldest) // 2]:
+                del self._buckets[key]
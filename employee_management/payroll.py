@@ -0,0 +1,614 @@
+"""Monthly payroll engine
+
+Computes the same ``salary_data`` structure the /salary page renders, but for
+many employees at once. Attendance is loaded into (employee x day) NumPy
+matrices and every rule of the original day-by-day loop (leaving date, weekly
+holiday, worked holidays, advances, monthly vs daily rate) is applied as an
+array operation.
+
+Computed months are materialized in the ``payroll_snapshot`` table and served
+from there until an attendance or salary config write marks them stale. Every
+invalidation bumps the row's generation, and a snapshot is only stored over
+the generation it read, so a write that lands while a month is being computed
+is never overwritten by the older result.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+import calendar
+import json
+import multiprocessing
+import threading
+
+import numpy as np
+
+# Attendance status <-> small integer code used in the matrices
+UNMARKED = 0
+PRESENT = 1
+HALF_DAY = 2
+ABSENT = 3
+
+STATUS_CODES = {'present': PRESENT, 'half_day': HALF_DAY, 'absent': ABSENT}
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Day kinds - a leaving date takes precedence over a weekly holiday
+REGULAR_DAY = 0
+HOLIDAY = 1
+LEAVING_DAY = 2
+
+# Status label shown on the salary page, indexed by [day kind][status code]
+DAY_STATUS_LABELS = np.array([
+    ['unmarked', 'present', 'half_day', 'absent'],
+    ['weekly_holiday', 'worked_holiday_present', 'worked_holiday_half', 'worked_holiday_absent'],
+    ['unmarked_left', 'present_left', 'half_day_left', 'absent_left'],
+], dtype=object)
+
+# Rows per INSERT when writing payroll snapshots
+SNAPSHOT_BATCH_SIZE = 200
+
+# Defaults used when an employee has no salary_config row
+DEFAULT_SALARY_CONFIG = {
+    'per_day_salary': 350.00,
+    'working_days_per_week': 6,
+    'holiday_day': 'friday',
+    'salary_type': 'per_day',
+    'monthly_salary': 0,
+}
+
+
+def month_bounds(month):
+    """Return (first_day, last_day) dates for a 'YYYY-MM' month string"""
+    year, month_num = map(int, month.split('-'))
+    days_in_month = calendar.monthrange(year, month_num)[1]
+    return date(year, month_num, 1), date(year, month_num, days_in_month)
+
+
+def month_range(month):
+    """Return (first_day, next_month_first_day) for a 'YYYY-MM' month string
+
+    Filter with ``attendance_date >= first_day AND attendance_date < next_month``
+    so MySQL can range-scan the (user_id|employee_id, attendance_date) indexes.
+    """
+    first_day, last_day = month_bounds(month)
+    return first_day, last_day + timedelta(days=1)
+
+
+def normalize_employee(row):
+    """Fill salary_config defaults and convert amounts to float for one employee dict"""
+    employee = dict(row)
+    for key, default in DEFAULT_SALARY_CONFIG.items():
+        if employee.get(key) is None:
+            employee[key] = default
+    employee['per_day_salary'] = float(employee['per_day_salary'])
+    employee['monthly_salary'] = float(employee['monthly_salary'])
+    return employee
+
+
+def load_employees(cur, user_id, employee_ids=None):
+    """Load salary settings for the user's non-deleted employees (optionally only employee_ids)"""
+    employee_filter = ""
+    params = [user_id]
+    if employee_ids is not None:
+        if not employee_ids:
+            return []
+        employee_filter = f" AND e.id IN ({', '.join(['%s'] * len(employee_ids))})"
+        params.extend(employee_ids)
+
+    cur.execute(f"""
+        SELECT e.id, e.name, e.leaving_date, sc.per_day_salary, sc.working_days_per_week,
+               sc.holiday_day, sc.salary_type, sc.monthly_salary
+        FROM employees e
+        LEFT JOIN salary_config sc ON e.id = sc.employee_id
+        WHERE e.user_id = %s AND e.deleted_at IS NULL{employee_filter}
+        ORDER BY e.leaving_date IS NULL DESC, e.name
+    """, params)
+
+    employees = []
+    for row in cur.fetchall():
+        employees.append(normalize_employee({
+            'employee_id': row[0],
+            'employee_name': row[1],
+            'leaving_date': row[2],
+            'per_day_salary': row[3],
+            'working_days_per_week': row[4],
+            'holiday_day': row[5],
+            'salary_type': row[6],
+            'monthly_salary': row[7],
+        }))
+    return employees
+
+
+# One range of idx_attendance_user_date per month - params (user_id, first_day, next_month[, employee ids])
+ATTENDANCE_QUERY = """
+    SELECT employee_id, attendance_date, status, advance
+    FROM attendance
+    WHERE user_id = %s AND attendance_date >= %s AND attendance_date < %s{employee_filter}
+"""
+
+
+def load_attendance(cur, user_id, month, employee_ids=None):
+    """Load a month of attendance as parallel arrays (employee_id, day offset, status code, advance)"""
+    first_day, next_month = month_range(month)
+    employee_filter = ""
+    params = [user_id, first_day, next_month]
+    if employee_ids is not None:
+        if not employee_ids:
+            return empty_attendance()
+        employee_filter = f" AND employee_id IN ({', '.join(['%s'] * len(employee_ids))})"
+        params.extend(employee_ids)
+
+    cur.execute(ATTENDANCE_QUERY.format(employee_filter=employee_filter), params)
+    rows = cur.fetchall()
+
+    if not rows:
+        return empty_attendance()
+
+    return {
+        'employee_id': np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+        'day': np.fromiter(((row[1] - first_day).days for row in rows), dtype=np.int64, count=len(rows)),
+        'status': np.fromiter((STATUS_CODES.get(row[2], UNMARKED) for row in rows), dtype=np.int8, count=len(rows)),
+        'advance': np.fromiter((float(row[3] or 0) for row in rows), dtype=np.float64, count=len(rows)),
+    }
+
+
+def empty_attendance():
+    """Attendance arrays with no rows"""
+    return {
+        'employee_id': np.zeros(0, dtype=np.int64),
+        'day': np.zeros(0, dtype=np.int64),
+        'status': np.zeros(0, dtype=np.int8),
+        'advance': np.zeros(0, dtype=np.float64),
+    }
+
+
+def compute_payroll(month, employees, attendance, include_daily=True):
+    """Compute salary_data for every employee in one vectorized pass
+
+    ``employees`` is a list of dicts as returned by load_employees() and
+    ``attendance`` the arrays returned by load_attendance(). Returns a dict
+    mapping employee_id to the salary_data dict used by salary.html. Pass
+    include_daily=False to skip the per-day breakdown (bulk payroll runs).
+    """
+    first_day, last_day = month_bounds(month)
+    days_in_month = (last_day - first_day).days + 1
+    n_employees = len(employees)
+    if n_employees == 0:
+        return {}
+
+    days = np.arange(days_in_month)
+    day_dates = [first_day + timedelta(days=int(d)) for d in days]
+    day_strings = [d.strftime('%Y-%m-%d') for d in day_dates]
+    day_names = [d.strftime('%A') for d in day_dates]
+    day_weekdays = np.array([d.weekday() for d in day_dates])
+
+    # Per-employee settings as column vectors
+    employee_ids = np.array([employee['employee_id'] for employee in employees], dtype=np.int64)
+    holiday_weekday = np.array([
+        WEEKDAYS.index(e['holiday_day'].lower()) if e['holiday_day'].lower() in WEEKDAYS else -1
+        for e in employees
+    ])
+    leaving_offset = np.array([
+        (e['leaving_date'] - first_day).days if e['leaving_date'] else days_in_month
+        for e in employees
+    ])
+    # Last day included in the calculation (salary stops at the leaving date)
+    end_offset = np.minimum(leaving_offset, days_in_month - 1)
+
+    # Scatter attendance rows into (employee x day) matrices
+    status = np.zeros((n_employees, days_in_month), dtype=np.int8)
+    advance = np.zeros((n_employees, days_in_month), dtype=np.float64)
+    if len(attendance['employee_id']):
+        order = np.argsort(employee_ids)
+        position = np.searchsorted(employee_ids, attendance['employee_id'], sorter=order)
+        position = np.minimum(position, n_employees - 1)
+        rows = order[position]
+        keep = (employee_ids[rows] == attendance['employee_id']) & (attendance['day'] >= 0) & (attendance['day'] < days_in_month)
+        status[rows[keep], attendance['day'][keep]] = attendance['status'][keep]
+        advance[rows[keep], attendance['day'][keep]] = attendance['advance'][keep]
+
+    valid = days[None, :] <= end_offset[:, None]
+    is_leaving = days[None, :] == leaving_offset[:, None]
+    is_holiday = day_weekdays[None, :] == holiday_weekday[:, None]
+    kind = np.where(is_leaving, LEAVING_DAY, np.where(is_holiday, HOLIDAY, REGULAR_DAY))
+
+    status = np.where(valid, status, UNMARKED)
+    advance = np.where(valid, advance, 0.0)
+    marked = status != UNMARKED
+
+    present = status == PRESENT
+    half = status == HALF_DAY
+    absent = status == ABSENT
+    worked_holiday = (kind == HOLIDAY) & marked
+    weekly_holiday = valid & (kind == HOLIDAY) & ~marked
+    unmarked = valid & ~marked & (kind != HOLIDAY)
+    # A leaving date always counts as a working day, even when unmarked
+    working = marked | (valid & (kind == LEAVING_DAY))
+
+    # Effective per-day rate (monthly salary is prorated over the days up to the leaving date)
+    total_days_in_month = end_offset + 1
+    effective_rate = np.empty(n_employees, dtype=np.float64)
+    for i, employee in enumerate(employees):
+        if employee['salary_type'] == 'per_month' and employee['monthly_salary'] > 0:
+            effective_rate[i] = employee['monthly_salary'] / total_days_in_month[i] if total_days_in_month[i] > 0 else 0.0
+        else:
+            effective_rate[i] = employee['per_day_salary']
+
+    day_salary = np.where(present, effective_rate[:, None],
+                          np.where(half, effective_rate[:, None] / 2, 0.0))
+
+    # Weeks close on the weekly holiday, the leaving date and the last day of the period
+    week_break = valid & (is_holiday | is_leaving | (days[None, :] == end_offset[:, None]))
+    week_index = np.cumsum(week_break, axis=1) - week_break
+    week_key = (np.arange(n_employees)[:, None] * days_in_month + week_index)[valid]
+    n_keys = n_employees * days_in_month
+
+    def weekly_sum(values):
+        return np.bincount(week_key, weights=values[valid].astype(np.float64), minlength=n_keys).reshape(n_employees, days_in_month)
+
+    week_totals = {
+        'working_days': weekly_sum(marked),
+        'present_days': weekly_sum(present),
+        'half_days': weekly_sum(half),
+        'absent_days': weekly_sum(absent),
+        'unmarked_days': weekly_sum(unmarked),
+        'holidays': weekly_sum(weekly_holiday),
+        'worked_holidays': weekly_sum(worked_holiday),
+        'leaving_days': weekly_sum(is_leaving & valid),
+        'salary': weekly_sum(day_salary),
+        'advance': weekly_sum(advance),
+    }
+
+    # Monthly totals per employee
+    totals = {
+        'total_days': valid.sum(axis=1),
+        'working_days': working.sum(axis=1),
+        'weekly_holidays': weekly_holiday.sum(axis=1),
+        'worked_holidays': worked_holiday.sum(axis=1),
+        'unmarked_days': unmarked.sum(axis=1),
+        'present_days': present.sum(axis=1),
+        'half_days': half.sum(axis=1),
+        'absent_days': absent.sum(axis=1),
+        'total_advance': advance.sum(axis=1),
+    }
+
+    labels = DAY_STATUS_LABELS[kind, status] if include_daily else None
+
+    results = {}
+    for i, employee in enumerate(employees):
+        rate = float(effective_rate[i])
+        present_days = int(totals['present_days'][i])
+        half_days = int(totals['half_days'][i])
+        total_advance = float(totals['total_advance'][i])
+        total_salary = (present_days * rate) + (half_days * (rate / 2))
+
+        if employee['salary_type'] == 'per_month' and employee['monthly_salary'] > 0:
+            salary_calculation_note = f"Monthly Salary: ₹{employee['monthly_salary']:,.2f} ÷ {int(total_days_in_month[i])} days = ₹{rate:.2f}/day"
+        else:
+            salary_calculation_note = f"Per Day Salary: ₹{rate:.2f}"
+
+        weekly_summary = []
+        week_ends = np.flatnonzero(week_break[i])
+        week_start = 0
+        for week, week_end in enumerate(week_ends):
+            week_salary = float(week_totals['salary'][i, week])
+            week_advance = float(week_totals['advance'][i, week])
+            weekly_summary.append({
+                'week': week + 1,
+                'start_date': day_strings[week_start],
+                'end_date': day_strings[week_end],
+                'working_days': int(week_totals['working_days'][i, week]),
+                'present_days': int(week_totals['present_days'][i, week]),
+                'half_days': int(week_totals['half_days'][i, week]),
+                'absent_days': int(week_totals['absent_days'][i, week]),
+                'unmarked_days': int(week_totals['unmarked_days'][i, week]),
+                'holidays': int(week_totals['holidays'][i, week]),
+                'worked_holidays': int(week_totals['worked_holidays'][i, week]),
+                'leaving_days': int(week_totals['leaving_days'][i, week]),
+                'salary': week_salary,
+                'advance': week_advance,
+                'net_salary': week_salary - week_advance
+            })
+            week_start = week_end + 1
+
+        daily_attendance = []
+        if include_daily:
+            n_days = int(totals['total_days'][i])
+            salaries = day_salary[i, :n_days].tolist()
+            advances = advance[i, :n_days].tolist()
+            holidays = is_holiday[i, :n_days].tolist()
+            leaving = is_leaving[i, :n_days].tolist()
+            for d in range(n_days):
+                daily_attendance.append({
+                    'date': day_strings[d],
+                    'day': day_names[d],
+                    'status': labels[i, d],
+                    'salary': salaries[d],
+                    'advance': advances[d],
+                    'net_salary': salaries[d] - advances[d],
+                    'is_holiday': holidays[d],
+                    'is_leaving_date': leaving[d]
+                })
+
+        results[employee['employee_id']] = {
+            'employee_id': employee['employee_id'],
+            'employee_name': employee['employee_name'],
+            'month': month,
+            'salary_type': employee['salary_type'],
+            'per_day_salary': rate,
+            'monthly_salary': employee['monthly_salary'],
+            'working_days_per_week': employee['working_days_per_week'],
+            'leaving_date': employee['leaving_date'],
+            'total_days': int(totals['total_days'][i]),
+            'total_days_in_month': int(total_days_in_month[i]),
+            'working_days': int(totals['working_days'][i]),
+            'weekly_holidays': int(totals['weekly_holidays'][i]),
+            'worked_holidays': int(totals['worked_holidays'][i]),
+            'unmarked_days': int(totals['unmarked_days'][i]),
+            'present_days': present_days,
+            'half_days': half_days,
+            'absent_days': int(totals['absent_days'][i]),
+            'total_salary': total_salary,
+            'total_advance': total_advance,
+            'net_salary': float(total_salary) - total_advance,  # Salary after advance deduction
+            'daily_attendance': daily_attendance,
+            'weekly_summary': weekly_summary,
+            'holiday_day': employee['holiday_day'],
+            'salary_calculation_note': salary_calculation_note
+        }
+
+    return results
+
+
+def calculate_month(cur, user_id, month, employee_ids=None, include_daily=True):
+    """Load and compute payroll for a user's employees for one month"""
+    employees = load_employees(cur, user_id, employee_ids)
+    attendance = load_attendance(cur, user_id, month, [e['employee_id'] for e in employees])
+    return compute_payroll(month, employees, attendance, include_daily=include_daily)
+
+
+def get_month(cur, user_id, month, employee_ids=None):
+    """Salary_data for one month, served from fresh payroll_snapshot rows where possible
+
+    Missing or stale snapshots are recomputed and written back; the caller
+    commits the connection.
+    """
+    employees = load_employees(cur, user_id, employee_ids)
+    if not employees:
+        return {}
+
+    # Generations are read before attendance, so a write committed after this point is noticed on save
+    results, generations = load_snapshots(cur, user_id, month, employees)
+    missing = [e for e in employees if e['employee_id'] not in results]
+
+    if missing:
+        attendance = load_attendance(cur, user_id, month, [e['employee_id'] for e in missing])
+        computed = compute_payroll(month, missing, attendance)
+        save_snapshots(cur, user_id, month, computed.values(), generations)
+        results.update(computed)
+
+    return {e['employee_id']: results[e['employee_id']] for e in employees}
+
+
+# Salary settings a snapshot was computed with - a snapshot that disagrees with the current ones is recomputed
+SNAPSHOT_CONFIG_FIELDS = ('salary_type', 'monthly_salary', 'working_days_per_week', 'holiday_day', 'leaving_date')
+
+
+def _matches_settings(salary_data, employee):
+    if any(salary_data.get(field) != employee[field] for field in SNAPSHOT_CONFIG_FIELDS):
+        return False
+    # per_day_salary holds the effective rate, which is the configured one unless paid monthly
+    if employee['salary_type'] == 'per_month' and employee['monthly_salary'] > 0:
+        return True
+    return salary_data.get('per_day_salary') == employee['per_day_salary']
+
+
+def load_snapshots(cur, user_id, month, employees):
+    """Snapshots of the given employees (load_employees() dicts)
+
+    Returns (fresh, generations): salary_data by employee_id for the fresh
+    snapshots that match the employee's current salary settings, and the
+    generation of every existing snapshot row. Pass the generations to
+    save_snapshots().
+    """
+    if not employees:
+        return {}, {}
+
+    employee_ids = [e['employee_id'] for e in employees]
+    cur.execute(f"""
+        SELECT employee_id, is_stale, generation, salary_data
+        FROM payroll_snapshot
+        WHERE user_id = %s AND month = %s
+        AND employee_id IN ({', '.join(['%s'] * len(employee_ids))})
+    """, [user_id, month] + employee_ids)
+
+    by_id = {e['employee_id']: e for e in employees}
+    snapshots = {}
+    generations = {}
+    for employee_id, is_stale, generation, payload in cur.fetchall():
+        generations[employee_id] = generation
+        if is_stale or payload is None:
+            continue
+        salary_data = json.loads(payload)
+        if salary_data['leaving_date']:
+            salary_data['leaving_date'] = date.fromisoformat(salary_data['leaving_date'])
+        # A salary config write racing the computation of a new snapshot had no row to invalidate
+        if not _matches_settings(salary_data, by_id[employee_id]):
+            continue
+        snapshots[employee_id] = salary_data
+    return snapshots, generations
+
+
+def save_snapshots(cur, user_id, month, salary_rows, generations):
+    """Upsert fresh snapshots for computed salary_data rows
+
+    ``generations`` is what load_snapshots() returned before the attendance
+    was read. A row whose generation moved since then was invalidated by a
+    concurrent write; it is left stale rather than overwritten with pay
+    computed from the old attendance.
+    """
+    rows = []
+    for salary_data in sorted(salary_rows, key=lambda salary_data: salary_data['employee_id']):
+        rows.append((user_id, salary_data['employee_id'], month,
+                     salary_data['present_days'], salary_data['half_days'], salary_data['absent_days'],
+                     round(salary_data['total_salary'], 2), round(salary_data['total_advance'], 2),
+                     round(salary_data['net_salary'], 2), json.dumps(salary_data, default=str),
+                     generations.get(salary_data['employee_id'], 0)))
+
+    # Write in batches so a large tenant stays well under max_allowed_packet.
+    # VALUES(generation) is the generation read; generation itself is never assigned here
+    for start in range(0, len(rows), SNAPSHOT_BATCH_SIZE):
+        batch = rows[start:start + SNAPSHOT_BATCH_SIZE]
+        values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, FALSE, %s)'] * len(batch))
+        cur.execute(f"""
+            INSERT INTO payroll_snapshot (user_id, employee_id, month, present_days, half_days, absent_days,
+                                          total_salary, total_advance, net_salary, salary_data, is_stale, generation)
+            VALUES {values}
+            ON DUPLICATE KEY UPDATE
+                present_days = IF(generation = VALUES(generation), VALUES(present_days), present_days),
+                half_days = IF(generation = VALUES(generation), VALUES(half_days), half_days),
+                absent_days = IF(generation = VALUES(generation), VALUES(absent_days), absent_days),
+                total_salary = IF(generation = VALUES(generation), VALUES(total_salary), total_salary),
+                total_advance = IF(generation = VALUES(generation), VALUES(total_advance), total_advance),
+                net_salary = IF(generation = VALUES(generation), VALUES(net_salary), net_salary),
+                salary_data = IF(generation = VALUES(generation), VALUES(salary_data), salary_data),
+                is_stale = IF(generation = VALUES(generation), FALSE, is_stale)
+        """, [value for row in batch for value in row])
+
+
+def mark_snapshots_stale(cur, user_id, employee_id, month=None):
+    """Invalidate an employee's snapshot for one month, or for every month when month is None"""
+    if month is None:
+        # Months without a row yet are covered by the salary settings check in load_snapshots()
+        cur.execute("""
+            UPDATE payroll_snapshot SET is_stale = TRUE, generation = generation + 1
+            WHERE user_id = %s AND employee_id = %s
+        """, (user_id, employee_id))
+    else:
+        _invalidate(cur, user_id, [(int(employee_id), month)])
+
+
+def mark_attendance_stale(cur, user_id, employee_dates):
+    """Invalidate the snapshots touched by (employee_id, 'YYYY-MM-DD') attendance writes"""
+    _invalidate(cur, user_id, {(int(employee_id), str(attendance_date)[:7])
+                               for employee_id, attendance_date in employee_dates})
+
+
+def _invalidate(cur, user_id, pairs):
+    """Mark (employee_id, month) snapshots stale and bump their generation
+
+    Months with no snapshot yet get a stale placeholder row, so that a reader
+    computing that month right now can not store its result as fresh.
+    """
+    pairs = sorted(pairs)
+    if not pairs:
+        return
+
+    cur.execute(f"""
+        INSERT INTO payroll_snapshot (user_id, employee_id, month, is_stale, generation)
+        VALUES {', '.join(['(%s, %s, %s, TRUE, 1)'] * len(pairs))}
+        ON DUPLICATE KEY UPDATE is_stale = TRUE, generation = generation + 1
+    """, [value for employee_id, month in pairs for value in (user_id, employee_id, month)])
+
+
+# Summary columns copied from salary_data into the payroll register
+REGISTER_FIELDS = [
+    'employee_id', 'employee_name', 'salary_type', 'per_day_salary', 'monthly_salary',
+    'leaving_date', 'total_days', 'working_days', 'present_days', 'half_days', 'absent_days',
+    'worked_holidays', 'weekly_holidays', 'unmarked_days', 'total_salary', 'total_advance', 'net_salary'
+]
+
+_executor = None
+_executor_workers = 0
+# Request threads share the pool - creating, replacing and submitting to it happen under this lock
+_executor_lock = threading.Lock()
+# Workers are never forked from a web worker: its other threads (pool fill, outbox
+# sender, live updates ...) may hold locks a forked child would inherit held
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def get_executor(workers):
+    """Return a shared process pool with the requested number of workers (call with _executor_lock held)"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            # Already submitted chunks still finish; nothing new reaches the old pool
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(_START_METHOD))
+        _executor_workers = workers
+    return _executor
+
+
+def _compute_chunk(month, employees, attendance):
+    """Process pool task - compute salary_data for a chunk of employees"""
+    results = compute_payroll(month, employees, attendance)
+    return [results[employee['employee_id']] for employee in employees]
+
+
+def _split_attendance(attendance, employee_ids):
+    """Select the attendance rows belonging to employee_ids"""
+    keep = np.isin(attendance['employee_id'], employee_ids)
+    return {key: values[keep] for key, values in attendance.items()}
+
+
+def run_payroll(cur, user_id, month, workers=1, chunk_size=200):
+    """Compute the payroll register for every non-deleted employee of a user
+
+    Fresh payroll snapshots are reused; the remaining employees are split
+    into chunks of ``chunk_size`` and spread across a process pool of
+    ``workers`` processes (workers <= 1 computes in-process). Recomputed
+    months are written back as snapshots; the caller commits.
+    """
+    employees = load_employees(cur, user_id)
+    snapshots, generations = load_snapshots(cur, user_id, month, employees)
+    missing = [e for e in employees if e['employee_id'] not in snapshots]
+
+    computed = []
+    if missing:
+        attendance = load_attendance(cur, user_id, month, [e['employee_id'] for e in missing])
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+
+        if workers <= 1 or len(chunks) <= 1:
+            computed = _compute_chunk(month, missing, attendance)
+        else:
+            chunk_attendance = [_split_attendance(attendance, [e['employee_id'] for e in chunk]) for chunk in chunks]
+            with _executor_lock:
+                executor = get_executor(workers)
+                futures = [executor.submit(_compute_chunk, month, chunk, chunk_rows)
+                           for chunk, chunk_rows in zip(chunks, chunk_attendance)]
+            computed = [row for future in futures for row in future.result()]
+
+        save_snapshots(cur, user_id, month, computed, generations)
+        snapshots.update({row['employee_id']: row for row in computed})
+
+    return build_register(month, [snapshots[e['employee_id']] for e in employees])
+
+
+def build_register(month, salary_rows):
+    """Consolidate per-employee salary_data into one payroll register"""
+    register_rows = []
+    totals = {
+        'employees': 0,
+        'present_days': 0,
+        'half_days': 0,
+        'absent_days': 0,
+        'total_salary': 0.0,
+        'total_advance': 0.0,
+        'net_salary': 0.0
+    }
+
+    for salary_data in salary_rows:
+        row = {field: salary_data[field] for field in REGISTER_FIELDS}
+        row['leaving_date'] = salary_data['leaving_date'].strftime('%Y-%m-%d') if salary_data['leaving_date'] else None
+        row['status'] = 'Active' if not salary_data['leaving_date'] else 'Left'
+        register_rows.append(row)
+
+        totals['employees'] += 1
+        for field in ('present_days', 'half_days', 'absent_days', 'total_salary', 'total_advance', 'net_salary'):
+            totals[field] += salary_data[field]
+
+    return {
+        'month': month,
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'employees': register_rows,
+        'totals': totals
+    }
@@ -0,0 +1,213 @@
+"""Per-tenant cache for /report results
+
+Entries are keyed by (user_id, report type, month, employee_id, data version).
+Each tenant's data version lives in ``users.data_version`` and is bumped in the
+same transaction as any attendance or employee write, so a cached report is
+never served after the data behind it changed - old versions simply stop being
+requested and age out of the backend.
+
+The Redis backend stores values as JSON (see encode / decode), never pickle -
+whoever can write to a shared Redis must not be able to run code in the web
+workers.
+"""
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+import json
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # Optional - only needed for the shared backend
+    redis = None
+
+
+def _to_json(value):
+    """Report values as plain JSON, with tagged dates, Decimals, tuples and non-string-keyed dicts"""
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: _to_json(item) for key, item in value.items()}
+        return {'__items__': [[_to_json(key), _to_json(item)] for key, item in value.items()]}
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if isinstance(value, tuple):
+        return {'__tuple__': [_to_json(item) for item in value]}
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    return value
+
+
+_TAGS = {
+    '__items__': lambda items: {key: item for key, item in items},
+    '__tuple__': tuple,
+    '__datetime__': datetime.fromisoformat,
+    '__date__': date.fromisoformat,
+    '__decimal__': Decimal,
+}
+
+
+def _from_json(obj):
+    if len(obj) == 1:
+        tag, value = next(iter(obj.items()))
+        if tag in _TAGS:
+            return _TAGS[tag](value)
+    return obj
+
+
+def encode(value):
+    """Serialize a cached value for a shared backend (TypeError for anything not listed in _to_json)"""
+    return json.dumps(_to_json(value), separators=(',', ':'))
+
+
+def decode(payload):
+    return json.loads(payload, object_hook=_from_json)
+
+
+class LRUBackend:
+    """Size-bounded in-process backend (least recently used entries are evicted)"""
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared backend so every worker process sees the same entries (JSON values, see encode)"""
+
+    def __init__(self, url, ttl=3600, prefix='report:'):
+        if redis is None:
+            raise RuntimeError('REPORT_CACHE_BACKEND=redis requires the redis package')
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        payload = self.client.get(self.prefix + key)
+        return decode(payload) if payload is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, encode(value), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class ReportCache:
+    """Cache front-end with hit/miss counters"""
+
+    # Bump when the shape of cached build_report() results changes, so a shared
+    # cache never hands new code an old-format entry
+    FORMAT = 3
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(user_id, report_type, month, employee_id, version):
+        return f"v{ReportCache.FORMAT}:{user_id}:{report_type}:{month}:{employee_id or ''}:{version}"
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A broken shared backend must not take the report page down
+            print(f"Report cache error: {str(e)}")
+            value = None
+            with self._lock:
+                self.errors += 1
+
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = compute()
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            print(f"Report cache error: {str(e)}")
+            with self._lock:
+                self.errors += 1
+        return value
+
+    def invalidate(self, key):
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            print(f"Report cache error: {str(e)}")
+            with self._lock:
+                self.errors += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'entries': len(self.backend) if hasattr(self.backend, '__len__') else None
+        }
+
+
+def create_cache(config, ttl=None, prefix='report:'):
+    """Build a ReportCache on the backend selected by REPORT_CACHE_BACKEND"""
+    if ttl is None:
+        ttl = config['REPORT_CACHE_TTL']
+    if config['REPORT_CACHE_BACKEND'] == 'redis':
+        backend = RedisBackend(config['REPORT_CACHE_URL'], ttl=ttl, prefix=prefix)
+    else:
+        backend = LRUBackend(max_entries=config['REPORT_CACHE_MAX_ENTRIES'], ttl=ttl)
+    return ReportCache(backend)
+
+
+def get_data_version(cur, user_id):
+    """Current data version of a tenant"""
+    cur.execute("SELECT data_version FROM users WHERE id = %s", (user_id,))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(cur, user_id):
+    """Invalidate every cached report of a tenant - call inside the write transaction"""
+    cur.execute("UPDATE users SET data_version = data_version + 1 WHERE id = %s", (user_id,))
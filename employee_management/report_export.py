@@ -0,0 +1,113 @@
+"""Streaming export of report data as CSV or JSON Lines
+
+Rows are pulled one at a time from a server-side (unbuffered) cursor and
+encoded in small chunks, so memory stays flat however many rows a tenant has.
+"""
+from datetime import timedelta
+import csv
+import io
+import json
+
+import rollups
+
+# Rows encoded per yielded chunk
+CHUNK_ROWS = 500
+
+WEEKLY_SALARY_COLUMNS = [
+    'employee_id', 'employee_name', 'employee_status', 'salary_type', 'date', 'day',
+    'week_number', 'week_start', 'week_end', 'status', 'salary', 'advance', 'net_salary'
+]
+
+EMPLOYEE_SUMMARY_COLUMNS = [
+    'employee_id', 'employee_name', 'joining_date', 'leaving_date', 'employee_status',
+    'salary_type', 'per_day_salary', 'monthly_salary', 'total_present', 'total_half_days',
+    'total_absent', 'total_earned', 'total_advance', 'net_earned'
+]
+
+
+def weekly_salary_rows(cur):
+    """Day rows of the weekly salary report from a cursor running WEEKLY_SALARY_QUERY"""
+    for row in iter_cursor(cur):
+        emp_id, name, leaving_date, per_day_salary, salary_type, monthly_salary, holiday_day, attendance_date, status, advance = row
+        week_number = attendance_date.isocalendar()[1]
+        week_start = attendance_date - timedelta(days=attendance_date.weekday())
+        day_salary = rollups.attendance_earning(status, attendance_date, (salary_type, per_day_salary, monthly_salary))
+        advance_amount = float(advance or 0)
+        yield {
+            'employee_id': emp_id,
+            'employee_name': name,
+            'employee_status': 'Active' if not leaving_date else 'Left',
+            'salary_type': salary_type,
+            'date': attendance_date.strftime('%Y-%m-%d'),
+            'day': attendance_date.strftime('%A'),
+            'week_number': week_number,
+            'week_start': week_start.strftime('%Y-%m-%d'),
+            'week_end': (week_start + timedelta(days=6)).strftime('%Y-%m-%d'),
+            'status': status,
+            'salary': round(day_salary, 2),
+            'advance': advance_amount,
+            'net_salary': round(day_salary - advance_amount, 2)
+        }
+
+
+def employee_summary_rows(cur):
+    """Employee rows from a cursor running EMPLOYEE_SUMMARY_QUERY (or its rollup variant)"""
+    for row in iter_cursor(cur):
+        total_earned = float(row[10] or 0)
+        total_advance = float(row[11] or 0)
+        yield {
+            'employee_id': row[0],
+            'employee_name': row[1],
+            'joining_date': row[2].strftime('%Y-%m-%d') if row[2] else None,
+            'leaving_date': row[3].strftime('%Y-%m-%d') if row[3] else None,
+            'employee_status': 'Active' if not row[3] else 'Left',
+            'salary_type': row[5] or 'per_day',
+            'per_day_salary': float(row[4] or 0),
+            'monthly_salary': float(row[6] or 0),
+            'total_present': row[7] or 0,
+            'total_half_days': row[8] or 0,
+            'total_absent': row[9] or 0,
+            'total_earned': round(total_earned, 2),
+            'total_advance': total_advance,
+            'net_earned': round(total_earned - total_advance, 2)
+        }
+
+
+def iter_cursor(cur, size=CHUNK_ROWS):
+    """Iterate a server-side cursor with fetchmany() and close it when done"""
+    try:
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cur.close()
+
+
+def stream_csv(columns, rows):
+    """Encode dict rows as CSV, yielding one chunk per CHUNK_ROWS rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def stream_jsonl(rows):
+    """Encode dict rows as JSON Lines, yielding one chunk per CHUNK_ROWS rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row))
+        if len(lines) == CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
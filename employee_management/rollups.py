@@ -0,0 +1,145 @@
+"""Per-employee lifetime attendance rollups
+
+The employee_summary report needs lifetime present/half/absent counts,
+earnings and advances for every employee. ``employee_rollup`` keeps those
+totals precomputed: attendance writes apply the difference between the old
+and the new row, and salary config changes rebuild the affected employee.
+"""
+from datetime import datetime
+import calendar
+
+# Earnings for one attendance row ``a`` under salary config ``sc`` - shared by
+# the grouped report query and the rollup rebuild so both produce identical totals
+EARNED_EXPRESSION = """
+    CASE
+        WHEN sc.salary_type = 'per_month' AND sc.monthly_salary > 0 THEN
+            CASE
+                WHEN a.status = 'present' THEN sc.monthly_salary / DAY(LAST_DAY(a.attendance_date))
+                WHEN a.status = 'half_day' THEN (sc.monthly_salary / DAY(LAST_DAY(a.attendance_date))) / 2
+                ELSE 0
+            END
+        ELSE
+            CASE
+                WHEN a.status = 'present' THEN sc.per_day_salary
+                WHEN a.status = 'half_day' THEN sc.per_day_salary / 2
+                ELSE 0
+            END
+    END
+"""
+
+
+def attendance_earning(status, attendance_date, config):
+    """Python version of EARNED_EXPRESSION; config is (salary_type, per_day_salary, monthly_salary) or None"""
+    if config is None or status not in ('present', 'half_day'):
+        return 0.0
+
+    salary_type, per_day_salary, monthly_salary = config
+    if salary_type == 'per_month' and monthly_salary and float(monthly_salary) > 0:
+        day_rate = float(monthly_salary) / calendar.monthrange(attendance_date.year, attendance_date.month)[1]
+    else:
+        day_rate = float(per_day_salary or 0)
+
+    return day_rate if status == 'present' else day_rate / 2
+
+
+def record_attendance_changes(cur, user_id, changes):
+    """Apply attendance writes to the rollups - call BEFORE executing the writes
+
+    ``changes`` is a list of (employee_id, date, new_status, new_advance) where
+    new_status None means the row is deleted. The old rows are read (and
+    locked) so only the difference is added to each employee's totals.
+    """
+    if not changes:
+        return
+
+    # Last write wins when the same employee/date appears more than once
+    latest = {}
+    for employee_id, attendance_date, status, advance in changes:
+        latest[(int(employee_id), str(attendance_date))] = (status, float(advance or 0))
+
+    employee_ids = sorted({employee_id for employee_id, _ in latest})
+    conditions = ' OR '.join(['(a.employee_id = %s AND a.attendance_date = %s)'] * len(latest))
+    cur.execute(f"""
+        SELECT a.employee_id, a.attendance_date, a.status, a.advance
+        FROM attendance a
+        WHERE a.user_id = %s AND ({conditions})
+        FOR UPDATE
+    """, [user_id] + [value for pair in latest for value in pair])
+    old_rows = {(row[0], row[1].strftime('%Y-%m-%d')): (row[2], float(row[3] or 0)) for row in cur.fetchall()}
+
+    cur.execute(f"""
+        SELECT employee_id, salary_type, per_day_salary, monthly_salary
+        FROM salary_config
+        WHERE user_id = %s AND employee_id IN ({', '.join(['%s'] * len(employee_ids))})
+    """, [user_id] + employee_ids)
+    configs = {row[0]: row[1:] for row in cur.fetchall()}
+
+    deltas = {}
+    for (employee_id, attendance_date), (status, advance) in latest.items():
+        old_status, old_advance = old_rows.get((employee_id, attendance_date), (None, 0.0))
+        day = _parse_date(attendance_date)
+        delta = deltas.setdefault(employee_id, [0, 0, 0, 0.0, 0.0])
+        for value, sign in ((old_status, -1), (status, 1)):
+            if value == 'present':
+                delta[0] += sign
+            elif value == 'half_day':
+                delta[1] += sign
+            elif value == 'absent':
+                delta[2] += sign
+        config = configs.get(employee_id)
+        delta[3] += attendance_earning(status, day, config) - attendance_earning(old_status, day, config)
+        delta[4] += (advance if status else 0.0) - old_advance
+
+    rows = [(user_id, employee_id) + tuple(delta) for employee_id, delta in deltas.items()]
+    values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+    cur.execute(f"""
+        INSERT INTO employee_rollup (user_id, employee_id, total_present, total_half_days,
+                                     total_absent, total_earned, total_advance)
+        VALUES {values}
+        ON DUPLICATE KEY UPDATE
+            total_present = total_present + VALUES(total_present),
+            total_half_days = total_half_days + VALUES(total_half_days),
+            total_absent = total_absent + VALUES(total_absent),
+            total_earned = total_earned + VALUES(total_earned),
+            total_advance = total_advance + VALUES(total_advance)
+    """, [value for row in rows for value in row])
+
+
+def rebuild(cur, user_id, employee_id=None):
+    """Recompute rollups from attendance for a user (or one of their employees)"""
+    employee_filter = ""
+    params = [user_id]
+    if employee_id is not None:
+        employee_filter = " AND e.id = %s"
+        params.append(employee_id)
+
+    cur.execute(f"""
+        INSERT INTO employee_rollup (user_id, employee_id, total_present, total_half_days,
+                                     total_absent, total_earned, total_advance)
+        SELECT
+            e.user_id,
+            e.id,
+            COUNT(CASE WHEN a.status = 'present' THEN 1 END),
+            COUNT(CASE WHEN a.status = 'half_day' THEN 1 END),
+            COUNT(CASE WHEN a.status = 'absent' THEN 1 END),
+            COALESCE(SUM({EARNED_EXPRESSION}), 0),
+            COALESCE(SUM(a.advance), 0)
+        FROM employees e
+        LEFT JOIN salary_config sc ON e.id = sc.employee_id AND sc.user_id = e.user_id
+        LEFT JOIN attendance a ON a.employee_id = e.id AND a.user_id = e.user_id
+        WHERE e.user_id = %s{employee_filter}
+        GROUP BY e.user_id, e.id
+        ON DUPLICATE KEY UPDATE
+            total_present = VALUES(total_present),
+            total_half_days = VALUES(total_half_days),
+            total_absent = VALUES(total_absent),
+            total_earned = VALUES(total_earned),
+            total_advance = VALUES(total_advance)
+    """, params)
+
+
+def _parse_date(value):
+    """Accept a date or a 'YYYY-MM-DD' string"""
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value
@@ -0,0 +1,178 @@
+"""Per-request SQL instrumentation
+
+Every cursor handed out through ``mysql.connection`` is wrapped so each
+statement's normalized text, duration and row count are recorded for the
+current request. After the request the log is checked against query-count and
+time budgets, repeated statements (likely N+1 loops) are flagged, and a
+structured JSON log line is emitted. In debug mode an ``X-SQL-Summary``
+response header summarizes the SQL time.
+"""
+from collections import Counter
+import json
+import logging
+import re
+import time
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger('sql')
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+_VALUES_LIST = re.compile(r'(\(\s*%s(?:\s*,\s*(?:%s|FALSE|TRUE|NULL))*\s*\))(?:\s*,\s*\1)+')
+_OR_CHAIN = re.compile(r'(\([^()]*%s[^()]*\))(?:\s+OR\s+\1)+')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+
+
+def normalize(sql):
+    """Collapse a statement to its shape: whitespace, literals and variable-length lists"""
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _VALUES_LIST.sub(r'\1, ...', sql)
+    sql = _OR_CHAIN.sub(r'\1 OR ...', sql)
+    sql = _PLACEHOLDER_LIST.sub('%s, ...', sql)
+    return sql
+
+
+def record(sql, duration, rows):
+    """Append one statement to the current request's SQL log"""
+    if has_request_context() and 'sql_log' in g:
+        g.sql_log.append({'sql': normalize(sql), 'ms': duration * 1000, 'rows': rows})
+
+
+class InstrumentedCursor:
+    """Cursor proxy timing execute()/executemany()"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            record(query, time.perf_counter() - started, self._rowcount())
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            record(query, time.perf_counter() - started, self._rowcount())
+
+    def _rowcount(self):
+        # Unbuffered cursors report an undefined count until all rows are read
+        rowcount = self._cursor.rowcount
+        return rowcount if rowcount is not None and 0 <= rowcount < 2 ** 63 else None
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are instrumented"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def summarize(sql_log, query_budget, time_budget_ms, repeat_threshold):
+    """Totals, budget violations and repeated statements for one request's SQL log"""
+    total_ms = sum(entry['ms'] for entry in sql_log)
+    counts = Counter(entry['sql'] for entry in sql_log)
+    repeated = [{'sql': sql, 'count': count} for sql, count in counts.most_common() if count >= repeat_threshold]
+
+    violations = []
+    if len(sql_log) > query_budget:
+        violations.append(f'query_count>{query_budget}')
+    if total_ms > time_budget_ms:
+        violations.append(f'sql_ms>{time_budget_ms}')
+    if repeated:
+        violations.append('repeated_statement')
+
+    return {
+        'queries': len(sql_log),
+        'sql_ms': round(total_ms, 2),
+        'slowest_ms': round(max((entry['ms'] for entry in sql_log), default=0.0), 2),
+        'violations': violations,
+        'repeated': repeated
+    }
+
+
+def configure_logger(level):
+    """Give the 'sql' logger a level, and a stderr handler when no logging is configured
+
+    Without this it inherits the root logger's WARNING level and the INFO
+    lines of SQL_LOG_ALL_REQUESTS are dropped.
+    """
+    logger.setLevel(level)
+    if not logger.hasHandlers():
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+        logger.addHandler(handler)
+
+
+def init_app(app, mysql):
+    """Instrument mysql.connection cursors and register the per-request hooks"""
+    app.config.setdefault('SQL_QUERY_BUDGET', 10)
+    app.config.setdefault('SQL_TIME_BUDGET_MS', 200)
+    app.config.setdefault('SQL_REPEAT_THRESHOLD', 5)
+    app.config.setdefault('SQL_SLOW_QUERY_MS', 100)
+    app.config.setdefault('SQL_LOG_ALL_REQUESTS', False)
+    app.config.setdefault('SQL_DEBUG_HEADER', None)
+    app.config.setdefault('SQL_LOG_LEVEL', None)
+
+    configure_logger(app.config['SQL_LOG_LEVEL'] or ('INFO' if app.config['SQL_LOG_ALL_REQUESTS'] else 'WARNING'))
+    mysql.connection_wrapper = InstrumentedConnection
+
+    @app.before_request
+    def start_sql_log():
+        g.sql_log = []
+
+    @app.after_request
+    def finish_sql_log(response):
+        sql_log = g.pop('sql_log', None)
+        if sql_log is None:
+            return response
+
+        summary = summarize(sql_log,
+                            app.config['SQL_QUERY_BUDGET'],
+                            app.config['SQL_TIME_BUDGET_MS'],
+                            app.config['SQL_REPEAT_THRESHOLD'])
+        g.sql_summary = summary
+
+        slow = [entry for entry in sql_log if entry['ms'] >= app.config['SQL_SLOW_QUERY_MS']]
+        if summary['violations'] or slow or app.config['SQL_LOG_ALL_REQUESTS']:
+            event = {
+                'event': 'request_sql',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                **summary,
+                'slow': [{'sql': entry['sql'], 'ms': round(entry['ms'], 2), 'rows': entry['rows']} for entry in slow]
+            }
+            level = logging.WARNING if summary['violations'] or slow else logging.INFO
+            logger.log(level, json.dumps(event))
+
+        show_header = app.config['SQL_DEBUG_HEADER']
+        if show_header is None:
+            show_header = app.debug
+        if show_header:
+            response.headers['X-SQL-Summary'] = (
+                f"queries={summary['queries']}; sql_ms={summary['sql_ms']}; "
+                f"slowest_ms={summary['slowest_ms']}"
+                + (f"; flags={','.join(summary['violations'])}" if summary['violations'] else '')
+            )
+        return response
@@ -1,51 +1,255 @@
-// Attendance management JavaScript
+// Attendance page JavaScript
+
+// Endpoint URLs rendered by the template (see #attendanceConfig)
+const ATTENDANCE_URLS = JSON.parse(document.getElementById('attendanceConfig').textContent);
+
+let changesMade = false;
+const employeeChanges = new Set();
+const notesChanges = new Set();
+let currentEmployeeId = null;
+const notesModal = new bootstrap.Modal(document.getElementById('notesModal'));
 
 document.addEventListener('DOMContentLoaded', function() {
-    // Date picker functionality
-    const datePicker = document.getElementById('attendanceDate');
+    initializeApp();
+});
+
+function initializeApp() {
+    // Date picker
+    const datePicker = document.getElementById('datePicker');
     if (datePicker) {
-        const today = new Date().toISOString().split('T')[0];
-        datePicker.max = today;
-        
         datePicker.addEventListener('change', function() {
-            window.location.href = `${window.location.pathname}?date=${this.value}`;
+            showLoading();
+            window.location.href = `${ATTENDANCE_URLS.attendance}?date=${this.value}`;
         });
     }
-    
-    // Save attendance functionality
-    const saveButtons = document.querySelectorAll('.save-attendance');
-    saveButtons.forEach(button => {
+
+    // Calculate initial total advance
+    updateTotalAdvance();
+
+    // Store original advance values
+    storeOriginalAdvanceValues();
+
+    // Event listeners for changes
+    setupEventListeners();
+
+    // Disable controls for left employees where applicable
+    disableLeftEmployeeControls();
+
+    // Follow attendance marked in other tabs / by other users
+    connectLiveUpdates();
+}
+
+function connectLiveUpdates() {
+    if (!ATTENDANCE_URLS.events || !window.EventSource) return;
+
+    const source = new EventSource(ATTENDANCE_URLS.events);
+    source.addEventListener('attendance', function(event) {
+        applyLiveUpdate(JSON.parse(event.data));
+    });
+    source.addEventListener('resync', function() {
+        // Events were dropped - the page can no longer be patched reliably
+        source.close();
+        resyncAttendance();
+    });
+}
+
+function resyncAttendance() {
+    if (employeeChanges.size === 0 && notesChanges.size === 0 && !notesModalOpen()) {
+        location.reload();
+    } else {
+        showNotification('Attendance was changed elsewhere - reload to see the latest', 'warning');
+    }
+}
+
+function notesModalOpen() {
+    return document.getElementById('notesModal').classList.contains('show');
+}
+
+function applyLiveUpdate(update) {
+    const date = document.getElementById('datePicker').value;
+    const summary = update.dates[date];
+    if (!summary) return;  // Another day
+
+    if (update.truncated) {
+        resyncAttendance();
+        return;
+    }
+
+    const counts = {
+        summaryPresent: summary.present,
+        summaryHalfDay: summary.half_day,
+        summaryAbsent: summary.absent,
+        summaryMarked: summary.marked
+    };
+    Object.keys(counts).forEach(id => {
+        const element = document.getElementById(id);
+        if (element) element.textContent = counts[id];
+    });
+
+    update.rows.forEach(row => {
+        if (row.date === date) {
+            applyLiveRow(row);
+        }
+    });
+    updateTotalAdvance();
+}
+
+function applyLiveRow(row) {
+    const employeeId = String(row.employee_id);
+    const card = document.getElementById(`card-${employeeId}`);
+    // Unsaved edits on this page win over the pushed row
+    if (!card || employeeChanges.has(employeeId) || notesChanges.has(employeeId) ||
+        (notesModalOpen() && currentEmployeeId === employeeId)) {
+        return;
+    }
+
+    document.querySelectorAll(`.status-option[data-employee="${employeeId}"]`).forEach(option => {
+        option.classList.toggle('active', option.dataset.status === row.status);
+    });
+    updateCardStatus(employeeId, row.status);
+
+    card.setAttribute('data-original-notes', row.notes);
+    updateNotesIndicator(employeeId, row.notes);
+
+    const advanceInput = document.getElementById(`advance_${employeeId}`);
+    if (advanceInput && document.activeElement !== advanceInput) {
+        advanceInput.value = row.advance;
+        advanceInput.setAttribute('data-original-value', advanceInput.value || '0');
+    }
+}
+
+function disableLeftEmployeeControls() {
+    document.querySelectorAll('.employee-card[data-is-left="true"]').forEach(card => {
+        const employeeId = card.dataset.employeeId;
+        const canMark = card.dataset.canMark === 'true';
+
+        if (!canMark) {
+            // Disable all interactive elements
+            const statusOptions = card.querySelectorAll('.status-option');
+            const advanceInput = card.querySelector('.advance-input');
+            const applyBtn = card.querySelector('.btn-apply');
+            const notesBtn = card.querySelector('.btn-notes');
+
+            statusOptions.forEach(option => option.classList.add('disabled'));
+            if (advanceInput) advanceInput.disabled = true;
+            if (applyBtn) applyBtn.disabled = true;
+            if (notesBtn) notesBtn.disabled = true;
+        }
+    });
+}
+
+function storeOriginalAdvanceValues() {
+    document.querySelectorAll('.advance-input').forEach(input => {
+        const originalValue = input.value || '0';
+        input.setAttribute('data-original-value', originalValue);
+    });
+}
+
+function setupEventListeners() {
+    // Status options - Toggle behavior
+    document.querySelectorAll('.status-option:not(.disabled)').forEach(option => {
+        option.addEventListener('click', function() {
+            const employeeId = this.dataset.employee;
+            const status = this.dataset.status;
+            const card = document.getElementById(`card-${employeeId}`);
+            const canMark = card ? card.dataset.canMark === 'true' : true;
+
+            if (!canMark) {
+                showNotification('Cannot mark attendance for left employee', 'error');
+                return;
+            }
+
+            const currentActive = document.querySelector(`.status-option[data-employee="${employeeId}"].active`);
+
+            // If clicking the same status that's already active, remove status (toggle off)
+            if (currentActive && currentActive.dataset.status === status) {
+                // Remove all active statuses
+                document.querySelectorAll(`.status-option[data-employee="${employeeId}"]`).forEach(opt => {
+                    opt.classList.remove('active');
+                });
+                // Save as "not_marked"
+                saveStatusChange(employeeId, 'not_marked');
+            } else {
+                // Set new status
+                document.querySelectorAll(`.status-option[data-employee="${employeeId}"]`).forEach(opt => {
+                    opt.classList.remove('active');
+                });
+                this.classList.add('active');
+                // Save the new status
+                saveStatusChange(employeeId, status);
+            }
+        });
+    });
+
+    // Advance inputs
+    document.querySelectorAll('.advance-input:not(:disabled)').forEach(input => {
+        input.addEventListener('input', debounce(function() {
+            const employeeId = this.dataset.employee;
+            const currentValue = this.value || '0';
+            const originalValue = this.getAttribute('data-original-value') || '0';
+
+            // Check if advance value actually changed
+            if (currentValue !== originalValue) {
+                handleAdvanceChange(employeeId);
+            }
+            updateTotalAdvance();
+        }, 300));
+
+        // Also check on blur for immediate feedback
+        input.addEventListener('blur', function() {
+            const employeeId = this.dataset.employee;
+            const currentValue = this.value || '0';
+            const originalValue = this.getAttribute('data-original-value') || '0';
+
+            if (currentValue !== originalValue) {
+                handleAdvanceChange(employeeId);
+            }
+        });
+    });
+
+    // Individual apply buttons for advance only
+    document.querySelectorAll('.btn-apply:not(:disabled)').forEach(button => {
         button.addEventListener('click', function() {
-            const employeeId = this.getAttribute('data-employee-id');
-            const date = document.getElementById('attendanceDate').value;
-            const status = document.querySelector(`.status-select[data-employee-id="${employeeId}"]`).value;
-            const notes = document.querySelector(`.notes-input[data-employee-id="${employeeId}"]`).value;
-            
-            saveAttendance(employeeId, date, status, notes, this);
+            applyAdvanceForEmployee(this.dataset.employee);
         });
     });
-    
-    // Quick save on status change
-    const statusSelects = document.querySelectorAll('.status-select');
-    statusSelects.forEach(select => {
-        select.addEventListener('change', function() {
-            const employeeId = this.getAttribute('data-employee-id');
-            const date = document.getElementById('attendanceDate').value;
-            const status = this.value;
-            const notes = document.querySelector(`.notes-input[data-employee-id="${employeeId}"]`).value;
-            const button = document.querySelector(`.save-attendance[data-employee-id="${employeeId}"]`);
-            
-            saveAttendance(employeeId, date, status, notes, button);
+
+    // Notes buttons
+    document.querySelectorAll('.btn-notes:not(:disabled)').forEach(button => {
+        button.addEventListener('click', function() {
+            showNotesModal(this.dataset.employee, this.dataset.employeeName);
         });
     });
-});
+    document.getElementById('saveNotes').addEventListener('click', saveNotes);
+
+    // Global apply button for advance only
+    document.getElementById('applyChanges').addEventListener('click', function() {
+        applyAllAdvanceChanges();
+    });
+
+    // Handle modal close with notes saving
+    document.getElementById('notesModal').addEventListener('hidden.bs.modal', function() {
+        if (currentEmployeeId) {
+            saveNotesSilently();
+        }
+    });
+}
+
+function saveStatusChange(employeeId, status) {
+    const date = document.getElementById('datePicker').value;
+    const notes = getCurrentNotesForEmployee(employeeId);
+    const advance = getCurrentAdvance(employeeId);
+    const card = document.getElementById(`card-${employeeId}`);
+    const canMark = card ? card.dataset.canMark === 'true' : true;
+
+    if (!canMark) {
+        showNotification('Cannot mark attendance for left employee', 'error');
+        return;
+    }
 
-function saveAttendance(employeeId, date, status, notes, buttonElement) {
-    const originalText = buttonElement.innerHTML;
-    buttonElement.innerHTML = '<span class="loading-spinner"></span> Saving...';
-    buttonElement.disabled = true;
-    
-    fetch('/attendance/update', {
+    showLoading();
+
+    fetch(ATTENDANCE_URLS.updateAttendance, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -54,57 +258,501 @@ function saveAttendance(employeeId, date, status, notes, buttonElement) {
             employee_id: employeeId,
             date: date,
             status: status,
-            notes: notes
+            notes: notes,
+            advance: advance
         })
     })
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            showNotification('Attendance saved successfully!', 'success');
-            updateButtonAppearance(buttonElement, status);
+            // Update card appearance
+            updateCardStatus(employeeId, status);
+            showNotification('Status updated successfully', 'success');
         } else {
-            showNotification(data.message, 'error');
+            showNotification('Error: ' + data.message, 'error');
+            // Revert UI on error
+            setTimeout(() => location.reload(), 1000);
         }
     })
     .catch(error => {
-        console.error('Error:', error);
-        showNotification('Error saving attendance. Please try again.', 'error');
+        showNotification('Network error', 'error');
+        setTimeout(() => location.reload(), 1000);
     })
     .finally(() => {
-        buttonElement.innerHTML = originalText;
-        buttonElement.disabled = false;
+        hideLoading();
     });
 }
 
-function updateButtonAppearance(button, status) {
-    const statusColors = {
-        'present': 'btn-success',
-        'absent': 'btn-danger',
-        'half_day': 'btn-warning',
-        'holiday': 'btn-info'
-    };
-    
-    button.classList.remove('btn-success', 'btn-danger', 'btn-warning', 'btn-info');
-    
-    if (statusColors[status]) {
-        button.classList.add(statusColors[status]);
+function updateCardStatus(employeeId, status) {
+    const card = document.getElementById(`card-${employeeId}`);
+    if (!card) return;
+
+    // Remove all status classes
+    card.classList.remove('status-present', 'status-half_day', 'status-absent', 'status-not_marked');
+
+    // Add current status class
+    if (status && status !== 'not_marked') {
+        card.classList.add(`status-${status}`);
+    }
+
+    // Update status text
+    const statusElement = card.querySelector('.employee-status');
+    if (statusElement) {
+        const statusText = statusLabel(status);
+        statusElement.innerHTML = `
+            <span class="status-indicator status-${status}"></span>
+            ${statusText}
+            ${card.dataset.isLeft === 'true' ? '<span class="left-badge"><i class="fas fa-sign-out-alt me-1"></i>Left</span>' : ''}
+            ${statusElement.querySelector('.notes-badge') ? statusElement.querySelector('.notes-badge').outerHTML : ''}
+        `;
+    }
+}
+
+// 'half_day' -> 'Half Day', as the template renders it
+function statusLabel(status) {
+    return status.split('_').map(word => word.charAt(0).toUpperCase() + word.slice(1)).join(' ');
+}
+
+function handleAdvanceChange(employeeId) {
+    const card = document.getElementById(`card-${employeeId}`);
+    const canMark = card ? card.dataset.canMark === 'true' : true;
+
+    if (!canMark) {
+        showNotification('Cannot modify advance for left employee', 'error');
+        return;
+    }
+
+    employeeChanges.add(employeeId);
+
+    // Enable individual apply button for advance
+    const singleApplyBtn = document.querySelector(`.btn-apply[data-employee="${employeeId}"]`);
+    if (singleApplyBtn) {
+        singleApplyBtn.disabled = false;
+        singleApplyBtn.classList.add('btn-info');
+    }
+
+    updateCardAdvanceAppearance(employeeId);
+    updateGlobalApplyButton();
+}
+
+function handleNotesChange(employeeId) {
+    notesChanges.add(employeeId);
+    updateCardNotesAppearance(employeeId);
+}
+
+function updateCardAdvanceAppearance(employeeId) {
+    const card = document.getElementById(`card-${employeeId}`);
+    if (!card) return;
+
+    const hasAdvanceChanges = employeeChanges.has(employeeId);
+    const hasAdvance = getCurrentAdvance(employeeId) > 0;
+
+    // Reset advance classes
+    card.classList.remove('advance-changed', 'has-advance');
+
+    // Add appropriate classes
+    if (hasAdvanceChanges) {
+        card.classList.add('advance-changed');
     }
 }
 
+function updateCardNotesAppearance(employeeId) {
+    const card = document.getElementById(`card-${employeeId}`);
+    if (!card) return;
+
+    const hasNotesChanges = notesChanges.has(employeeId);
+
+    if (hasNotesChanges) {
+        card.classList.add('notes-changed');
+    } else {
+        card.classList.remove('notes-changed');
+    }
+}
+
+function updateGlobalApplyButton() {
+    const applyBtn = document.getElementById('applyChanges');
+    const hasChanges = employeeChanges.size > 0;
+
+    applyBtn.disabled = !hasChanges;
+
+    if (hasChanges) {
+        applyBtn.innerHTML = `<i class="fas fa-check me-1"></i> Apply UPPAD (${employeeChanges.size})`;
+        applyBtn.classList.remove('btn-secondary');
+        applyBtn.classList.add('btn-info');
+    } else {
+        applyBtn.innerHTML = `<i class="fas fa-check me-1"></i> Apply UPPAD`;
+        applyBtn.classList.remove('btn-info');
+        applyBtn.classList.add('btn-secondary');
+    }
+}
+
+function getCurrentStatus(employeeId) {
+    const activeOption = document.querySelector(`.status-option[data-employee="${employeeId}"].active`);
+    return activeOption ? activeOption.dataset.status : 'not_marked';
+}
+
+function getCurrentAdvance(employeeId) {
+    const advanceInput = document.getElementById(`advance_${employeeId}`);
+    return advanceInput ? parseFloat(advanceInput.value) || 0 : 0;
+}
+
+function getCurrentNotesForEmployee(employeeId) {
+    // Get notes from the stored data attribute
+    const card = document.getElementById(`card-${employeeId}`);
+    return card ? card.getAttribute('data-original-notes') || '' : '';
+}
+
+function updateTotalAdvance() {
+    let totalAdvance = 0;
+    document.querySelectorAll('.advance-input').forEach(input => {
+        totalAdvance += parseFloat(input.value) || 0;
+    });
+    document.getElementById('totalAdvance').textContent = totalAdvance;
+}
+
+function showNotesModal(employeeId, employeeName) {
+    const card = document.getElementById(`card-${employeeId}`);
+    const canMark = card ? card.dataset.canMark === 'true' : true;
+
+    if (!canMark) {
+        showNotification('Cannot modify notes for left employee', 'error');
+        return;
+    }
+
+    currentEmployeeId = employeeId;
+    document.getElementById('notesModalTitle').textContent = `Notes for ${employeeName}`;
+
+    // Load existing notes from server
+    showLoading();
+    const date = document.getElementById('datePicker').value;
+
+    fetch(ATTENDANCE_URLS.getAttendanceNotes, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            },
+        body: JSON.stringify({
+            employee_id: employeeId,
+            date: date
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            document.getElementById('notesInput').value = data.notes || '';
+            // Store original notes value
+            document.getElementById('notesInput').setAttribute('data-original-value', data.notes || '');
+        } else {
+            showNotification('Error loading notes: ' + data.message, 'error');
+            document.getElementById('notesInput').value = '';
+        }
+    })
+    .catch(error => {
+        showNotification('Network error loading notes', 'error');
+        document.getElementById('notesInput').value = '';
+    })
+    .finally(() => {
+        hideLoading();
+        notesModal.show();
+    });
+}
+
+function saveNotes() {
+    if (currentEmployeeId) {
+        saveNotesSilently();
+        notesModal.hide();
+        showNotification('Notes saved successfully', 'success');
+    }
+}
+
+function saveNotesSilently() {
+    if (currentEmployeeId) {
+        const notes = document.getElementById('notesInput').value;
+        const originalNotes = document.getElementById('notesInput').getAttribute('data-original-value') || '';
+
+        // Check if notes actually changed
+        if (notes !== originalNotes) {
+            // Update the card's data attribute
+            const card = document.getElementById(`card-${currentEmployeeId}`);
+            if (card) {
+                card.setAttribute('data-original-notes', notes);
+            }
+
+            // Update notes indicator
+            updateNotesIndicator(currentEmployeeId, notes);
+
+            // Save to database
+            saveNotesToDatabase(currentEmployeeId, notes);
+
+            handleNotesChange(currentEmployeeId);
+        }
+    }
+}
+
+function saveNotesToDatabase(employeeId, notes) {
+    const date = document.getElementById('datePicker').value;
+    const status = getCurrentStatus(employeeId);
+    const advance = getCurrentAdvance(employeeId);
+
+    showLoading();
+    fetch(ATTENDANCE_URLS.updateAttendance, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            },
+        body: JSON.stringify({
+            employee_id: employeeId,
+            date: date,
+            status: status,
+            notes: notes,
+            advance: advance
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            // Update the original value to prevent showing as changed again
+            document.getElementById('notesInput').setAttribute('data-original-value', notes);
+            notesChanges.delete(employeeId);
+            updateCardNotesAppearance(employeeId);
+        } else {
+            console.error('Error saving notes:', data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Network error saving notes:', error);
+    })
+    .finally(() => {
+        hideLoading();
+    });
+}
+
+function updateNotesIndicator(employeeId, notes) {
+    const card = document.getElementById(`card-${employeeId}`);
+    if (!card) return;
+
+    const statusElement = card.querySelector('.employee-status');
+    if (statusElement) {
+        // Remove existing notes badge
+        const existingBadge = statusElement.querySelector('.notes-badge');
+        if (existingBadge) {
+            existingBadge.remove();
+        }
+
+        // Add notes badge if there are notes
+        if (notes && notes.trim() !== '') {
+            const notesBadge = document.createElement('span');
+            notesBadge.className = 'badge bg-secondary notes-badge';
+            notesBadge.title = 'Has notes';
+            notesBadge.innerHTML = '<i class="fas fa-sticky-note"></i>';
+            statusElement.appendChild(notesBadge);
+            card.classList.add('has-notes');
+        } else {
+            card.classList.remove('has-notes');
+        }
+    }
+}
+
+function applyAdvanceForEmployee(employeeId) {
+    const card = document.getElementById(`card-${employeeId}`);
+    const canMark = card ? card.dataset.canMark === 'true' : true;
+
+    if (!canMark) {
+        showNotification('Cannot apply advance for left employee', 'error');
+        return;
+    }
+
+    const advance = getCurrentAdvance(employeeId);
+    const status = getCurrentStatus(employeeId);
+    const notes = getCurrentNotesForEmployee(employeeId);
+    const date = document.getElementById('datePicker').value;
+
+    showLoading();
+    updateAttendance(employeeId, date, status, notes, advance, true);
+}
+
+function applyAllAdvanceChanges() {
+    if (employeeChanges.size === 0) {
+        showNotification('No advance changes to apply', 'warning');
+        return;
+    }
+
+    const date = document.getElementById('datePicker').value;
+    const changes = Array.from(employeeChanges);
+    const records = [];
+
+    changes.forEach(employeeId => {
+        const card = document.getElementById(`card-${employeeId}`);
+        const canMark = card ? card.dataset.canMark === 'true' : true;
+
+        if (!canMark) {
+            return;
+        }
+
+        records.push({
+            employee_id: employeeId,
+            date: date,
+            status: getCurrentStatus(employeeId),
+            notes: getCurrentNotesForEmployee(employeeId),
+            advance: getCurrentAdvance(employeeId)
+        });
+    });
+
+    if (records.length === 0) {
+        showNotification(`Applied 0 of ${changes.length} advance changes`, 'warning');
+        return;
+    }
+
+    showLoading();
+    updateAttendanceBatch(records)
+        .then(results => {
+            let successCount = 0;
+            results.forEach(result => {
+                if (!result.success) return;
+                const employeeId = String(result.employee_id);
+                const advanceInput = document.getElementById(`advance_${employeeId}`);
+                if (advanceInput) {
+                    advanceInput.setAttribute('data-original-value', advanceInput.value || '0');
+                }
+                employeeChanges.delete(employeeId);
+                updateCardAdvanceAppearance(employeeId);
+                successCount++;
+            });
+            updateGlobalApplyButton();
+
+            if (successCount === changes.length) {
+                showNotification(`Successfully applied ${successCount} advance changes`, 'success');
+            } else {
+                showNotification(`Applied ${successCount} of ${changes.length} advance changes`, 'warning');
+            }
+        })
+        .finally(() => {
+            hideLoading();
+        });
+}
+
+// Save many employee/date rows in one request; resolves to the per-row results
+function updateAttendanceBatch(records) {
+    return fetch(ATTENDANCE_URLS.updateAttendanceBatch, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ records: records })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.results) {
+            showNotification('Error: ' + data.message, 'error');
+            return [];
+        }
+        data.results.forEach(result => {
+            if (!result.success) {
+                console.error(`Attendance for employee ${result.employee_id} not saved:`, result.message);
+            }
+        });
+        return data.results;
+    })
+    .catch(error => {
+        showNotification('Network error', 'error');
+        return [];
+    });
+}
+
+function updateAttendance(employeeId, date, status, notes, advance, isSingle) {
+    return fetch(ATTENDANCE_URLS.updateAttendance, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            employee_id: employeeId,
+            date: date,
+            status: status,
+            notes: notes,
+            advance: advance
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            if (isSingle) {
+                // Update original values for advance
+                const advanceInput = document.getElementById(`advance_${employeeId}`);
+                if (advanceInput) {
+                    advanceInput.setAttribute('data-original-value', advance || '0');
+                }
+
+                employeeChanges.delete(employeeId);
+                updateCardAdvanceAppearance(employeeId);
+                updateGlobalApplyButton();
+                showNotification('Advance applied successfully', 'success');
+            }
+            return true;
+        } else {
+            showNotification('Error: ' + data.message, 'error');
+            return false;
+        }
+    })
+    .catch(error => {
+        showNotification('Network error', 'error');
+        return false;
+    })
+    .finally(() => {
+        hideLoading();
+    });
+}
+
 function showNotification(message, type) {
+    const icon = type === 'error' ? 'exclamation-triangle' : 
+                type === 'warning' ? 'exclamation-circle' : 
+                type === 'info' ? 'info-circle' : 'check-circle';
+
     const notification = document.createElement('div');
-    notification.className = `alert alert-${type === 'error' ? 'danger' : 'success'} alert-dismissible fade show`;
+    notification.className = `alert alert-${type} alert-dismissible fade show position-fixed`;
+    notification.style.cssText = 'top: 20px; right: 20px; left: 20px; z-index: 1060;';
     notification.innerHTML = `
-        ${message}
-        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        <div class="d-flex align-items-center">
+            <i class="fas fa-${icon} me-2"></i>
+            <span class="flex-grow-1">${message}</span>
+            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        </div>
     `;
-    
-    const container = document.querySelector('.container');
-    container.insertBefore(notification, container.firstChild);
-    
+
+    document.body.appendChild(notification);
+
     setTimeout(() => {
-        if (notification.parentNode) {
-            notification.parentNode.removeChild(notification);
+        if (notification.parentElement) {
+            notification.remove();
         }
     }, 3000);
-}
\ No newline at end of file
+}
+
+function showLoading() {
+    document.body.classList.add('loading');
+}
+
+function hideLoading() {
+    document.body.classList.remove('loading');
+}
+
+// Utility function for debouncing
+function debounce(func, wait) {
+    let timeout;
+    return function executedFunction(...args) {
+        const later = () => {
+            clearTimeout(timeout);
+            func(...args);
+        };
+        clearTimeout(timeout);
+        timeout = setTimeout(later, wait);
+    };
+}
+
+// Handle page visibility changes
+document.addEventListener('visibilitychange', function() {
+    if (!document.hidden) {
+        // Page became visible, refresh data if needed
+        updateTotalAdvance();
+    }
+});
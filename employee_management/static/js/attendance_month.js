@@ -0,0 +1,250 @@
+// Attendance month grid - every employee x day from /api/attendance/grid, edited through /update_attendance_batch
+
+const GRID_CONFIG = JSON.parse(document.getElementById('monthGridConfig').textContent);
+
+// Cell codes of attendance_grid.py
+const CODE_STATUS = { '0': 'not_marked', '1': 'present', '2': 'half_day', '3': 'absent' };
+const STATUS_CODE = { not_marked: '0', present: '1', half_day: '2', absent: '3' };
+const CODE_LABEL = { '0': '', '1': 'P', '2': 'H', '3': 'A' };
+const NEXT_CODE = { '0': '1', '1': '2', '2': '3', '3': '0' };
+const NOT_EMPLOYED = '-';
+const SAVE_DELAY = 800;  // ms of quiet before the pending cells are sent as one batch
+
+let grid = null;
+const pending = new Map();  // "employeeId:day" -> code not yet saved
+let saveTimer = null;
+let saving = false;
+
+document.addEventListener('DOMContentLoaded', function () {
+    document.getElementById('monthPicker').addEventListener('change', function () {
+        if (this.value) {
+            window.location.href = `${GRID_CONFIG.attendance}?view=month&month=${this.value}`;
+        }
+    });
+
+    // Save what is pending before the page goes away
+    window.addEventListener('beforeunload', function (event) {
+        if (pending.size > 0 || saving) {
+            event.preventDefault();
+            event.returnValue = '';
+        }
+    });
+
+    loadGrid().then(connectLiveUpdates);
+});
+
+function setStatus(text) {
+    document.getElementById('gridStatus').textContent = text;
+}
+
+function loadGrid() {
+    setStatus('Loading...');
+    // The browser revalidates with If-None-Match - an unchanged month answers 304
+    return fetch(`${GRID_CONFIG.grid}?month=${encodeURIComponent(GRID_CONFIG.month)}`, {
+        headers: { 'Accept': 'application/json' }
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                setStatus('Error: ' + data.message);
+                return;
+            }
+            grid = data;
+            renderGrid();
+            setStatus('');
+        })
+        .catch(error => {
+            console.error('Loading the month grid failed:', error);
+            setStatus('Network error');
+        });
+}
+
+function dateOf(day) {
+    return `${grid.month}-${String(day).padStart(2, '0')}`;
+}
+
+function renderGrid() {
+    const table = document.getElementById('monthGrid');
+    table.innerHTML = '';
+    document.getElementById('gridEmpty').classList.toggle('d-none', grid.employees.length > 0);
+    if (!grid.employees.length) return;
+
+    const weekdays = ['M', 'T', 'W', 'T', 'F', 'S', 'S'];
+    const head = table.createTHead().insertRow();
+    head.appendChild(document.createElement('th')).className = 'employee-col';
+    for (let day = 1; day <= grid.days; day++) {
+        const weekday = (grid.first_weekday + day - 1) % 7;
+        const th = document.createElement('th');
+        th.innerHTML = `${weekdays[weekday]}<br>${day}`;
+        if (weekday === 6) th.classList.add('weekend');
+        head.appendChild(th);
+    }
+    const totalsHead = document.createElement('th');
+    totalsHead.textContent = 'P / H / A';
+    head.appendChild(totalsHead);
+
+    const body = table.createTBody();
+    grid.employees.forEach(employee => {
+        const tr = body.insertRow();
+        tr.dataset.employee = employee.id;
+
+        const name = tr.insertCell();
+        name.className = 'employee-col';
+        name.textContent = employee.name;
+
+        const advances = employee.advances || {};
+        for (let day = 1; day <= grid.days; day++) {
+            const cell = document.createElement('button');
+            cell.type = 'button';
+            cell.id = `cell-${employee.id}-${day}`;
+            cell.dataset.employee = employee.id;
+            cell.dataset.day = day;
+            cell.title = `${employee.name} - ${dateOf(day)}`;
+            if (advances[day]) {
+                cell.classList.add('has-advance');
+                cell.title += ` - UPPAD ₹${advances[day]}`;
+            }
+            tr.insertCell().appendChild(cell);
+            setCellCode(cell, employee.row[day - 1]);
+            cell.addEventListener('click', onCellClick);
+        }
+
+        const totals = tr.insertCell();
+        totals.className = 'totals-col';
+        totals.id = `totals-${employee.id}`;
+        updateTotals(employee.id);
+    });
+}
+
+function setCellCode(cell, code) {
+    cell.className = cell.className.replace(/\bcode-\S*/g, '').trim();
+    cell.classList.add('grid-cell', code === NOT_EMPLOYED ? 'code-none' : `code-${code}`);
+    cell.dataset.code = code;
+    cell.textContent = CODE_LABEL[code] || '';
+    cell.disabled = code === NOT_EMPLOYED;
+}
+
+function updateTotals(employeeId) {
+    const counts = { '1': 0, '2': 0, '3': 0 };
+    document.querySelectorAll(`.grid-cell[data-employee="${employeeId}"]`).forEach(cell => {
+        if (counts[cell.dataset.code] !== undefined) counts[cell.dataset.code]++;
+    });
+    const totals = document.getElementById(`totals-${employeeId}`);
+    if (totals) totals.textContent = `${counts['1']} / ${counts['2']} / ${counts['3']}`;
+}
+
+function onCellClick() {
+    if (this.dataset.code === NOT_EMPLOYED) return;
+
+    const code = NEXT_CODE[this.dataset.code];
+    const key = `${this.dataset.employee}:${this.dataset.day}`;
+    if (!this.dataset.saved) {
+        this.dataset.saved = this.dataset.code;  // To revert to if the write fails
+    }
+    setCellCode(this, code);
+    this.classList.add('pending');
+    pending.set(key, code);
+    updateTotals(this.dataset.employee);
+
+    clearTimeout(saveTimer);
+    saveTimer = setTimeout(savePending, SAVE_DELAY);
+    setStatus(`${pending.size} unsaved`);
+}
+
+function savePending() {
+    if (saving) {
+        // One batch at a time - try again when the current one is done
+        saveTimer = setTimeout(savePending, SAVE_DELAY);
+        return;
+    }
+    if (pending.size === 0) return;
+
+    const entries = Array.from(pending.entries()).slice(0, GRID_CONFIG.maxBatchRows);
+    entries.forEach(([key]) => pending.delete(key));
+
+    // Status only - the batch endpoint keeps each row's notes and advance
+    const records = entries.map(([key, code]) => {
+        const [employeeId, day] = key.split(':');
+        return { employee_id: Number(employeeId), date: dateOf(Number(day)), status: CODE_STATUS[code] };
+    });
+
+    saving = true;
+    setStatus('Saving...');
+    fetch(GRID_CONFIG.updateAttendanceBatch, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ records: records })
+    })
+        .then(response => response.json())
+        .then(data => {
+            const results = data.results || records.map(() => ({ success: false, message: data.message }));
+            let failed = 0;
+            results.forEach((result, index) => {
+                const [key, code] = entries[index];
+                finishCell(key, code, result.success);
+                if (!result.success) failed++;
+            });
+            setStatus(failed ? `${failed} not saved: ${results.find(r => !r.success).message}` : 'Saved');
+        })
+        .catch(error => {
+            console.error('Saving the month grid failed:', error);
+            entries.forEach(([key, code]) => finishCell(key, code, false));
+            setStatus('Network error - changes not saved');
+        })
+        .finally(() => {
+            saving = false;
+            if (pending.size > 0) {
+                saveTimer = setTimeout(savePending, SAVE_DELAY);
+            }
+        });
+}
+
+function finishCell(key, code, success) {
+    if (pending.has(key)) return;  // Clicked again meanwhile - the newer value is still to be saved
+
+    const [employeeId, day] = key.split(':');
+    const cell = document.getElementById(`cell-${employeeId}-${day}`);
+    if (!cell) return;
+
+    cell.classList.remove('pending');
+    if (!success) {
+        setCellCode(cell, cell.dataset.saved);
+        updateTotals(employeeId);
+    }
+    delete cell.dataset.saved;
+}
+
+// Follow attendance marked in other tabs / by other users
+function connectLiveUpdates() {
+    if (!GRID_CONFIG.events || !window.EventSource || !grid) return;
+
+    const source = new EventSource(GRID_CONFIG.events);
+    source.addEventListener('attendance', function (event) {
+        const update = JSON.parse(event.data);
+        const inMonth = Object.keys(update.dates).some(date => date.startsWith(grid.month + '-'));
+        if (!inMonth) return;
+        if (update.truncated) {
+            loadGrid();
+            return;
+        }
+        update.rows.forEach(applyLiveRow);
+    });
+    source.addEventListener('resync', function () {
+        // Events were dropped - fetch the month again (cheap when nothing changed)
+        source.close();
+        loadGrid().then(connectLiveUpdates);
+    });
+}
+
+function applyLiveRow(row) {
+    if (!row.date.startsWith(grid.month + '-')) return;
+
+    const day = Number(row.date.slice(8));
+    const cell = document.getElementById(`cell-${row.employee_id}-${day}`);
+    // Unsaved clicks on this page win over the pushed row
+    if (!cell || cell.dataset.saved !== undefined || cell.dataset.code === NOT_EMPLOYED) return;
+
+    setCellCode(cell, STATUS_CODE[row.status]);
+    cell.classList.toggle('has-advance', row.advance > 0);
+    updateTotals(row.employee_id);
+}
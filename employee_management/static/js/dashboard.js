@@ -0,0 +1,143 @@
+// Dashboard page JavaScript
+
+document.addEventListener('DOMContentLoaded', function () {
+    // Update current date
+    const now = new Date();
+    const options = { weekday: 'long', year: 'numeric', month: 'long', day: 'numeric' };
+    const dateString = now.toLocaleDateString('en-US', options);
+
+    document.getElementById('welcomeDate').textContent = dateString;
+
+    // Add loading animation to elements
+    const elements = document.querySelectorAll('.fade-in');
+    elements.forEach((element, index) => {
+        element.style.animationDelay = `${index * 0.1}s`;
+    });
+
+    // Set progress bar widths from data attributes with animation
+    document.querySelectorAll('.progress-bar[data-width]').forEach(bar => {
+        const width = bar.dataset.width;
+        // Animate the progress bar after a short delay
+        setTimeout(() => {
+            bar.style.width = width + '%';
+        }, 300);
+    });
+
+    // Follow attendance marked in other tabs / by other users
+    connectLiveUpdates();
+
+    // Auto-dismiss flash messages after 5 seconds
+    const flashMessages = document.getElementById('flash-messages');
+    if (flashMessages) {
+        setTimeout(() => {
+            const alerts = flashMessages.querySelectorAll('.alert');
+            alerts.forEach(alert => {
+                const bsAlert = new bootstrap.Alert(alert);
+                bsAlert.close();
+            });
+        }, 5000);
+    }
+});
+
+const DASHBOARD_CONFIG = JSON.parse(document.getElementById('dashboardConfig').textContent);
+const RECENT_ACTIVITY_LIMIT = 5;
+
+function connectLiveUpdates() {
+    if (!DASHBOARD_CONFIG.events || !window.EventSource) return;
+
+    const source = new EventSource(DASHBOARD_CONFIG.events);
+    source.addEventListener('attendance', function (event) {
+        applyLiveUpdate(JSON.parse(event.data));
+    });
+    source.addEventListener('resync', function () {
+        // Events were dropped - reload for figures that are certainly current
+        source.close();
+        location.reload();
+    });
+}
+
+function applyLiveUpdate(update) {
+    // A page left open past midnight shows yesterday's "present today"
+    if (update.today !== DASHBOARD_CONFIG.today) return;
+
+    if (update.present_today !== undefined) {
+        document.querySelectorAll('.js-present-today').forEach(element => {
+            element.textContent = update.present_today;
+        });
+        const total = DASHBOARD_CONFIG.totalEmployees;
+        const percentage = total > 0 ? Math.round(update.present_today / total * 1000) / 10 : 0;
+        const bar = document.querySelector('.progress-bar[data-width]');
+        if (bar) {
+            bar.dataset.width = percentage;
+            bar.style.width = percentage + '%';
+        }
+        const text = document.getElementById('attendance-text');
+        if (text) {
+            text.textContent = `${percentage}% attendance today`;
+        }
+    }
+
+    if (update.month_salary !== undefined) {
+        document.querySelectorAll('.js-month-salary').forEach(element => {
+            element.textContent = '₹' + update.month_salary.toFixed(2);
+        });
+    }
+
+    if (update.truncated) return;
+
+    // Deleted rows leave the activity list; written ones move to the top
+    update.rows.forEach(row => {
+        removeActivity(`${row.employee_id}:${row.date}`);
+    });
+    update.activity.slice().reverse().forEach(prependActivity);
+}
+
+function activityList() {
+    const container = document.getElementById('recentActivity');
+    let list = container.querySelector('.list-group');
+    if (!list) {
+        // Replace the "No Recent Activity" placeholder
+        container.innerHTML = '';
+        list = document.createElement('div');
+        list.className = 'list-group list-group-flush';
+        container.appendChild(list);
+    }
+    return list;
+}
+
+function removeActivity(key) {
+    document.querySelectorAll('#recentActivity .activity-item').forEach(item => {
+        if (item.dataset.key === key) item.remove();
+    });
+}
+
+function prependActivity(activity) {
+    const list = activityList();
+
+    const item = document.createElement('div');
+    item.className = 'list-group-item activity-item px-0';
+    item.dataset.key = activity.key;
+    item.innerHTML = `
+        <div class="d-flex w-100 justify-content-between align-items-start">
+            <div class="flex-grow-1">
+                <h6 class="mb-1"></h6>
+                <div class="d-flex align-items-center mt-1">
+                    <span class="badge me-2"></span>
+                    <small class="text-muted"><i class="fas fa-clock me-1"></i><span class="activity-time"></span></small>
+                </div>
+            </div>
+            <small class="text-muted text-nowrap ms-2 activity-day"></small>
+        </div>
+    `;
+    item.querySelector('h6').textContent = activity.name;
+    const badge = item.querySelector('.badge');
+    badge.classList.add(`status-${activity.status}`);
+    badge.textContent = activity.status.split('_').map(word => word.charAt(0).toUpperCase() + word.slice(1)).join(' ');
+    item.querySelector('.activity-time').textContent = activity.time;
+    item.querySelector('.activity-day').textContent = activity.day;
+
+    list.prepend(item);
+    while (list.children.length > RECENT_ACTIVITY_LIMIT) {
+        list.lastElementChild.remove();
+    }
+}
@@ -0,0 +1,154 @@
+// Employee typeahead - asks /api/employees/search instead of embedding every employee in the page
+//
+// Markup:
+//   <div class="employee-typeahead" data-search-url="..." [data-submit-on-select="true"] [data-required="true"]>
+//     <input type="hidden" name="employee_id" value="...">
+//     <input type="text" class="form-control typeahead-input" value="...">
+//     <div class="dropdown-menu typeahead-menu"></div>
+//   </div>
+
+function initEmployeeTypeahead(container) {
+    const input = container.querySelector('.typeahead-input');
+    const hidden = container.querySelector('input[type="hidden"]');
+    const menu = container.querySelector('.typeahead-menu');
+    const form = container.closest('form');
+    const submitOnSelect = container.dataset.submitOnSelect === 'true';
+
+    let selectedId = hidden.value;
+    let selectedName = input.value;
+    let results = [];
+    let active = -1;
+    let timer = null;
+    let controller = null;
+
+    function close() {
+        menu.classList.remove('show');
+        input.setAttribute('aria-expanded', 'false');
+        active = -1;
+    }
+
+    function render() {
+        menu.innerHTML = '';
+        if (!results.length) {
+            const empty = document.createElement('span');
+            empty.className = 'dropdown-item-text text-muted';
+            empty.textContent = 'No employees found';
+            menu.appendChild(empty);
+        }
+        results.forEach((employee, index) => {
+            const item = document.createElement('button');
+            item.type = 'button';
+            item.className = 'dropdown-item' + (index === active ? ' active' : '');
+            item.textContent = employee.name + (employee.status === 'left' ? ' (Left)' : '');
+            if (employee.mobile_number) {
+                const mobile = document.createElement('small');
+                mobile.className = 'text-muted ms-2';
+                mobile.textContent = employee.mobile_number;
+                item.appendChild(mobile);
+            }
+            // mousedown fires before the input's blur closes the menu
+            item.addEventListener('mousedown', event => {
+                event.preventDefault();
+                select(employee);
+            });
+            menu.appendChild(item);
+        });
+        menu.classList.add('show');
+        input.setAttribute('aria-expanded', 'true');
+    }
+
+    function select(employee) {
+        selectedId = hidden.value = String(employee.id);
+        selectedName = input.value = employee.name;
+        input.classList.remove('is-invalid');
+        close();
+        if (submitOnSelect && form) {
+            form.submit();
+        }
+    }
+
+    function search() {
+        const q = input.value.trim();
+        if (controller) {
+            controller.abort();
+        }
+        if (!q) {
+            results = [];
+            close();
+            return;
+        }
+        controller = new AbortController();
+        fetch(`${container.dataset.searchUrl}?q=${encodeURIComponent(q)}`, {
+            signal: controller.signal,
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    results = data.employees;
+                    active = results.length ? 0 : -1;
+                    render();
+                }
+            })
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    console.error('Employee search failed:', error);
+                }
+            });
+    }
+
+    input.addEventListener('input', function () {
+        hidden.value = '';
+        clearTimeout(timer);
+        timer = setTimeout(search, 200);
+    });
+
+    input.addEventListener('keydown', function (event) {
+        const open = menu.classList.contains('show');
+        if (event.key === 'ArrowDown' && results.length) {
+            event.preventDefault();
+            active = (active + 1) % results.length;
+            render();
+        } else if (event.key === 'ArrowUp' && results.length) {
+            event.preventDefault();
+            active = (active - 1 + results.length) % results.length;
+            render();
+        } else if (event.key === 'Enter' && open && active >= 0) {
+            event.preventDefault();
+            select(results[active]);
+        } else if (event.key === 'Escape' && open) {
+            close();
+        }
+    });
+
+    input.addEventListener('blur', function () {
+        close();
+        if (!input.value.trim()) {
+            // Cleared - e.g. back to "All Employees" on the report page
+            const hadSelection = selectedId !== '';
+            selectedId = hidden.value = '';
+            selectedName = input.value = '';
+            if (submitOnSelect && hadSelection && form) {
+                form.submit();
+            }
+        } else if (!hidden.value) {
+            // Typed but nothing picked - keep the previous choice
+            hidden.value = selectedId;
+            input.value = selectedName;
+        }
+    });
+
+    if (form && container.dataset.required === 'true') {
+        form.addEventListener('submit', function (event) {
+            if (!hidden.value) {
+                event.preventDefault();
+                input.classList.add('is-invalid');
+                input.focus();
+            }
+        });
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('.employee-typeahead').forEach(initEmployeeTypeahead);
+});
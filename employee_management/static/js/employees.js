@@ -0,0 +1,33 @@
+// Employees page JavaScript
+
+document.addEventListener('DOMContentLoaded', function () {
+    // Search and filters run on the server - resubmit the form when they change
+    const filters = document.getElementById('employeeFilters');
+    const searchInput = document.getElementById('searchInput');
+    let searchTimer = null;
+
+    if (filters) {
+        filters.querySelectorAll('select').forEach(select => {
+            select.addEventListener('change', () => filters.submit());
+        });
+    }
+
+    if (searchInput) {
+        searchInput.addEventListener('input', function () {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => filters.submit(), 400);
+        });
+
+        // Keep focus (and the caret at the end) after the page reloads with results
+        setTimeout(() => {
+            searchInput.focus();
+            searchInput.setSelectionRange(searchInput.value.length, searchInput.value.length);
+        }, 300);
+    }
+
+    // Add loading animation to cards
+    const cards = document.querySelectorAll('.employee-card, #employeesTable tbody tr');
+    cards.forEach((card, index) => {
+        card.style.animationDelay = `${index * 0.05}s`;
+    });
+});
@@ -0,0 +1,21 @@
+// Report page JavaScript
+
+// Show loading spinner when changing reports
+document.addEventListener('DOMContentLoaded', function () {
+    const links = document.querySelectorAll('a[href*="type="]');
+    links.forEach(link => {
+        link.addEventListener('click', function () {
+            document.getElementById('loadingSpinner').style.display = 'block';
+        });
+    });
+
+    // Hide loading spinner after page load
+    window.addEventListener('load', function () {
+        document.getElementById('loadingSpinner').style.display = 'none';
+    });
+});
+
+// Auto-hide loading spinner after 5 seconds (fallback)
+setTimeout(function () {
+    document.getElementById('loadingSpinner').style.display = 'none';
+}, 5000);
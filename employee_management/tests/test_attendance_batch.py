@@ -0,0 +1,56 @@
+"""Per-row validation of /update_attendance_batch records"""
+import attendance_batch
+
+
+def test_mixed_batch_fails_only_the_bad_rows():
+    records = [
+        {'employee_id': 1, 'date': '2025-03-05', 'status': 'present', 'notes': 'ok', 'advance': '250.50'},
+        {'employee_id': 2, 'date': 20250305, 'status': 'present'},
+        {'employee_id': 3, 'date': '2025-03-05', 'status': 'absent', 'advance': 'lots'},
+        {'employee_id': 4, 'date': '2025-02-30', 'status': 'present'},
+        {'employee_id': 5, 'date': '2025-3-5', 'status': 'half_day'},
+        {'employee_id': 6, 'date': '0999-12-31', 'status': 'present'},
+        {'employee_id': 7, 'date': '2025-03-05', 'status': 'late'},
+        {'employee_id': 'x', 'date': '2025-03-05', 'status': 'present'},
+        {'employee_id': 8, 'date': '2025-03-05', 'status': 'present', 'advance': 'nan'},
+        {'employee_id': 9, 'date': '2025-03-05'},
+        'not a record',
+    ]
+
+    results, rows = attendance_batch.validate(records)
+
+    assert len(results) == len(records)
+    messages = [result['message'] for result in results]
+    assert messages[0] == ''
+    assert messages[1].startswith('Invalid date')
+    assert messages[2].startswith('Invalid advance')
+    assert messages[3].startswith('Invalid date')
+    assert messages[4] == ''
+    assert messages[5].startswith('Invalid date')
+    assert messages[6] == 'Invalid status: late'
+    assert messages[7] == 'Invalid employee ID'
+    assert messages[8].startswith('Invalid advance')
+    assert messages[9] == ''
+    assert messages[10] == 'Employee ID and date are required'
+    assert not any(result['success'] for result in results)
+
+    valid = {row['employee_id']: row for _, row in rows}
+    assert sorted(valid) == [1, 5, 9]
+    assert valid[1]['advance'] == 250.5
+    assert (valid[1]['keep_notes'], valid[1]['keep_advance']) == (False, False)
+    # Non-padded dates reach the counters as the ISO string MySQL stores
+    assert valid[5]['date'] == '2025-03-05'
+    assert (valid[5]['keep_notes'], valid[5]['keep_advance']) == (True, True)
+    assert valid[9]['status'] == 'not_marked'
+    # Each pair shares the result dict returned for its record
+    assert [id(result) for result, _ in rows] == [id(results[0]), id(results[4]), id(results[9])]
+
+
+def test_advance_parsing():
+    assert attendance_batch.parse_advance(None) == 0.0
+    assert attendance_batch.parse_advance('') == 0.0
+    assert attendance_batch.parse_advance(100) == 100.0
+    assert attendance_batch.parse_advance('12.345') == 12.35
+    assert attendance_batch.parse_advance(True) is None
+    assert attendance_batch.parse_advance('inf') is None
+    assert attendance_batch.parse_advance(10 ** 8) is None
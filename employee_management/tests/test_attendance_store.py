@@ -0,0 +1,43 @@
+"""Per-week counts of the weekly salary report from the packed store"""
+from datetime import date
+
+import pytest
+
+import attendance_store
+
+
+def row_week_counts(rows, month):
+    """Per-week counts the way build_report counted them before: one row at a time"""
+    totals = {}
+    for emp_id, attendance_date, status, advance in rows:
+        if attendance_date.strftime('%Y-%m') != month:
+            continue
+        week = totals.setdefault((emp_id, attendance_date.isocalendar()[1]),
+                                 {'present_days': 0, 'half_days': 0, 'absent_days': 0})
+        if status == 'present':
+            week['present_days'] += 1
+        elif status == 'half_day':
+            week['half_days'] += 1
+        elif status == 'absent':
+            week['absent_days'] += 1
+    return totals
+
+
+@pytest.mark.parametrize('month', ['2024-02', '2024-12', '2025-01', '2025-03', '2025-12'])
+def test_week_totals_match_row_counts(month):
+    rows = attendance_store.synthetic_rows(employees=40, first_day=date(2024, 1, 1), days=731,
+                                           attendance_rate=0.7)
+    store = attendance_store.AttendanceStore.from_rows(rows)
+
+    totals = store.week_totals(month)
+    expected = row_week_counts(rows, month)
+
+    # The store also has all-zero weeks an employee has no rows in - the report never looks those up
+    assert {key: value for key, value in totals.items() if any(value.values())} == expected
+
+
+def test_week_totals_of_month_without_rows():
+    store = attendance_store.AttendanceStore.from_rows([(1, date(2025, 3, 31), 'present', 0)])
+
+    assert store.week_totals('2025-04') == {}
+    assert store.week_totals('2025-03')[(1, 14)] == {'present_days': 1, 'half_days': 0, 'absent_days': 0}
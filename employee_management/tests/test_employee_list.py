@@ -0,0 +1,170 @@
+"""Keyset pagination of the employees list"""
+import base64
+from datetime import date
+import json
+
+import pytest
+
+import employee_list
+
+CURSOR_VALUES = {
+    'status': [1, 'Asha Rao', 42],
+    'name': ['Asha Rao', 42],
+    'joining_date': [date(2024, 1, 2), 42],
+}
+
+
+@pytest.mark.parametrize('sort', sorted(employee_list.SORTS))
+def test_cursor_round_trip(sort):
+    cursor = employee_list.encode_cursor(CURSOR_VALUES[sort])
+
+    assert '=' not in cursor
+    assert employee_list.decode_cursor(cursor, sort) == CURSOR_VALUES[sort]
+
+
+def raw_cursor(raw):
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('sort, cursor', [
+    ('name', 'not*base64'),
+    ('name', raw_cursor('{"name": "Asha"}')),
+    ('name', raw_cursor('not json')),
+    ('name', raw_cursor(json.dumps(['Asha Rao', 42, 7]))),  # one value too many
+    ('status', employee_list.encode_cursor(['Asha Rao', 42])),  # cursor of another sort
+    ('joining_date', employee_list.encode_cursor(['yesterday', 42])),
+    ('name', employee_list.encode_cursor(['Asha Rao', 'x'])),
+])
+def test_tampered_cursor_is_rejected(sort, cursor):
+    with pytest.raises(employee_list.InvalidCursor):
+        employee_list.decode_cursor(cursor, sort)
+
+
+def test_after_two_keys():
+    clause, params = employee_list._after(['e.name', 'e.id'], ['Asha Rao', 42], '>')
+
+    assert clause == '((e.name > %s) OR (e.name = %s AND e.id > %s))'
+    assert params == ['Asha Rao', 'Asha Rao', 42]
+
+
+def test_after_three_keys():
+    expressions = ['(e.leaving_date IS NOT NULL)', 'e.name', 'e.id']
+    clause, params = employee_list._after(expressions, [0, 'Asha Rao', 42], '<')
+
+    assert clause == ('(((e.leaving_date IS NOT NULL) < %s)'
+                      ' OR ((e.leaving_date IS NOT NULL) = %s AND e.name < %s)'
+                      ' OR ((e.leaving_date IS NOT NULL) = %s AND e.name = %s AND e.id < %s))')
+    assert params == [0, 0, 'Asha Rao', 0, 'Asha Rao', 42]
+
+
+class FakeCursor:
+    """Returns canned rows for the page query and records what was run"""
+
+    description = [(name,) for name in ('id', 'name', 'is_left')]
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params):
+        self.executed.append((' '.join(sql.split()), params))
+
+    def fetchall(self):
+        return self.rows
+
+
+def page_of(rows, **kwargs):
+    cur = FakeCursor(rows)
+    page = employee_list.load_page(cur, 1, sort='name', limit=2, **kwargs)
+    return page, cur.executed[-1]
+
+
+def test_first_page_links_forward_only():
+    page, (sql, params) = page_of([(1, 'A', 0), (2, 'B', 0), (3, 'C', 0)])
+
+    assert [row['id'] for row in page['employees']] == [1, 2]
+    assert employee_list.decode_cursor(page['next_cursor'], 'name') == ['B', 2]
+    assert page['prev_cursor'] is None
+    assert sql.endswith('ORDER BY e.name ASC, e.id ASC LIMIT %s')
+    assert params == [1, 3]
+
+
+def test_last_page_links_back_only():
+    page, (sql, params) = page_of([(3, 'C', 0)], after=employee_list.encode_cursor(['B', 2]))
+
+    assert [row['id'] for row in page['employees']] == [3]
+    assert page['next_cursor'] is None
+    assert employee_list.decode_cursor(page['prev_cursor'], 'name') == ['C', 3]
+    assert '((e.name > %s) OR (e.name = %s AND e.id > %s))' in sql
+    assert params == [1, 'B', 'B', 2, 3]
+
+
+def test_backwards_page_is_read_in_reverse_and_put_back_in_order():
+    # Rows before ('D', 4), newest first as the flipped ORDER BY returns them
+    page, (sql, params) = page_of([(3, 'C', 0), (2, 'B', 0), (1, 'A', 0)],
+                                  before=employee_list.encode_cursor(['D', 4]))
+
+    assert [row['id'] for row in page['employees']] == [2, 3]
+    assert employee_list.decode_cursor(page['next_cursor'], 'name') == ['C', 3]
+    assert employee_list.decode_cursor(page['prev_cursor'], 'name') == ['B', 2]
+    assert '((e.name < %s) OR (e.name = %s AND e.id < %s))' in sql
+    assert sql.endswith('ORDER BY e.name DESC, e.id DESC LIMIT %s')
+
+
+def test_backwards_to_the_first_page():
+    page, _ = page_of([(1, 'A', 0)], before=employee_list.encode_cursor(['B', 2]))
+
+    assert [row['id'] for row in page['employees']] == [1]
+    assert page['prev_cursor'] is None
+    assert page['next_cursor'] is not None
+
+
+def test_descending_flips_the_comparison():
+    _, (sql, _) = page_of([], descending=True, after=employee_list.encode_cursor(['B', 2]))
+
+    assert '((e.name < %s) OR (e.name = %s AND e.id < %s))' in sql
+    assert sql.endswith('ORDER BY e.name DESC, e.id DESC LIMIT %s')
+
+
+# Against MySQL (needs TEST_MYSQL_DSN)
+
+def expected_ids(cur, user_id, sort, descending, status, q):
+    """The whole filtered list in one ORDER BY, no LIMIT"""
+    where, params = employee_list._filters(user_id, status, q)
+    direction = 'DESC' if descending else 'ASC'
+    cur.execute(f"""
+        SELECT e.id FROM employees e
+        WHERE {' AND '.join(where)}
+        ORDER BY {', '.join(f'{expression} {direction}' for expression, _, _ in employee_list.SORTS[sort])}
+    """, params)
+    return [row[0] for row in cur.fetchall()]
+
+
+@pytest.mark.parametrize('sort', sorted(employee_list.SORTS))
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('status, q', [(None, None), ('active', None), (None, 'a')])
+def test_walk_every_page_forward_and_back(connect, datagen_tenants, sort, descending, status, q):
+    cur = connect().cursor()
+    user_id = datagen_tenants[0]['user_id']
+    options = dict(sort=sort, descending=descending, status=status, q=q, limit=7)
+    expected = expected_ids(cur, user_id, sort, descending, status, q)
+    assert expected
+
+    forward = []
+    page = employee_list.load_page(cur, user_id, **options)
+    assert page['prev_cursor'] is None
+    while True:
+        forward.append([row['id'] for row in page['employees']])
+        if page['next_cursor'] is None:
+            break
+        page = employee_list.load_page(cur, user_id, after=page['next_cursor'], **options)
+    assert [employee_id for ids in forward for employee_id in ids] == expected
+
+    backward = [[row['id'] for row in page['employees']]]
+    while page['prev_cursor'] is not None:
+        page = employee_list.load_page(cur, user_id, before=page['prev_cursor'], **options)
+        backward.append([row['id'] for row in page['employees']])
+    assert backward[::-1] == forward
+    assert page['next_cursor'] is not None or len(forward) == 1
+
+    assert employee_list.count_matching(cur, user_id, status, q) == len(expected)
@@ -0,0 +1,26 @@
+"""The month filters must range-scan an attendance date index (needs TEST_MYSQL_DSN)"""
+import pytest
+
+MONTH = '2025-03'  # Inside the default datagen anchor's year of attendance
+
+INDEXES = ('idx_attendance_user_date', 'idx_attendance_employee_date', 'unique_user_attendance')
+
+
+@pytest.fixture(scope='module')
+def user_id(datagen_tenants):
+    """A tenant among others, with a year of attendance"""
+    return datagen_tenants[0]['user_id']
+
+
+@pytest.mark.parametrize('name', ['dashboard month salary', 'weekly salary report', 'payroll attendance'])
+def test_month_query_range_scans_attendance(connect, user_id, name):
+    app = pytest.importorskip('app')
+    query, params = app.month_queries(user_id, MONTH)[name]
+
+    steps = app.explain_attendance_steps(connect().cursor(), query, params)
+
+    assert steps, f'{name}: no attendance step in the plan'
+    for step in steps:
+        assert step['type'] == 'range', f"{name}: attendance read by {step['type']}"
+        assert step['key'] in INDEXES, f"{name}: attendance read through {step['key']}"
+        assert app.is_month_range_scan(step)
@@ -0,0 +1,134 @@
+"""Outbox delivery against a stand-in SMTP server on localhost"""
+import socketserver
+import threading
+
+import pytest
+
+import outbox
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: greets, accepts every envelope and stores the DATA"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 stub ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 stub')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for data_line in iter(self.rfile.readline, b''):
+                    if data_line == b'.\r\n':
+                        break
+                    data.append(data_line[1:] if data_line.startswith(b'..') else data_line)
+                self.server.messages.append((recipients, b''.join(data).decode('utf-8')))
+                self.reply('250 OK queued')
+            elif verb in ('NOOP', 'RSET'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Not implemented')
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StubSMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_smtp_connection_is_reused(smtp_server):
+    smtp = outbox.SMTPConnection('127.0.0.1', smtp_server.server_address[1])
+    for n in range(3):
+        message = outbox.build_message('app@test.invalid', ['to@test.invalid'], f'Hello {n}', 'Body', None)
+        smtp.send(message, 'app@test.invalid', ['to@test.invalid'])
+    smtp.close()
+
+    assert smtp_server.connections == 1
+    assert [recipients for recipients, _ in smtp_server.messages] == [['to@test.invalid']] * 3
+    assert 'Subject: Hello 2' in smtp_server.messages[2][1]
+
+
+def test_send_batch_delivers_and_marks_sent(connect, smtp_server):
+    """Needs TEST_MYSQL_DSN"""
+    connection = connect()
+    cur = connection.cursor()
+    # Nothing else in the table is due while this test runs
+    cur.execute("UPDATE email_outbox SET next_attempt_at = NOW() + INTERVAL 1 DAY WHERE status IN ('pending', 'sending')")
+    ids = []
+    for n in range(3):
+        cur.execute("""
+            INSERT INTO email_outbox (sender, recipients, subject, body, html)
+            VALUES (%s, %s, %s, %s, %s)
+        """, ('app@test.invalid', f'["user{n}@test.invalid"]', f'Outbox {n}', 'Plain body', '<p>HTML body</p>'))
+        ids.append(cur.lastrowid)
+    connection.commit()
+
+    smtp = outbox.SMTPConnection('127.0.0.1', smtp_server.server_address[1])
+    try:
+        sent, failed = outbox.send_batch(connection, smtp, batch_size=10, log=lambda *args: None)
+    finally:
+        smtp.close()
+
+    assert (sent, failed) == (3, 0)
+    assert smtp_server.connections == 1
+    assert sorted(recipients[0] for recipients, _ in smtp_server.messages) == [
+        'user0@test.invalid', 'user1@test.invalid', 'user2@test.invalid']
+    assert all('HTML body' in data for _, data in smtp_server.messages)
+
+    cur.execute("SELECT status, attempts, sent_at IS NOT NULL FROM email_outbox WHERE id IN (%s, %s, %s)", ids)
+    assert cur.fetchall() == (('sent', 1, 1),) * 3
+
+
+class FailingSMTP:
+    def send(self, message, sender, recipients):
+        raise OSError('connection refused')
+
+
+def test_failed_send_is_retried_on_the_database_clock(connect):
+    """Needs TEST_MYSQL_DSN - the backoff is measured from MySQL's NOW(), like the claim"""
+    connection = connect()
+    cur = connection.cursor()
+    cur.execute("UPDATE email_outbox SET next_attempt_at = NOW() + INTERVAL 1 DAY WHERE status IN ('pending', 'sending')")
+    cur.execute("""
+        INSERT INTO email_outbox (sender, recipients, subject, body, html)
+        VALUES ('app@test.invalid', '["retry@test.invalid"]', 'Retry', 'Body', NULL)
+    """)
+    outbox_id = cur.lastrowid
+    connection.commit()
+
+    sent, failed = outbox.send_batch(connection, FailingSMTP(), batch_size=10, log=lambda *args: None)
+
+    assert (sent, failed) == (0, 1)
+    cur.execute("""
+        SELECT status, attempts, TIMESTAMPDIFF(SECOND, NOW(), next_attempt_at)
+        FROM email_outbox WHERE id = %s
+    """, (outbox_id,))
+    status, attempts, delay = cur.fetchone()
+    assert (status, attempts) == ('pending', 1)
+    assert outbox.backoff_seconds(1) - 5 <= delay <= outbox.backoff_seconds(1)
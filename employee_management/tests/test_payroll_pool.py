@@ -0,0 +1,36 @@
+"""Payroll chunks computed in the shared process pool"""
+
+import numpy as np
+
+import payroll
+
+
+def employees():
+    return [payroll.normalize_employee({
+        'employee_id': employee_id,
+        'employee_name': f'Employee {employee_id}',
+        'leaving_date': None,
+        'per_day_salary': 400 + employee_id,
+        'working_days_per_week': None,
+        'holiday_day': None,
+        'salary_type': None,
+        'monthly_salary': None,
+    }) for employee_id in (1, 2, 3)]
+
+
+def attendance():
+    return {
+        'employee_id': np.array([1, 1, 2, 3], dtype=np.int64),
+        'day': np.array([3, 4, 3, 10], dtype=np.int64),
+        'status': np.array([payroll.PRESENT, payroll.HALF_DAY, payroll.ABSENT, payroll.PRESENT], dtype=np.int8),
+        'advance': np.array([0, 100, 0, 0], dtype=np.float64),
+    }
+
+
+def test_pool_does_not_fork_the_web_worker():
+    with payroll._executor_lock:
+        executor = payroll.get_executor(2)
+        future = executor.submit(payroll._compute_chunk, '2025-03', employees(), attendance())
+
+    assert executor._mp_context.get_start_method() != 'fork'
+    assert future.result() == payroll._compute_chunk('2025-03', employees(), attendance())
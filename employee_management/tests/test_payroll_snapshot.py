@@ -0,0 +1,100 @@
+"""payroll_snapshot invalidation against concurrent attendance writes (needs TEST_MYSQL_DSN)"""
+from datetime import date
+
+import pytest
+
+import payroll
+
+MONTH = '2024-03'
+DAY = date(2024, 3, 4)
+
+
+def mark(cur, user_id, employee_id, attendance_date, status):
+    cur.execute("""
+        INSERT INTO attendance (user_id, employee_id, attendance_date, status)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE status = VALUES(status)
+    """, (user_id, employee_id, attendance_date, status))
+
+
+@pytest.fixture
+def employee(connect, tenant):
+    connection = connect()
+    cur = connection.cursor()
+    cur.execute("INSERT INTO employees (user_id, name, joining_date) VALUES (%s, %s, %s)",
+                (tenant, 'Snapshot Test', date(2024, 1, 1)))
+    employee_id = cur.lastrowid
+    mark(cur, tenant, employee_id, DAY, 'present')
+    connection.commit()
+    return employee_id
+
+
+def test_snapshot_is_served_until_a_write(connect, tenant, employee):
+    cur = connect().cursor()
+    first = payroll.get_month(cur, tenant, MONTH, [employee])[employee]
+    cur.connection.commit()
+
+    fresh, generations = payroll.load_snapshots(cur, tenant, MONTH, payroll.load_employees(cur, tenant, [employee]))
+    assert fresh[employee]['present_days'] == first['present_days'] == 1
+
+    mark(cur, tenant, employee, DAY, 'absent')
+    payroll.mark_attendance_stale(cur, tenant, [(employee, DAY)])
+    cur.connection.commit()
+
+    fresh, new_generations = payroll.load_snapshots(cur, tenant, MONTH, payroll.load_employees(cur, tenant, [employee]))
+    assert employee not in fresh
+    assert new_generations[employee] == generations[employee] + 1
+
+
+@pytest.mark.parametrize('snapshot_row', [False, True], ids=['no-snapshot-row', 'stale-snapshot-row'])
+def test_write_between_read_and_save_is_not_overwritten(connect, tenant, employee, snapshot_row):
+    if snapshot_row:
+        setup = connect().cursor()
+        payroll.get_month(setup, tenant, MONTH, [employee])
+        payroll.mark_attendance_stale(setup, tenant, [(employee, DAY)])
+        setup.connection.commit()
+
+    # Reader: the steps of payroll.get_month(), paused before the snapshot is saved
+    reader = connect().cursor()
+    employees = payroll.load_employees(reader, tenant, [employee])
+    fresh, generations = payroll.load_snapshots(reader, tenant, MONTH, employees)
+    assert fresh == {}
+    computed = payroll.compute_payroll(MONTH, employees, payroll.load_attendance(reader, tenant, MONTH, [employee]))
+    assert computed[employee]['present_days'] == 1
+
+    # Writer: update_attendance commits in between
+    writer = connect().cursor()
+    mark(writer, tenant, employee, DAY, 'absent')
+    payroll.mark_attendance_stale(writer, tenant, [(employee, DAY)])
+    writer.connection.commit()
+
+    payroll.save_snapshots(reader, tenant, MONTH, computed.values(), generations)
+    reader.connection.commit()
+
+    check = connect().cursor()
+    fresh, _ = payroll.load_snapshots(check, tenant, MONTH, payroll.load_employees(check, tenant, [employee]))
+    assert employee not in fresh
+    salary_data = payroll.get_month(check, tenant, MONTH, [employee])[employee]
+    assert salary_data['present_days'] == 0
+    assert salary_data['absent_days'] == 1
+
+
+def test_salary_config_change_during_first_computation(connect, tenant, employee):
+    reader = connect().cursor()
+    employees = payroll.load_employees(reader, tenant, [employee])
+    fresh, generations = payroll.load_snapshots(reader, tenant, MONTH, employees)
+    computed = payroll.compute_payroll(MONTH, employees, payroll.load_attendance(reader, tenant, MONTH, [employee]))
+
+    # No snapshot row exists yet, so this invalidation matches nothing
+    writer = connect().cursor()
+    writer.execute("""
+        INSERT INTO salary_config (user_id, employee_id, per_day_salary) VALUES (%s, %s, %s)
+    """, (tenant, employee, 500))
+    payroll.mark_snapshots_stale(writer, tenant, employee)
+    writer.connection.commit()
+
+    payroll.save_snapshots(reader, tenant, MONTH, computed.values(), generations)
+    reader.connection.commit()
+
+    check = connect().cursor()
+    assert payroll.get_month(check, tenant, MONTH, [employee])[employee]['total_salary'] == 500
@@ -0,0 +1,39 @@
+"""Serialization of cached reports for the shared (Redis) backend"""
+from datetime import date, datetime
+from decimal import Decimal
+import json
+import pickle
+
+import pytest
+
+import report_cache
+
+
+def test_report_round_trips_through_json():
+    value = {
+        'has_employees': True,
+        'selected_employee_info': (7, 'Asha', None),
+        'report_data': {
+            'weekly_data': {7: {'name': 'Asha', 'leaving_date': date(2025, 3, 31), 'monthly_salary': 0.0,
+                                'weekly_data': {'Week 10': {'days': [{'date': '2025-03-05', 'advance': 100.0}]}}}},
+            'employee_summary': [{'joining_date': date(2024, 1, 2), 'per_day_salary': Decimal('350.00')}],
+            'total_salary': 1234.5,
+        },
+        'generated_at': datetime(2025, 3, 5, 10, 30, 15),
+        'months': ['2025-03', '2025-02'],
+    }
+
+    payload = report_cache.encode(value)
+
+    json.loads(payload)  # plain JSON
+    assert report_cache.decode(payload) == value
+
+
+def test_unknown_types_are_not_cached():
+    with pytest.raises(TypeError):
+        report_cache.encode({'value': object()})
+
+
+def test_pickled_payload_is_not_loaded():
+    with pytest.raises(ValueError):
+        report_cache.decode(pickle.dumps({'report_data': {}}))
@@ -0,0 +1,134 @@
+"""Garbage collection of profile photo uploads
+
+A file in the upload folder is live when a non-deleted employee references
+it through ``employees.profile_image`` - for content-hashed uploads that
+covers its size variants and manifest too (see images.variant_names).
+Everything else is an orphan: photos replaced in edit_employee, photos of
+soft-deleted employees, and leftovers of interrupted writes. Orphans are only
+removed once older than a grace period, so an upload whose employee row has
+not been committed yet is never touched.
+
+The directory is walked with os.scandir, so memory does not grow with the
+number of files - only with the number of referenced photos.
+"""
+import os
+import threading
+import time
+
+import images
+
+LOCK_NAME = 'upload_gc'
+
+
+def referenced_files(cur):
+    """Names of every file that must be kept"""
+    cur.execute("""
+        SELECT DISTINCT profile_image FROM employees
+        WHERE deleted_at IS NULL AND profile_image IS NOT NULL AND profile_image <> ''
+    """)
+    keep = set()
+    for (name,) in cur.fetchall():
+        keep.add(name)
+        keep.update(images.variant_names(name))
+    return keep
+
+
+def _original_is_fresh(upload_folder, digest, cutoff):
+    """Whether the original of a variant/manifest was (re)written within the grace period"""
+    for ext in ('jpg', 'jpeg', 'png', 'gif'):
+        try:
+            if os.stat(os.path.join(upload_folder, f'{digest}.{ext}')).st_mtime >= cutoff:
+                return True
+        except FileNotFoundError:
+            continue
+    return False
+
+
+def collect(upload_folder, keep, grace_seconds=86400, dry_run=False, log=print):
+    """Delete orphans older than grace_seconds; returns counts and bytes reclaimed"""
+    cutoff = time.time() - grace_seconds
+    stats = {'scanned': 0, 'kept': 0, 'too_recent': 0, 'deleted': 0, 'bytes_reclaimed': 0, 'errors': 0}
+
+    if not os.path.isdir(upload_folder):
+        return stats
+
+    with os.scandir(upload_folder) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            stats['scanned'] += 1
+            if entry.name in keep:
+                stats['kept'] += 1
+                continue
+
+            stat = entry.stat(follow_symlinks=False)
+            derived = images.DERIVED_NAME.match(entry.name)
+            if stat.st_mtime >= cutoff or (derived and _original_is_fresh(upload_folder, derived.group(1), cutoff)):
+                stats['too_recent'] += 1
+                continue
+
+            if not dry_run:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    stats['errors'] += 1
+                    log(f'Could not delete {entry.name}: {str(e)}')
+                    continue
+            stats['deleted'] += 1
+            stats['bytes_reclaimed'] += stat.st_size
+
+    return stats
+
+
+def run(connection, upload_folder, grace_seconds=86400, dry_run=False, log=print):
+    """One GC pass; skipped (returns None) while another process holds the GC lock"""
+    cur = connection.cursor()
+    try:
+        cur.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+        if not cur.fetchone()[0]:
+            return None
+        try:
+            keep = referenced_files(cur)
+            connection.commit()
+            return collect(upload_folder, keep, grace_seconds, dry_run, log)
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cur.fetchall()
+    finally:
+        cur.close()
+
+
+class ScheduledCollector:
+    """Background thread running run() every interval_hours"""
+
+    def __init__(self, app, mysql):
+        self.app = app
+        self.mysql = mysql
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        with self._lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='upload-gc', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        config = self.app.config
+        while True:
+            time.sleep(config['UPLOAD_GC_INTERVAL_HOURS'] * 3600)
+            pool = self.mysql.pool
+            connection = pool.borrow()
+            discard = False
+            try:
+                stats = run(connection, config['UPLOAD_FOLDER'], config['UPLOAD_GC_GRACE_HOURS'] * 3600)
+                if stats is not None:
+                    print(f"Upload GC: {stats}")
+            except Exception as e:
+                discard = True
+                print(f"Upload GC error: {str(e)}")
+            finally:
+                pool.give_back(connection, discard=discard)